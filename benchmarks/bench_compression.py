@@ -0,0 +1,73 @@
+"""
+Compare the size and CPU cost of packing messages with and without compression.
+
+Payloads imitate serialized Python objects: base64 text of pickled data, which is
+partly repetitive and partly random.
+
+    python benchmarks/bench_compression.py
+"""
+
+from __future__ import annotations
+
+import base64
+import os
+import pickle
+import timeit
+import uuid
+
+from globus_compute_common.messagepack import MessagePacker
+from globus_compute_common.messagepack.message_types import Result, Task
+
+PAYLOAD_SIZES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+def make_payload(size: int) -> str:
+    # roughly half structured data and half random bytes, as in a pickled object
+    # holding both names and numeric arrays
+    records = [{"name": f"record-{i}", "value": i * 1.5} for i in range(size // 80)]
+    raw = pickle.dumps(records) + os.urandom(size // 2)
+    return base64.b64encode(raw).decode()[:size]
+
+
+def measure(
+    packer: MessagePacker, message: Task | Result, compress: bool
+) -> tuple[int, float, float]:
+    on_wire = packer.pack(message, compress=compress)
+    number = max(1, 2_000_000 // max(len(on_wire), 1))
+    pack_time = min(
+        timeit.repeat(
+            lambda: packer.pack(message, compress=compress), number=number, repeat=3
+        )
+    )
+    unpack_time = min(
+        timeit.repeat(lambda: packer.unpack(on_wire), number=number, repeat=3)
+    )
+    return len(on_wire), pack_time / number, unpack_time / number
+
+
+def main() -> None:
+    packer = MessagePacker()
+    print(
+        f"{'message':<8} {'payload':>10} {'size':>10} {'zlib size':>10} {'ratio':>6} "
+        f"{'pack us':>9} {'zlib pack us':>13} {'unpack us':>10} "
+        f"{'zlib unpack us':>15}"
+    )
+    for size in PAYLOAD_SIZES:
+        payload = make_payload(size)
+        messages = (
+            Task(task_id=uuid.uuid4(), task_buffer=payload),
+            Result(task_id=uuid.uuid4(), data=payload),
+        )
+        for message in messages:
+            plain_size, plain_pack, plain_unpack = measure(packer, message, False)
+            zlib_size, zlib_pack, zlib_unpack = measure(packer, message, True)
+            print(
+                f"{message.message_type:<8} {size:>10} {plain_size:>10} "
+                f"{zlib_size:>10} {zlib_size / plain_size:>6.2f} "
+                f"{plain_pack * 1e6:>9.1f} {zlib_pack * 1e6:>13.1f} "
+                f"{plain_unpack * 1e6:>10.1f} {zlib_unpack * 1e6:>15.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
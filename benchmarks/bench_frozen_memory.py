@@ -0,0 +1,137 @@
+"""
+Compare the memory held by buffered messages and their frozen variants.
+
+Many messages are unpacked and kept, as a service which buffers tasks or results
+would, and the memory which they retain is measured, along with the time to unpack
+and to pack each message.
+
+    python benchmarks/bench_frozen_memory.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import timeit
+import tracemalloc
+import typing as t
+import uuid
+
+from globus_compute_common.messagepack import MessagePacker
+from globus_compute_common.messagepack.message_types import (
+    Container,
+    ContainerImage,
+    Message,
+    Result,
+    ResultErrorDetails,
+    Task,
+    TaskCancel,
+    TaskTransition,
+)
+from globus_compute_common.tasks.constants import ActorName, TaskState
+
+PAYLOAD_SIZE = 100
+
+
+def _transitions() -> list[TaskTransition]:
+    return [
+        TaskTransition(timestamp=1700000000, state=state, actor=actor)
+        for state, actor in (
+            (TaskState.WAITING_FOR_LAUNCH, ActorName.INTERCHANGE),
+            (TaskState.RUNNING, ActorName.WORKER),
+            (TaskState.EXEC_END, ActorName.WORKER),
+        )
+    ]
+
+
+FACTORIES: dict[str, t.Callable[[], Message]] = {
+    "task": lambda: Task(task_id=uuid.uuid4(), task_buffer="x" * PAYLOAD_SIZE),
+    "task_with_container": lambda: Task(
+        task_id=uuid.uuid4(),
+        container=Container(
+            container_id=uuid.uuid4(),
+            name="c",
+            images=[
+                ContainerImage(
+                    image_type="docker",
+                    location="python:3.12",
+                    created_at=1700000000,
+                    modified_at=1700000000,
+                    build_status="ready",
+                    build_stderr=None,
+                )
+            ],
+        ),
+        task_buffer="x" * PAYLOAD_SIZE,
+    ),
+    "result": lambda: Result(
+        task_id=uuid.uuid4(),
+        data="x" * PAYLOAD_SIZE,
+        details={"os": "linux"},
+        error_details=ResultErrorDetails(code="0", user_message=""),
+        task_statuses=_transitions(),
+    ),
+    "task_cancel": lambda: TaskCancel(task_id=uuid.uuid4()),
+}
+
+
+def _retained_per_message(
+    unpack: t.Callable[[bytes], object], bufs: list[bytes]
+) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        kept = [unpack(buf) for buf in bufs]
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del kept
+    return retained / len(bufs)
+
+
+def _time_per_op(func: t.Callable[[], object]) -> float:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=3, number=number)) / number
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--count",
+        type=int,
+        default=100_000,
+        help="the number of messages to buffer (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    packer = MessagePacker()
+    print(
+        f"{'message':<20} {'bytes/msg':>10} {'frozen':>8} {'saving':>7} "
+        f"{'unpack us':>10} {'frozen':>8} {'pack us':>8} {'frozen':>8}"
+    )
+    for name, factory in FACTORIES.items():
+        bufs = [packer.pack(factory()) for _ in range(args.count)]
+        plain = _retained_per_message(packer.unpack, bufs)
+        frozen = _retained_per_message(packer.unpack_frozen, bufs)
+
+        message = packer.unpack(bufs[0])
+        frozen_message = packer.unpack_frozen(bufs[0])
+        times = [
+            _time_per_op(func) * 1e6
+            for func in (
+                lambda: packer.unpack(bufs[0]),
+                lambda: packer.unpack_frozen(bufs[0]),
+                lambda: packer.pack(message),
+                lambda: packer.pack(frozen_message),
+            )
+        ]
+        print(
+            f"{name:<20} {plain:>10.0f} {frozen:>8.0f} {1 - frozen / plain:>7.0%} "
+            f"{times[0]:>10.2f} {times[1]:>8.2f} {times[2]:>8.2f} {times[3]:>8.2f}",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""
+Benchmark packing and unpacking every messagepack message class.
+
+Each case packs and unpacks one message, measuring the time per operation and the
+peak memory allocated by a single operation. Messages with a variable-size payload
+are measured at small, medium, and huge sizes.
+
+Results can be saved as a baseline, and later runs compared against it. A run which
+is slower, or allocates more, than the baseline by more than the threshold fails.
+Timings depend on the machine, so compare only against a baseline which was saved on
+the same machine.
+
+Protocol version 2 can also be compared against version 1 within a single run. v2 is
+meant for messages with large payloads, and is slower than v1 for status reports and
+small messages, so only tasks and results with medium and huge payloads are checked:
+a run in which v2 is slower than v1 for one of them, by more than the threshold,
+fails.
+
+    # run all benchmarks
+    python benchmarks/bench_messagepack.py
+
+    # save a baseline, then compare against it
+    python benchmarks/bench_messagepack.py --save benchmarks/baseline.json
+    python benchmarks/bench_messagepack.py --compare benchmarks/baseline.json
+
+    # check that v2 is no slower than v1 for messages with large payloads
+    python benchmarks/bench_messagepack.py --compare-versions
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import sys
+import timeit
+import tracemalloc
+import typing as t
+import uuid
+
+from globus_compute_common.messagepack import MessagePacker
+from globus_compute_common.messagepack.message_types import (
+    ALL_MESSAGE_CLASSES,
+    ColumnarTaskStatuses,
+    Container,
+    ContainerImage,
+    EPStatusReport,
+    ManagerStatusReport,
+    Message,
+    Result,
+    ResultErrorDetails,
+    Task,
+    TaskCancel,
+    TaskTransition,
+)
+from globus_compute_common.messagepack.protocol_versions.proto2 import has_msgpack
+from globus_compute_common.tasks.constants import ActorName, TaskState
+
+# payload sizes in bytes, for messages carrying a string payload
+PAYLOAD_SIZES = {"small": 100, "medium": 10_000, "huge": 1_000_000}
+# numbers of entries, for messages carrying a collection
+COLLECTION_SIZES = {"small": 1, "medium": 100, "huge": 5_000}
+
+DEFAULT_THRESHOLD = 0.25
+METRICS = ("pack_ns", "unpack_ns", "pack_peak_bytes", "unpack_peak_bytes")
+# the cases in which v2 must be no slower than v1: the messages with large payloads,
+# for which it is meant
+VERSION_CHECKED_CASES = ("task/medium", "task/huge", "result/medium", "result/huge")
+
+
+def _payload(size: int) -> str:
+    # base64-like text, as produced by serializing Python objects
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+    return (alphabet * (size // len(alphabet) + 1))[:size]
+
+
+def _image(stderr_size: int = 0) -> ContainerImage:
+    return ContainerImage(
+        image_type="docker",
+        location="python:3.12",
+        created_at=1700000000,
+        modified_at=1700000000,
+        build_status="ready",
+        build_stderr=_payload(stderr_size) if stderr_size else None,
+    )
+
+
+def _transitions() -> list[TaskTransition]:
+    return [
+        TaskTransition(timestamp=1700000000, state=state, actor=actor)
+        for state, actor in (
+            (TaskState.WAITING_FOR_LAUNCH, ActorName.INTERCHANGE),
+            (TaskState.RUNNING, ActorName.WORKER),
+            (TaskState.EXEC_END, ActorName.WORKER),
+        )
+    ]
+
+
+def _task_statuses(count: int) -> dict[str, list[TaskTransition]]:
+    return {str(uuid.UUID(int=i)): _transitions() for i in range(count)}
+
+
+# each message class maps to a factory, which builds a message of the given size
+# classes without a variable-size payload have only a "small" case
+FACTORIES: dict[type[Message], t.Callable[[str], Message]] = {
+    Task: lambda size: Task(
+        task_id=uuid.uuid4(),
+        container=Container(container_id=uuid.uuid4(), name="c", images=[_image()]),
+        task_buffer=_payload(PAYLOAD_SIZES[size]),
+    ),
+    Result: lambda size: Result(
+        task_id=uuid.uuid4(),
+        data=_payload(PAYLOAD_SIZES[size]),
+        details={"os": "linux", "python_version": "3.12"},
+        error_details=ResultErrorDetails(code="0", user_message=""),
+        task_statuses=_transitions(),
+    ),
+    ContainerImage: lambda size: _image(PAYLOAD_SIZES[size]),
+    Container: lambda size: Container(
+        container_id=uuid.uuid4(),
+        name="c",
+        images=[_image() for _ in range(COLLECTION_SIZES[size])],
+    ),
+    EPStatusReport: lambda size: EPStatusReport(
+        endpoint_id=uuid.uuid4(),
+        ep_status_report={"managers": 4, "total_workers": 64, "idle_workers": 3},
+        task_statuses=_task_statuses(COLLECTION_SIZES[size]),
+    ),
+    ManagerStatusReport: lambda size: ManagerStatusReport(
+        task_statuses=_task_statuses(COLLECTION_SIZES[size])
+    ),
+    TaskCancel: lambda size: TaskCancel(task_id=uuid.uuid4()),
+    TaskTransition: lambda size: _transitions()[0],
+}
+FIXED_SIZE_CLASSES = {TaskCancel, TaskTransition}
+
+# variants of messages, measured in addition to the plain form of each class
+VARIANT_FACTORIES: dict[str, t.Callable[[str], Message]] = {
+    "ep_status_report_columns": lambda size: EPStatusReport(
+        endpoint_id=uuid.uuid4(),
+        ep_status_report={"managers": 4, "total_workers": 64, "idle_workers": 3},
+        task_statuses=ColumnarTaskStatuses(_task_statuses(COLLECTION_SIZES[size])),
+    ),
+}
+
+
+def iter_cases(
+    protocol_versions: t.Iterable[int],
+) -> t.Iterator[tuple[str, int, Message]]:
+    missing = ALL_MESSAGE_CLASSES - FACTORIES.keys()
+    if missing:
+        raise RuntimeError(f"no benchmark defined for {missing}")
+
+    for protocol_version in protocol_versions:
+        for cls in sorted(FACTORIES, key=lambda c: c.Meta.message_type):
+            sizes = ["small"] if cls in FIXED_SIZE_CLASSES else list(PAYLOAD_SIZES)
+            for size in sizes:
+                name = f"v{protocol_version}/{cls.Meta.message_type}/{size}"
+                yield name, protocol_version, FACTORIES[cls](size)
+        for variant, factory in VARIANT_FACTORIES.items():
+            for size in PAYLOAD_SIZES:
+                yield (
+                    f"v{protocol_version}/{variant}/{size}",
+                    protocol_version,
+                    factory(size),
+                )
+
+
+def _time_per_op(func: t.Callable[[], object], repeat: int) -> float:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def _peak_allocation(func: t.Callable[[], object]) -> int:
+    # measure one call on its own, so that the peak is not inflated by other objects
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_case(
+    packer: MessagePacker, protocol_version: int, message: Message, repeat: int
+) -> dict[str, float]:
+    on_wire = packer.pack(message, protocol_version=protocol_version)
+
+    def pack() -> bytes:
+        return packer.pack(message, protocol_version=protocol_version)
+
+    def unpack() -> Message:
+        return packer.unpack(on_wire)
+
+    return {
+        "pack_ns": _time_per_op(pack, repeat) * 1e9,
+        "unpack_ns": _time_per_op(unpack, repeat) * 1e9,
+        "pack_peak_bytes": _peak_allocation(pack),
+        "unpack_peak_bytes": _peak_allocation(unpack),
+        "size_bytes": len(on_wire),
+    }
+
+
+def find_regressions(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    threshold: float,
+) -> list[str]:
+    regressions = []
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+        for metric in METRICS:
+            before, after = baseline[name][metric], metrics[metric]
+            if after > before * (1 + threshold):
+                regressions.append(
+                    f"{name} {metric}: {before:.0f} -> {after:.0f} "
+                    f"(+{(after / before - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def find_version_slowdowns(
+    results: dict[str, dict[str, float]], threshold: float
+) -> list[str]:
+    slowdowns = []
+    for name, metrics in results.items():
+        protocol_version, _, case = name.partition("/")
+        if protocol_version != "v2" or not any(
+            checked in name for checked in VERSION_CHECKED_CASES
+        ):
+            continue
+        v1_metrics = results.get(f"v1/{case}")
+        if v1_metrics is None:
+            continue
+        for metric in ("pack_ns", "unpack_ns"):
+            v1, v2 = v1_metrics[metric], metrics[metric]
+            if v2 > v1 * (1 + threshold):
+                slowdowns.append(
+                    f"{case} {metric}: v1 {v1:.0f}, v2 {v2:.0f} "
+                    f"(+{(v2 / v1 - 1) * 100:.0f}%)"
+                )
+    return slowdowns
+
+
+def _format_row(name: str, metrics: dict[str, float]) -> str:
+    pack_ns, unpack_ns = metrics["pack_ns"], metrics["unpack_ns"]
+    size_mb = metrics["size_bytes"] / 1e6
+    return (
+        f"{name:<36} {metrics['size_bytes']:>10.0f} "
+        f"{1e9 / pack_ns:>11.0f} {size_mb * 1e9 / pack_ns:>8.1f} "
+        f"{1e9 / unpack_ns:>11.0f} {size_mb * 1e9 / unpack_ns:>8.1f} "
+        f"{metrics['pack_peak_bytes']:>12.0f} {metrics['unpack_peak_bytes']:>12.0f}"
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--save", metavar="PATH", help="save results as a baseline")
+    parser.add_argument(
+        "--compare", metavar="PATH", help="compare results against a baseline"
+    )
+    parser.add_argument(
+        "--compare-versions",
+        action="store_true",
+        help="check that protocol version 2 is no slower than version 1 for "
+        "messages with large payloads",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="the fractional increase over the baseline which counts as a "
+        "regression (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--filter", default="", help="only run cases whose names contain this string"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="timing repetitions (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    protocol_versions = [1, 2] if has_msgpack else [1]
+    packer = MessagePacker()
+    results: dict[str, dict[str, float]] = {}
+
+    print(
+        f"{'case':<36} {'size':>10} {'pack op/s':>11} {'MB/s':>8} "
+        f"{'unpack op/s':>11} {'MB/s':>8} {'pack peak':>12} {'unpack peak':>12}"
+    )
+    for name, protocol_version, message in iter_cases(protocol_versions):
+        if args.filter not in name:
+            continue
+        results[name] = run_case(packer, protocol_version, message, args.repeat)
+        print(_format_row(name, results[name]), flush=True)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"saved baseline to {args.save}")
+
+    failed = False
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            failed = True
+        else:
+            print(f"\nno regressions over {args.threshold:.0%} against {args.compare}")
+
+    if args.compare_versions:
+        slowdowns = find_version_slowdowns(results, args.threshold)
+        if slowdowns:
+            print(f"\n{len(slowdowns)} case(s) where v2 is slower than v1:")
+            for slowdown in slowdowns:
+                print(f"  {slowdown}")
+            failed = True
+        else:
+            print(f"\nv2 is within {args.threshold:.0%} of v1 in every checked case")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,22 @@
+from .aio import AsyncMessagePacker
+from .container_cache import ContainerCache
 from .exceptions import (
     InvalidMessageError,
     UnrecognizedProtocolVersion,
     WrongMessageTypeError,
 )
+from .framing import FrameDecoder, MessageStreamDecoder
+from .lazy import LazyMessage
 from .message_types import Message
+from .negotiation import ProtocolNegotiator
 from .packer import DEFAULT_MESSAGE_PACKER, MessagePacker, pack, unpack
+from .payload_storage import offload_payload, resolve_payload
+from .protocol import MessageHeader, UnpackMode
+from .unknown_fields import (
+    DEFAULT_UNKNOWN_FIELD_REPORTER,
+    UnknownFieldReporter,
+    UnknownFields,
+)
 
 __all__ = (
     # main packing/unpacking interface
@@ -12,8 +24,24 @@ __all__ = (
     "DEFAULT_MESSAGE_PACKER",
     "pack",
     "unpack",
+    "MessageStreamDecoder",
+    "FrameDecoder",
+    "MessageHeader",
+    "ContainerCache",
+    "UnpackMode",
+    "ProtocolNegotiator",
+    # payloads held in a task storage
+    "offload_payload",
+    "resolve_payload",
+    # asyncio interface
+    "AsyncMessagePacker",
+    # reporting of unknown fields
+    "UnknownFieldReporter",
+    "UnknownFields",
+    "DEFAULT_UNKNOWN_FIELD_REPORTER",
     # common base for messages
     "Message",
+    "LazyMessage",
     # errors
     "InvalidMessageError",
     "UnrecognizedProtocolVersion",
@@ -0,0 +1,53 @@
+"""
+Stable integer codes for the enums which appear in messages.
+
+Binary encodings represent enum members as small integers rather than as their string
+values. These tables define that mapping.
+
+These tables are append-only. Reordering or removing entries changes the meaning of
+data already on the wire. Members which are not listed here are still encodable, but
+fall back to their string values.
+"""
+
+from __future__ import annotations
+
+import enum
+import typing as t
+
+from ..tasks.constants import ActorName, TaskState
+
+TASK_STATE_CODES: tuple[TaskState, ...] = (
+    TaskState.RECEIVED,
+    TaskState.WAITING_FOR_EP,
+    TaskState.WAITING_FOR_NODES,
+    TaskState.WAITING_FOR_LAUNCH,
+    TaskState.EXEC_START,
+    TaskState.EXEC_END,
+    TaskState.RUNNING,
+    TaskState.SUCCESS,
+    TaskState.FAILED,
+    TaskState.RESULT_RECEIVED,
+    TaskState.RESULT_ENQUEUED,
+    TaskState.AP_RECEIVED,
+    TaskState.AP_TASK_SUBMITTED,
+    TaskState.AP_TASKGROUP_RUNNING,
+    TaskState.AP_TASKGROUP_COMPLETED,
+    TaskState.AP_TASKGROUP_ERROR,
+)
+
+ACTOR_NAME_CODES: tuple[ActorName, ...] = (
+    ActorName.WORKER,
+    ActorName.MANAGER,
+    ActorName.INTERCHANGE,
+    ActorName.ENDPOINT,
+    ActorName.RESULT_PROCESSOR,
+    ActorName.WEB_SERVICE,
+    ActorName.ACTION_PROVIDER,
+)
+
+_EnumT = t.TypeVar("_EnumT", bound=enum.Enum)
+
+
+def reverse_codes(codes: tuple[_EnumT, ...]) -> dict[_EnumT, int]:
+    """Build the member -> code lookup for a code table."""
+    return {member: code for code, member in enumerate(codes)}
@@ -0,0 +1,114 @@
+"""
+An asyncio interface to MessagePacker.
+
+Unpacking takes around 1ms per MB of message, during which an event loop would be
+blocked. An `AsyncMessagePacker` unpacks small messages inline, where handing them to
+another thread would cost more than it saves, and hands messages of at least
+`offload_threshold` bytes to an executor:
+
+    packer = AsyncMessagePacker(MessagePacker())
+    message = await packer.unpack_async(buf)
+
+    # from an asyncio.StreamReader, or any async iterable of byte chunks
+    async for message in packer.iter_unpack_async(reader):
+        ...
+
+By default, the executor is the event loop's default thread pool. A thread frees the
+loop only while decoding releases the GIL, as decompression does, so it keeps the loop
+responsive while compressed messages are unpacked; JSON parsing and validation each
+hold the GIL throughout. To free the loop while large uncompressed messages are
+unpacked, use a `ProcessPoolExecutor`, which leaves only the copying of the message to
+and from the worker on the loop's process. The packer and each message are then
+pickled, so the packer must be picklable (e.g. it may not have a `container_cache`),
+and unknown fields are reported in the worker.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import typing as t
+
+from .framing import FrameDecoder
+from .message_types import Message
+from .packer import DEFAULT_MESSAGE_PACKER, MessagePacker
+from .protocol import ReadableBuffer
+
+# the size above which unpacking a message takes longer (around 100us) than handing
+# it to a thread
+DEFAULT_OFFLOAD_THRESHOLD = 128 * 1024
+
+
+class AsyncReader(t.Protocol):
+    """A stream with a coroutine `read()`, e.g. an `asyncio.StreamReader`."""
+
+    async def read(self, n: int = -1) -> bytes: ...
+
+
+class AsyncMessagePacker:
+    """
+    Unpack messages without blocking the event loop.
+
+    :param packer: the packer which unpacks each message
+    :param offload_threshold: messages of at least this many bytes are unpacked in
+        the executor; if None, every message is unpacked inline
+    :param executor: the executor for large messages; by default, the event loop's
+        default executor
+    """
+
+    def __init__(
+        self,
+        packer: MessagePacker = DEFAULT_MESSAGE_PACKER,
+        *,
+        offload_threshold: int | None = DEFAULT_OFFLOAD_THRESHOLD,
+        executor: concurrent.futures.Executor | None = None,
+    ) -> None:
+        self.packer = packer
+        self.offload_threshold = offload_threshold
+        self.executor = executor
+
+    async def unpack_async(self, buf: ReadableBuffer) -> Message:
+        """Unpack a message, in the executor if it is large."""
+        threshold = self.offload_threshold
+        if threshold is None or memoryview(buf).nbytes < threshold:
+            return self.packer.unpack(buf)
+
+        if isinstance(self.executor, concurrent.futures.ProcessPoolExecutor):
+            # a memoryview cannot be pickled
+            buf = bytes(buf)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.packer.unpack, buf)
+
+    async def iter_unpack_async(
+        self,
+        stream: AsyncReader | t.AsyncIterable[ReadableBuffer],
+        *,
+        chunk_size: int = 65536,
+    ) -> t.AsyncIterator[Message]:
+        """
+        Iterate over the messages in a newline-delimited stream, in order.
+
+        The stream may be a reader with a coroutine `read()`, which is read in chunks
+        of `chunk_size` bytes until it is exhausted, or an async iterable of chunks.
+        """
+        frames = FrameDecoder()
+        async for chunk in _iter_chunks(stream, chunk_size):
+            for frame in frames.feed(chunk):
+                yield await self.unpack_async(frame)
+        for frame in frames.finish():
+            yield await self.unpack_async(frame)
+
+
+async def _iter_chunks(
+    stream: AsyncReader | t.AsyncIterable[ReadableBuffer], chunk_size: int
+) -> t.AsyncIterator[ReadableBuffer]:
+    # a StreamReader is also an async iterable, but of lines, whose length is limited,
+    # so prefer read()
+    read = getattr(stream, "read", None)
+    if read is None:
+        async for chunk in t.cast(t.AsyncIterable[ReadableBuffer], stream):
+            yield chunk
+        return
+
+    while chunk := await read(chunk_size):
+        yield chunk
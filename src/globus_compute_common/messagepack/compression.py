@@ -0,0 +1,91 @@
+"""
+Compression of packed messages.
+
+Any packed message may be compressed, regardless of its protocol version. A
+compressed message is marked by setting the high bit of the version byte, which is
+followed by a one-byte codec identifier and the compressed body of the message:
+
+    [version | 0x80] [codec] [compressed body]
+
+Decompressing the body and restoring the version byte produces the original packed
+message, which is then unpacked by its protocol version as usual.
+
+Codecs:
+
+  - 1: zlib
+
+Because compressed bodies are binary, compressed messages may contain newlines and
+cannot be newline-delimited.
+"""
+
+from __future__ import annotations
+
+import zlib
+
+from .exceptions import InvalidMessageError
+from .protocol import ReadableBuffer
+
+COMPRESSED_FLAG = 0x80
+
+CODEC_ZLIB = 1
+
+# the codecs which can be decompressed
+CODECS = (CODEC_ZLIB,)
+
+# zlib's default level; on base64 payloads, level 1 is about 25% faster but produces
+# output a few percent larger, and bandwidth is the more expensive resource
+_ZLIB_LEVEL = 6
+
+
+def is_compressed(buf: ReadableBuffer) -> bool:
+    return bool(buf) and bool(buf[0] & COMPRESSED_FLAG)
+
+
+def compress(packed: ReadableBuffer, *, codec: int = CODEC_ZLIB) -> bytes:
+    """
+    Compress a packed message.
+
+    :param packed: the packed message, including its version byte
+    :param codec: the compression codec to use
+    """
+    if codec != CODEC_ZLIB:
+        raise ValueError(f"unrecognized compression codec {codec}")
+    view = memoryview(packed)
+    header = bytes((view[0] | COMPRESSED_FLAG, codec))
+    return header + zlib.compress(view[1:], _ZLIB_LEVEL)
+
+
+def decompress(buf: ReadableBuffer, *, max_size: int | None = None) -> bytes:
+    """
+    Decompress a compressed message, returning the packed message.
+
+    :param buf: the compressed message
+    :param max_size: if given, the largest permitted size of the decompressed
+        message, which protects against small messages which decompress to
+        exhaust memory
+    """
+    view = memoryview(buf)
+    if len(view) < 2:
+        raise InvalidMessageError("compressed message is missing its codec")
+    codec = view[1]
+    if codec != CODEC_ZLIB:
+        raise InvalidMessageError(f"unrecognized compression codec {codec}")
+
+    decompressor = zlib.decompressobj()
+    try:
+        # a max_length of 0 means that the output is unlimited
+        body = decompressor.decompress(view[2:], max_size or 0)
+        if max_size and not decompressor.eof:
+            # the output limit was reached, unless there is no more output to come
+            if decompressor.decompress(decompressor.unconsumed_tail, 1):
+                raise InvalidMessageError(
+                    f"compressed message exceeds the maximum size of {max_size} bytes"
+                )
+        if not decompressor.eof:
+            raise InvalidMessageError("compressed message body is truncated")
+    except zlib.error as err:
+        raise InvalidMessageError(f"could not decompress message: {err}") from err
+    if decompressor.unused_data:
+        raise InvalidMessageError("compressed message has trailing data")
+
+    return bytes((view[0] & ~COMPRESSED_FLAG,)) + body
@@ -0,0 +1,260 @@
+"""
+JSON schemas and a conformance corpus, for implementations of the messagepack
+protocols in other languages.
+
+For each registered message type, a JSON schema is generated which describes a whole
+v1 message: the envelope and the message data within it. A v1 message on the wire is
+the version byte (0x01) followed by a JSON document which matches this schema.
+
+The conformance corpus is a list of sample messages packed by this package, under
+every protocol version. Each entry holds the packed bytes (base64-encoded) and the
+message data as JSON, so that another implementation can check both that it reads
+every sample correctly, and that it packs the same data to exactly the same bytes.
+
+Generate both into a directory with
+
+    python -m globus_compute_common.messagepack.conformance OUTPUT_DIR
+
+which writes `OUTPUT_DIR/schemas/<message_type>.json` and `OUTPUT_DIR/corpus.json`.
+Only files whose content has changed are written, so the output can be kept under
+version control. With `--check`, nothing is written, and the command fails if any
+file is out of date.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import pathlib
+import sys
+import typing as t
+import uuid
+
+from ..tasks.constants import ActorName, TaskState
+from .message_types import (
+    MESSAGE_TYPES,
+    ColumnarTaskStatuses,
+    Container,
+    ContainerImage,
+    EPStatusReport,
+    ManagerStatusReport,
+    Message,
+    PayloadReference,
+    Result,
+    ResultErrorDetails,
+    Task,
+    TaskCancel,
+    TaskTransition,
+)
+from .packer import MessagePacker
+
+PROTOCOL_VERSIONS = (1, 2)
+
+_JSON_SCHEMA_DIALECT = "https://json-schema.org/draft/2020-12/schema"
+
+_ID_A = uuid.UUID("058cf505-a09e-4af3-a5f2-eb2e931af141")
+_ID_B = uuid.UUID("9b5a8e02-4b5e-4c4b-8f0e-0d2a3f6e9c71")
+
+
+def envelope_json_schema(message_type: str) -> dict[str, t.Any]:
+    """
+    The JSON schema of a whole v1 message of a registered message type.
+
+    :raises KeyError: if the message type is not registered
+    """
+    info = MESSAGE_TYPES[message_type]
+    data_schema = dict(info.json_schema)
+    definitions = data_schema.pop("$defs", {})
+    # the definitions which the data schema refers to are moved to the top level, so
+    # its references (e.g. "#/$defs/TaskTransition") still resolve
+    data_name = info.message_class.__name__
+    definitions = {**definitions, data_name: data_schema}
+
+    return {
+        "$schema": _JSON_SCHEMA_DIALECT,
+        "title": f"{data_name} message (protocol version 1)",
+        "type": "object",
+        "properties": {
+            "message_type": {"const": message_type},
+            "data": {"$ref": f"#/$defs/{data_name}"},
+        },
+        "required": ["message_type", "data"],
+        "$defs": definitions,
+    }
+
+
+def sample_messages() -> dict[str, Message]:
+    """
+    Sample messages of every built-in message class, by name.
+
+    Each class has at least one sample, and the samples include the edge cases of
+    encoding, e.g. escaped and non-ASCII strings, both forms of task statuses, and
+    both forms of payloads.
+    """
+    transitions = [
+        TaskTransition(
+            timestamp=1700000000,
+            state=TaskState.WAITING_FOR_LAUNCH,
+            actor=ActorName.INTERCHANGE,
+        ),
+        TaskTransition(
+            timestamp=1700000001, state=TaskState.RUNNING, actor=ActorName.WORKER
+        ),
+    ]
+    image = ContainerImage(
+        image_type="docker",
+        location="python:3.12",
+        created_at=1700000000,
+        modified_at=1700000100,
+        build_status="ready",
+        build_stderr=None,
+    )
+    container = Container(container_id=_ID_B, name="my container", images=[image])
+    task_statuses = {str(_ID_A): transitions, str(_ID_B): transitions[:1]}
+    reference = PayloadReference(
+        storage_id="s3",
+        s3bucket="my-bucket",
+        key=f"{_ID_A}.payload",
+        size=52428800,
+        sha256="9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08",
+    )
+    return {
+        "container": container,
+        "containerimage": image,
+        "containerimage_with_stderr": image.model_copy(
+            update={"build_status": "failed", "build_stderr": "line 1\nline 2\t\\"}
+        ),
+        "ep_status_report": EPStatusReport(
+            endpoint_id=_ID_A,
+            ep_status_report={"managers": 2, "active": True, "ratio": 0.5, "tag": None},
+            task_statuses=task_statuses,
+        ),
+        "ep_status_report_columns": EPStatusReport(
+            endpoint_id=_ID_A,
+            ep_status_report={},
+            task_statuses=ColumnarTaskStatuses(task_statuses),
+        ),
+        "manager_status_report": ManagerStatusReport(task_statuses=task_statuses),
+        "manager_status_report_empty": ManagerStatusReport(task_statuses={}),
+        "task": Task(
+            task_id=_ID_A,
+            container_id=_ID_B,
+            container=container,
+            task_buffer='10\n{"a": "quoted \\"string\\""}\n☃ \x00 \U0001f600',
+        ),
+        "task_minimal": Task(task_id=_ID_A, task_buffer=""),
+        "task_reference": Task(task_id=_ID_A, task_buffer_reference=reference),
+        "task_cancel": TaskCancel(task_id=_ID_A),
+        "result": Result(
+            task_id=_ID_A,
+            data="gASVNAAAAAAAAACMCGJ1aWx0aW5zlIwFcHJpbnSUk5Qu",
+            details={"os": "linux", "python_version": "3.12.1"},
+            task_statuses=transitions,
+        ),
+        "result_error": Result(
+            task_id=_ID_A,
+            data="",
+            error_details=ResultErrorDetails(
+                code="RemoteExecutionError", user_message="task failed: ☹"
+            ),
+        ),
+        "result_reference": Result(
+            task_id=_ID_A,
+            data_reference=reference.model_copy(update={"key": f"{_ID_A}.result"}),
+        ),
+        "task_transition": transitions[0],
+    }
+
+
+def build_corpus(
+    protocol_versions: t.Iterable[int] = PROTOCOL_VERSIONS,
+) -> list[dict[str, t.Any]]:
+    """
+    Pack every sample message under each protocol version.
+
+    Each entry holds the sample's `name`, `message_type`, and `protocol_version`, the
+    `packed` message (base64-encoded), and the message `data` as JSON.
+    """
+    packer = MessagePacker()
+    corpus = []
+    for protocol_version in protocol_versions:
+        for name, message in sample_messages().items():
+            packed = packer.pack(message, protocol_version=protocol_version)
+            # the data as it is packed, without the fields which are omitted
+            data = message.model_dump_json(
+                exclude=MESSAGE_TYPES[message.message_type].omitted_fields(message)
+            )
+            corpus.append(
+                {
+                    "name": name,
+                    "message_type": message.message_type,
+                    "protocol_version": protocol_version,
+                    "packed": base64.b64encode(packed).decode("ascii"),
+                    "data": json.loads(data),
+                }
+            )
+    return corpus
+
+
+def _dump(document: t.Any) -> str:
+    return json.dumps(document, indent=2, ensure_ascii=False) + "\n"
+
+
+def generate(output_dir: str | pathlib.Path, *, check: bool = False) -> list[str]:
+    """
+    Write the schemas and the corpus into a directory, and return the paths of the
+    files which were out of date.
+
+    Files which are unchanged are not rewritten, and schemas of message types which
+    are no longer registered are removed.
+
+    :param check: if true, report the files which are out of date without writing
+    """
+    output_dir = pathlib.Path(output_dir)
+    expected = {
+        output_dir / "schemas" / f"{message_type}.json": _dump(
+            envelope_json_schema(message_type)
+        )
+        for message_type in sorted(MESSAGE_TYPES)
+    }
+    expected[output_dir / "corpus.json"] = _dump(build_corpus())
+
+    stale = []
+    for path, content in expected.items():
+        if path.exists() and path.read_text(encoding="utf-8") == content:
+            continue
+        stale.append(str(path))
+        if not check:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content, encoding="utf-8")
+
+    schema_dir = output_dir / "schemas"
+    if schema_dir.is_dir():
+        for path in sorted(schema_dir.glob("*.json")):
+            if path not in expected:
+                stale.append(str(path))
+                if not check:
+                    path.unlink()
+
+    return stale
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("output_dir", help="the directory to write into")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="fail if any file is out of date, rather than writing it",
+    )
+    args = parser.parse_args(argv)
+
+    stale = generate(args.output_dir, check=args.check)
+    for path in stale:
+        print(f"{'out of date' if args.check else 'updated'}: {path}")
+    return 1 if args.check and stale else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Interning of the containers embedded in unpacked tasks.
+
+Consecutive tasks often embed the same `Container`, with the same list of images.
+Rather than validating the container of every task into new objects, a
+`ContainerCache` keeps the containers which it has recently seen, keyed by their
+content, and the tasks which embed an identical container share a single instance.
+
+Because containers from the cache are shared between tasks, they are immutable:
+setting a field of a cached container or of one of its images raises a
+`pydantic.ValidationError`, and changing its list of images raises a `TypeError`.
+To change the container of a task, replace it with a new `Container`. A cached
+container is an instance of a frozen subclass of `Container`, and compares equal to a
+`Container` with the same fields.
+
+Pass a cache to `MessagePacker(container_cache=...)` to use it.
+"""
+
+from __future__ import annotations
+
+import collections
+import threading
+import typing as t
+
+import pydantic
+import pydantic_core
+
+from .message_types import Container, ContainerImage
+
+
+class _ReadOnlyList(list[t.Any]):
+    """A list which cannot be changed, for the images of a shared container."""
+
+    def _read_only(self, *args: t.Any, **kwargs: t.Any) -> t.NoReturn:
+        raise TypeError("the images of a cached container cannot be changed")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __reduce__(self) -> tuple[t.Any, ...]:
+        # copied and pickled from its items, rather than by appending them
+        return (type(self), (list(self),))
+
+
+class _SharedContainerImage(ContainerImage):
+    model_config = pydantic.ConfigDict(frozen=True)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ContainerImage):
+            return self.__dict__ == other.__dict__
+        return NotImplemented
+
+
+class _SharedContainer(Container):
+    model_config = pydantic.ConfigDict(frozen=True)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Container):
+            return self.__dict__ == other.__dict__
+        return NotImplemented
+
+
+def _share(container: Container) -> _SharedContainer:
+    # the container is already valid, so its fields are copied without validation
+    images = _ReadOnlyList(
+        _SharedContainerImage.model_construct(image.model_fields_set, **image.__dict__)
+        for image in container.images
+    )
+    return _SharedContainer.model_construct(
+        container.model_fields_set, **{**container.__dict__, "images": images}
+    )
+
+
+def _container_key(data: dict[str, t.Any]) -> bytes | None:
+    # the data serialized as JSON is a key which holds all of its content, and bytes
+    # are hashed and compared quickly
+    try:
+        return pydantic_core.to_json(data)
+    except pydantic_core.PydanticSerializationError:
+        # not a well-formed container; it will be validated without the cache
+        return None
+
+
+class ContainerCache:
+    """
+    A bounded cache of containers, of which the least recently used is evicted first.
+
+    Two containers share an entry only if their data is identical, so a cached
+    container is always the one which its data would be validated into.
+
+    :param maxsize: the number of containers to keep
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._containers: collections.OrderedDict[bytes, Container] = (
+            collections.OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return len(self._containers)
+
+    def lookup(self, data: dict[str, t.Any]) -> tuple[bytes | None, Container | None]:
+        """
+        Find the cached container for the data of a container.
+
+        Returns the key of the data, which is None if the data cannot be cached, and
+        the cached container, which is None if there is none.
+        """
+        key = _container_key(data)
+        if key is None:
+            return None, None
+        with self._lock:
+            container = self._containers.get(key)
+            if container is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._containers.move_to_end(key)
+        return key, container
+
+    def store(self, key: bytes, container: Container) -> Container:
+        """
+        Cache the container which was validated from the data with this key.
+
+        Returns the immutable copy of the container which was cached, to be used in
+        its place.
+        """
+        shared = _share(container)
+        with self._lock:
+            self._containers[key] = shared
+            self._containers.move_to_end(key)
+            while len(self._containers) > self.maxsize:
+                self._containers.popitem(last=False)
+        return shared
+
+    def clear(self) -> None:
+        with self._lock:
+            self._containers.clear()
+            self.hits = self.misses = 0
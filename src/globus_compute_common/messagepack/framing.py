@@ -0,0 +1,175 @@
+"""
+Tools for reading newline-delimited streams of messages.
+
+Protocols which never write newlines into a packed message (e.g. v1) allow several
+messages to be sent in one payload, separated by newlines. The
+`MessageStreamDecoder` reassembles such payloads from arbitrarily sized chunks, as
+they arrive from a socket or a message queue, and a `FrameDecoder` does the same
+without unpacking the messages.
+"""
+
+from __future__ import annotations
+
+import re
+import typing as t
+
+from .message_types import Message
+from .protocol import ReadableBuffer
+
+if t.TYPE_CHECKING:
+    from .packer import MessagePacker
+
+_NEWLINE = b"\n"
+# `re` can search any bytes-like buffer, including a memoryview, which has no `find()`
+_NEWLINE_RE = re.compile(_NEWLINE)
+
+
+def iter_frames(buf: ReadableBuffer) -> t.Iterator[memoryview]:
+    """
+    Iterate over the non-empty newline-delimited frames of a buffer.
+
+    Frames are memoryviews into the buffer, so no data is copied.
+    """
+    view = memoryview(buf)
+    start = 0
+    while start < len(view):
+        match = _NEWLINE_RE.search(view, start)
+        end = len(view) if match is None else match.start()
+        if end > start:
+            yield view[start:end]
+        start = end + 1
+
+
+class FrameDecoder:
+    """
+    Incrementally split a newline-delimited stream into frames.
+
+    This finds the frames for a `MessageStreamDecoder`, and may be used on its own
+    by readers which unpack frames themselves. It is fed in the same way, but yields
+    each complete frame, as a memoryview, rather than a message.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        # the offset in the buffer before which there are no newlines
+        self._scanned = 0
+
+    @property
+    def pending(self) -> int:
+        """The number of buffered bytes which are not yet part of a frame."""
+        return len(self._buffer)
+
+    def feed(self, chunk: ReadableBuffer) -> t.Iterator[memoryview]:
+        """
+        Add a chunk of the stream, and iterate over any frames it completes.
+
+        The chunk is consumed immediately, even if the returned iterator is not.
+        """
+        self._buffer += chunk
+        return iter_frames(self._take_complete())
+
+    def finish(self) -> t.Iterator[memoryview]:
+        """
+        Signal the end of the stream, and iterate over the final frame if there is
+        one which was not followed by a newline.
+        """
+        remainder = self._buffer
+        self._buffer = bytearray()
+        self._scanned = 0
+        return iter_frames(remainder)
+
+    def _take_complete(self) -> bytes | bytearray:
+        # detach everything up to the last newline from the buffer
+        # the newly received data is searched, rather than the whole buffer, so that a
+        # large message arriving in many chunks is not scanned repeatedly
+        # frames are views into the detached data, so they are not copied again
+        buffer = self._buffer
+        end = buffer.rfind(_NEWLINE, self._scanned)
+        if end == -1:
+            self._scanned = len(buffer)
+            return b""
+
+        self._scanned = 0
+        if end == len(buffer) - 1:
+            # the common case, where a chunk ends with a newline: detach the whole
+            # buffer, rather than copying it
+            self._buffer = bytearray()
+            return buffer
+        complete = buffer[: end + 1]
+        del buffer[: end + 1]
+        return complete
+
+
+class MessageStreamDecoder:
+    """
+    Incrementally decode a newline-delimited stream of messages.
+
+    Feed chunks of the stream to `feed()`, which yields each message completed by
+    that chunk. A message is complete once its trailing newline has been received.
+    When the stream ends, `finish()` yields the final message if it was not
+    followed by a newline.
+
+    >>> decoder = MessageStreamDecoder(packer)
+    >>> for chunk in chunks:
+    ...     for message in decoder.feed(chunk):
+    ...         handle(message)
+    >>> for message in decoder.finish():
+    ...     handle(message)
+
+    Empty lines in the stream are ignored.
+
+    A message which cannot be unpacked raises its error from the iterator, but does
+    not end it: calling `next()` on the same iterator again resumes with the
+    following message, so that one malformed message does not lose the others.
+
+    >>> messages = decoder.feed(chunk)
+    >>> while True:
+    ...     try:
+    ...         handle(next(messages))
+    ...     except StopIteration:
+    ...         break
+    ...     except ValueError:
+    ...         log.exception("skipping malformed message")
+    """
+
+    def __init__(self, packer: MessagePacker) -> None:
+        self._packer = packer
+        self._frames = FrameDecoder()
+
+    @property
+    def pending(self) -> int:
+        """The number of buffered bytes which are not yet part of a message."""
+        return self._frames.pending
+
+    def feed(self, chunk: ReadableBuffer) -> t.Iterator[Message]:
+        """
+        Add a chunk of the stream, and iterate over any messages it completes.
+
+        The chunk is consumed immediately, even if the returned iterator is not.
+        """
+        return self._unpack_frames(self._frames.feed(chunk))
+
+    def finish(self) -> t.Iterator[Message]:
+        """
+        Signal the end of the stream, and iterate over the final message if there is
+        one which was not followed by a newline.
+        """
+        return self._unpack_frames(self._frames.finish())
+
+    def _unpack_frames(self, frames: t.Iterator[memoryview]) -> t.Iterator[Message]:
+        return _UnpackedFrames(self._packer, frames)
+
+
+class _UnpackedFrames:
+    # unlike a generator, which is finished once it raises, this iterator can be
+    # resumed after a frame fails to unpack
+
+    def __init__(self, packer: MessagePacker, frames: t.Iterator[memoryview]) -> None:
+        self._unpack = packer.unpack
+        self._frames = frames
+
+    def __iter__(self) -> _UnpackedFrames:
+        return self
+
+    def __next__(self) -> Message:
+        return self._unpack(next(self._frames))
@@ -0,0 +1,141 @@
+"""
+Lazily unpacked messages.
+
+Many consumers of messages only need to read a few small fields in order to route
+a message (e.g. `task_id`), and never look at the large, opaque payload carried by
+`Task.task_buffer` or `Result.data`. A `LazyMessage` decodes and validates every
+field except the payload when it is unpacked, and keeps the payload as an undecoded
+slice of the original buffer until it is first accessed.
+
+A `LazyMessage` can be passed back to `MessagePacker.pack()`. When it is packed with
+the protocol version it was read from, its original bytes are returned, so the
+payload is never decoded.
+"""
+
+from __future__ import annotations
+
+import typing as t
+
+from .exceptions import InvalidMessageError
+from .message_types import Message
+
+if t.TYPE_CHECKING:
+    from .protocol import ReadableBuffer
+
+
+class LazyMessage:
+    """
+    A message whose payload field is only decoded when it is first accessed.
+
+    Other fields are available as attributes, just as they are on the message
+    itself. For example, the `task_id` of a lazily unpacked `Task` can be read
+    without decoding its `task_buffer`. Any other attribute of the message, such as
+    `model_dump()`, decodes the payload first.
+
+    Use `load()` to get the complete message.
+
+    :param raw: the packed message, including its version byte
+    :param message: the message, which is complete unless `raw_payload` is given
+    :param raw_payload: the undecoded payload, a slice of `raw`
+    :param decode_payload: a callable which decodes `raw_payload`
+    """
+
+    __slots__ = ("_raw", "_message", "_raw_payload", "_decode_payload", "_loaded")
+
+    def __init__(
+        self,
+        raw: ReadableBuffer,
+        message: Message,
+        *,
+        raw_payload: memoryview | None = None,
+        decode_payload: t.Callable[[memoryview], t.Any] | None = None,
+    ) -> None:
+        if raw_payload is not None and message.Meta.lazy_field is None:
+            raise ValueError(
+                f"{type(message).__name__} messages do not have a lazy payload field"
+            )
+        if raw_payload is not None and decode_payload is None:
+            raise ValueError("a lazy payload requires a decode_payload callable")
+
+        self._raw = raw
+        self._message = message
+        self._raw_payload = raw_payload
+        self._decode_payload = decode_payload
+        self._loaded = raw_payload is None
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._loaded else "unloaded"
+        return f"LazyMessage({type(self._message).__name__}, {state})"
+
+    def __getattr__(self, name: str) -> t.Any:
+        # only called for attributes which are not defined on LazyMessage
+        if name.startswith("_"):
+            raise AttributeError(name)
+        # the other fields of the message are complete without its payload, but
+        # anything else, like `model_dump()` or `model_copy()`, may read the payload,
+        # so it is decoded first
+        if not self._loaded and (
+            name == self._message.Meta.lazy_field
+            or not (
+                name in type(self._message).model_fields
+                or name in self._message.Meta.lazy_passthrough
+            )
+        ):
+            self.load()
+        return getattr(self._message, name)
+
+    @property
+    def raw(self) -> ReadableBuffer:
+        """The packed message, including its version byte."""
+        return self._raw
+
+    @property
+    def protocol_version(self) -> int:
+        return self._raw[0]
+
+    @property
+    def message_type(self) -> str:
+        return self._message.message_type
+
+    @property
+    def message_class(self) -> type[Message]:
+        return type(self._message)
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the payload has been decoded."""
+        return self._loaded
+
+    @property
+    def raw_payload(self) -> memoryview | None:
+        """
+        The undecoded payload, in the encoding of the protocol version.
+
+        This is None once the payload has been decoded, or if there was no lazy
+        payload.
+        """
+        return None if self._loaded else self._raw_payload
+
+    def load(self) -> Message:
+        """Decode the payload, if necessary, and return the complete message."""
+        if not self._loaded:
+            lazy_field = t.cast(str, self._message.Meta.lazy_field)
+            raw_payload = t.cast(memoryview, self._raw_payload)
+            decode_payload = t.cast(
+                t.Callable[[memoryview], t.Any], self._decode_payload
+            )
+            try:
+                payload = decode_payload(raw_payload)
+            except ValueError as err:
+                raise InvalidMessageError(
+                    f"could not decode the {lazy_field} of a {self.message_type} "
+                    f"message: {err}"
+                ) from err
+            # validate the payload field alone, setting it on the message
+            self._message.__pydantic_validator__.validate_assignment(
+                self._message, lazy_field, payload
+            )
+            self._raw_payload = None
+            self._decode_payload = None
+            self._loaded = True
+        return self._message
@@ -3,10 +3,33 @@ import typing as t
 from .base import Message
 from .container import Container, ContainerImage
 from .ep_status_report import EPStatusReport
+from .frozen import (
+    FROZEN_CLASSES,
+    FrozenContainer,
+    FrozenContainerImage,
+    FrozenEPStatusReport,
+    FrozenManagerStatusReport,
+    FrozenMessage,
+    FrozenPayloadReference,
+    FrozenResult,
+    FrozenResultErrorDetails,
+    FrozenTask,
+    FrozenTaskCancel,
+    FrozenTaskTransition,
+    freeze,
+)
 from .manager_status_report import ManagerStatusReport
+from .payload_reference import PayloadReference
+from .registry import (
+    MESSAGE_TYPES,
+    MessageTypeInfo,
+    register_message_type,
+    unregister_message_type,
+)
 from .result import Result, ResultErrorDetails
 from .task import Task
 from .task_cancel import TaskCancel
+from .task_status_columns import ColumnarTaskStatuses, TaskStatusColumns
 from .task_transition import TaskTransition
 
 ALL_MESSAGE_CLASSES: t.Set[t.Type[Message]] = {
@@ -20,6 +43,9 @@ ALL_MESSAGE_CLASSES: t.Set[t.Type[Message]] = {
     TaskTransition,
 }
 
+for _message_class in ALL_MESSAGE_CLASSES:
+    register_message_type(_message_class)
+
 __all__ = (
     "Message",
     "Container",
@@ -30,6 +56,26 @@ __all__ = (
     "TaskCancel",
     "Result",
     "ResultErrorDetails",
+    "PayloadReference",
     "TaskTransition",
+    "TaskStatusColumns",
+    "ColumnarTaskStatuses",
     "ALL_MESSAGE_CLASSES",
+    "MESSAGE_TYPES",
+    "MessageTypeInfo",
+    "register_message_type",
+    "unregister_message_type",
+    "FrozenMessage",
+    "FrozenContainer",
+    "FrozenContainerImage",
+    "FrozenEPStatusReport",
+    "FrozenManagerStatusReport",
+    "FrozenTask",
+    "FrozenTaskCancel",
+    "FrozenResult",
+    "FrozenResultErrorDetails",
+    "FrozenPayloadReference",
+    "FrozenTaskTransition",
+    "FROZEN_CLASSES",
+    "freeze",
 )
@@ -15,6 +15,15 @@ class Message(BaseModel):
     # be treated by pydantic as part of the model
     class Meta:
         message_type: t.ClassVar[str]
+        # the name of a large, opaque field which may be left undecoded when the
+        # message is unpacked lazily
+        lazy_field: t.ClassVar[t.Optional[str]] = None
+        # attributes, other than fields, which never read the lazy field, and so can
+        # be read without decoding it
+        lazy_passthrough: t.ClassVar[t.Tuple[str, ...]] = ()
+        # optional fields which are left out of a packed message when they are None,
+        # so that adding them does not change how existing messages are written
+        omit_if_none: t.ClassVar[t.Tuple[str, ...]] = ()
 
     @property
     def message_type(self) -> str:
@@ -4,7 +4,7 @@ import uuid
 from pydantic import ConfigDict, Field
 
 from .base import Message, meta
-from .task_transition import TaskTransition
+from .task_status_columns import TaskStatuses
 
 
 @meta(message_type="ep_status_report")
@@ -17,6 +17,7 @@ class EPStatusReport(Message):
 
     endpoint_id: uuid.UUID
     global_state: t.Dict[str, t.Any] = Field(alias="ep_status_report")
-    task_statuses: t.Dict[str, t.List[TaskTransition]]
+    # a dict of lists, which may be given as a compact TaskStatusColumns
+    task_statuses: TaskStatuses
 
     model_config = ConfigDict(populate_by_name=True)
@@ -0,0 +1,224 @@
+"""
+Frozen, slotted variants of the message classes.
+
+Each instance of a message class, as a pydantic model, holds its fields in a
+`__dict__`, alongside pydantic's own bookkeeping. A service which holds many messages
+in memory, e.g. a buffer of tasks, pays for that on every message. Each message class
+has a variant here, e.g. `FrozenTask` for `Task`, which is a frozen dataclass with
+`__slots__`, and holds nothing but its fields. Nested models are frozen too, and
+lists are held as tuples, although dicts (like `Result.details`) are not copied.
+
+Frozen messages are validated by pydantic in the same way as messages, and can be
+given to `MessagePacker.pack()` in place of a message:
+
+    frozen = packer.unpack_frozen(buf)  # or freeze(message)
+    packer.pack(frozen)  # the same bytes as packing the message
+    frozen.to_message()  # the message
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import typing as t
+import uuid
+
+import pydantic
+
+from ...tasks.constants import ActorName, TaskState
+from .base import Message
+from .container import Container, ContainerImage
+from .ep_status_report import EPStatusReport
+from .manager_status_report import ManagerStatusReport
+from .payload_reference import check_payload_form
+from .result import Result
+from .task import Task
+from .task_cancel import TaskCancel
+from .task_status_columns import TaskStatusColumns, _task_statuses_form
+from .task_transition import TaskTransition
+
+
+class FrozenMessage:
+    """The base class of frozen messages."""
+
+    __slots__ = ()
+
+    # the message class of which this is a frozen variant
+    message_class: t.ClassVar[type[Message]]
+
+    @property
+    def message_type(self) -> str:
+        return self.message_class.Meta.message_type
+
+    def to_message(self) -> Message:
+        """Build the message which this is a frozen variant of."""
+        data = _get_adapter(type(self)).dump_python(self)
+        return self.message_class.model_validate(data)
+
+
+@dataclasses.dataclass(frozen=True, slots=True, kw_only=True)
+class FrozenContainerImage(FrozenMessage):
+    message_class = ContainerImage
+
+    image_type: str
+    location: str
+    created_at: int
+    modified_at: int
+    build_status: t.Optional[str]
+    build_stderr: t.Optional[str]
+
+
+@dataclasses.dataclass(frozen=True, slots=True, kw_only=True)
+class FrozenContainer(FrozenMessage):
+    message_class = Container
+
+    container_id: uuid.UUID
+    name: str
+    images: t.Tuple[FrozenContainerImage, ...]
+
+
+@dataclasses.dataclass(frozen=True, slots=True, kw_only=True)
+class FrozenTaskTransition(FrozenMessage):
+    message_class = TaskTransition
+
+    timestamp: int
+    state: TaskState
+    actor: ActorName
+
+
+# the task statuses of frozen reports, which are held in the form in which they are
+# packed: tuples of frozen transitions, or a (read-only) TaskStatusColumns
+FrozenTaskStatuses = t.Annotated[
+    t.Union[
+        t.Annotated[TaskStatusColumns, pydantic.Tag("columns")],
+        t.Annotated[
+            TaskStatusColumns,
+            pydantic.BeforeValidator(TaskStatusColumns.from_dict),
+            pydantic.Tag("columnar_dict"),
+        ],
+        t.Annotated[
+            t.Dict[str, t.Tuple[FrozenTaskTransition, ...]], pydantic.Tag("dict")
+        ],
+    ],
+    pydantic.Discriminator(_task_statuses_form),
+]
+
+
+@dataclasses.dataclass(frozen=True, slots=True, kw_only=True)
+class FrozenEPStatusReport(FrozenMessage):
+    message_class = EPStatusReport
+    __pydantic_config__ = pydantic.ConfigDict(populate_by_name=True)
+
+    endpoint_id: uuid.UUID
+    global_state: t.Annotated[
+        t.Dict[str, t.Any], pydantic.Field(alias="ep_status_report")
+    ]
+    task_statuses: FrozenTaskStatuses
+
+
+@dataclasses.dataclass(frozen=True, slots=True, kw_only=True)
+class FrozenManagerStatusReport(FrozenMessage):
+    message_class = ManagerStatusReport
+
+    task_statuses: FrozenTaskStatuses
+
+
+@dataclasses.dataclass(frozen=True, slots=True, kw_only=True)
+class FrozenPayloadReference:
+    storage_id: str
+    s3bucket: t.Optional[str] = None
+    key: t.Optional[str] = None
+    size: int
+    sha256: t.Optional[str] = None
+
+
+@dataclasses.dataclass(frozen=True, slots=True, kw_only=True)
+class FrozenTask(FrozenMessage):
+    message_class = Task
+
+    task_id: uuid.UUID
+    container_id: t.Optional[uuid.UUID] = None
+    container: t.Optional[FrozenContainer] = None
+    task_buffer: t.Optional[str] = None
+    task_buffer_reference: t.Optional[FrozenPayloadReference] = None
+
+    def __post_init__(self) -> None:
+        check_payload_form(self, "task_buffer")
+
+
+@dataclasses.dataclass(frozen=True, slots=True, kw_only=True)
+class FrozenTaskCancel(FrozenMessage):
+    message_class = TaskCancel
+
+    task_id: uuid.UUID
+
+
+@dataclasses.dataclass(frozen=True, slots=True, kw_only=True)
+class FrozenResultErrorDetails:
+    code: str
+    user_message: str
+
+
+@dataclasses.dataclass(frozen=True, slots=True, kw_only=True)
+class FrozenResult(FrozenMessage):
+    message_class = Result
+
+    task_id: uuid.UUID
+    data: t.Optional[str] = None
+    data_reference: t.Optional[FrozenPayloadReference] = None
+    details: t.Optional[t.Dict[t.Any, t.Any]] = None
+    error_details: t.Optional[FrozenResultErrorDetails] = None
+    task_statuses: t.Optional[t.Tuple[FrozenTaskTransition, ...]] = None
+
+    def __post_init__(self) -> None:
+        check_payload_form(self, "data")
+
+    @property
+    def is_error(self) -> bool:
+        return self.error_details is not None
+
+
+# the frozen variant of each message class
+FROZEN_CLASSES: t.Mapping[type[Message], type[FrozenMessage]] = {
+    frozen_class.message_class: frozen_class
+    for frozen_class in (
+        FrozenContainer,
+        FrozenContainerImage,
+        FrozenEPStatusReport,
+        FrozenManagerStatusReport,
+        FrozenResult,
+        FrozenTask,
+        FrozenTaskCancel,
+        FrozenTaskTransition,
+    )
+}
+
+# the validator and serializer of each frozen class; built when first used
+_ADAPTERS: dict[type[FrozenMessage], pydantic.TypeAdapter[t.Any]] = {}
+
+
+def _get_adapter(frozen_class: type[FrozenMessage]) -> pydantic.TypeAdapter[t.Any]:
+    adapter = _ADAPTERS.get(frozen_class)
+    if adapter is None:
+        adapter = _ADAPTERS[frozen_class] = pydantic.TypeAdapter(frozen_class)
+    return adapter
+
+
+def _frozen_class_for(message_class: type[Message]) -> type[FrozenMessage]:
+    try:
+        return FROZEN_CLASSES[message_class]
+    except KeyError:
+        raise TypeError(
+            f"{message_class.__name__} messages do not have a frozen variant"
+        ) from None
+
+
+def freeze(message: Message) -> FrozenMessage:
+    """
+    Build the frozen variant of a message.
+
+    :raises TypeError: if the message class has no frozen variant
+    """
+    frozen_class = _frozen_class_for(type(message))
+    return t.cast(
+        FrozenMessage, _get_adapter(frozen_class).validate_python(message.model_dump())
+    )
@@ -1,7 +1,5 @@
-import typing as t
-
 from .base import Message, meta
-from .task_transition import TaskTransition
+from .task_status_columns import TaskStatuses
 
 
 @meta(message_type="manager_status_report")
@@ -11,4 +9,5 @@ class ManagerStatusReport(Message):
     saying which tasks are now RUNNING.
     """
 
-    task_statuses: t.Dict[str, t.List[TaskTransition]]
+    # a dict of lists, which may be given as a compact TaskStatusColumns
+    task_statuses: TaskStatuses
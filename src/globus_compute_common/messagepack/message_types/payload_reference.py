@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import typing as t
+
+import pydantic
+
+
+class PayloadReference(pydantic.BaseModel):
+    """
+    A reference to the payload of a message, which is held in a task storage rather
+    than in the message itself.
+
+    `storage_id`, `s3bucket`, and `key` are those of the reference which the storage
+    records for the task (e.g. `RedisTask.payload_reference`).
+    """
+
+    storage_id: str
+    s3bucket: t.Optional[str] = None
+    key: t.Optional[str] = None
+    # the length of the payload, in characters
+    size: int
+    # the SHA-256 digest of the payload, encoded as UTF-8, in hex
+    sha256: t.Optional[str] = None
+
+    def storage_reference(self) -> t.Dict[str, t.Any]:
+        """The reference, in the form in which a task storage records it."""
+        reference: t.Dict[str, t.Any] = {"storage_id": self.storage_id}
+        if self.s3bucket is not None:
+            reference["s3bucket"] = self.s3bucket
+        if self.key is not None:
+            reference["key"] = self.key
+        return reference
+
+
+def check_payload_form(message: t.Any, field: str) -> None:
+    """
+    Check that a message has its payload either inline, in `field`, or by reference,
+    in `<field>_reference`, and not both.
+    """
+    inline = getattr(message, field) is not None
+    referenced = getattr(message, f"{field}_reference") is not None
+    if inline == referenced:
+        raise ValueError(f"exactly one of {field} and {field}_reference must be set")
+
+
+def payload_form_json_schema(field: str) -> t.Dict[str, t.Any]:
+    """
+    The part of a message's JSON schema which requires exactly one of `field`, as a
+    string, and `<field>_reference`, as an object, as `check_payload_form()` does.
+    """
+    reference = f"{field}_reference"
+    return {
+        "oneOf": [
+            {"required": [field], "properties": {field: {"type": "string"}}},
+            {"required": [reference], "properties": {reference: {"type": "object"}}},
+        ]
+    }
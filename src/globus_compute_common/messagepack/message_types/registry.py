@@ -0,0 +1,157 @@
+"""
+The registry of message types which can be packed and unpacked.
+
+Each registered message class is described by a `MessageTypeInfo`, which holds the
+data that the protocols need for every message of that type: the class's validator
+and serializer, and the names (including aliases) of its fields. These are looked up
+once, when the class is registered, rather than for each message.
+
+The built-in message classes are registered when `messagepack.message_types` is
+imported. Other message classes may be registered at runtime:
+
+    @register_message_type
+    @meta(message_type="my_message")
+    class MyMessage(Message):
+        ...
+"""
+
+from __future__ import annotations
+
+import types
+import typing as t
+
+import pydantic
+import pydantic_core
+
+from .base import Message
+
+MT = t.TypeVar("MT", bound=t.Type[Message])
+
+
+def known_fields(model: type[pydantic.BaseModel]) -> frozenset[str]:
+    """The names and aliases of the fields of a model."""
+    names = set()
+    for name, field in model.model_fields.items():
+        names.add(name)
+        if field.alias is not None:
+            names.add(field.alias)
+    return frozenset(names)
+
+
+class MessageTypeInfo:
+    """
+    The precompiled description of a registered message class.
+
+    :param message_class: the message class, whose `Meta.message_type` is its name
+    """
+
+    def __init__(self, message_class: type[Message]) -> None:
+        # a model with unresolved forward references is only completed when it is
+        # first used, so complete it now, rather than while reading a message
+        message_class.model_rebuild()
+
+        self.message_class = message_class
+        self.message_type: str = message_class.Meta.message_type
+        self.validator = message_class.__pydantic_validator__
+        self.serializer: pydantic_core.SchemaSerializer = (
+            message_class.__pydantic_serializer__
+        )
+        self.known_fields = known_fields(message_class)
+        self.omit_if_none: tuple[str, ...] = tuple(message_class.Meta.omit_if_none)
+        self._json_schema: dict[str, t.Any] | None = None
+
+    def __repr__(self) -> str:
+        return f"MessageTypeInfo({self.message_type!r}, {self.message_class.__name__})"
+
+    @property
+    def json_schema(self) -> dict[str, t.Any]:
+        """
+        The JSON schema of the message data, as it is written when the message is
+        packed. Fields are named as they are on the wire, rather than by any alias.
+
+        It is generated when it is first read, and the same dict is returned on
+        every read, so it must not be modified.
+        """
+        if self._json_schema is None:
+            self._json_schema = self.message_class.model_json_schema(
+                by_alias=False, mode="serialization"
+            )
+        return self._json_schema
+
+    def validate(self, data: dict[str, t.Any]) -> Message:
+        """
+        Build a message from its data.
+
+        :raises pydantic.ValidationError: if the data is invalid
+        """
+        return t.cast(Message, self.validator.validate_python(data))
+
+    def omitted_fields(self, message: t.Any) -> set[str] | None:
+        """
+        The fields which are left out when a message (or its frozen variant) is
+        packed: those in `Meta.omit_if_none` whose value is None. This is None,
+        rather than empty, when no field is left out.
+        """
+        if not self.omit_if_none:
+            return None
+        # a message of another class (e.g. an older version of the registered class)
+        # might not have the field, which is then excluded harmlessly
+        omitted = {
+            name for name in self.omit_if_none if getattr(message, name, None) is None
+        }
+        return omitted or None
+
+    def unknown_fields(self, data: t.Mapping[str, t.Any]) -> t.AbstractSet[str]:
+        """The keys of the data which are not fields of the message class."""
+        return data.keys() - self.known_fields
+
+
+_REGISTRY: dict[str, MessageTypeInfo] = {}
+# incremented on every change to the registry, so that data which is derived from the
+# whole registry can tell when it is out of date
+_version = 0
+
+# a read-only view of the registry, from message type names to their descriptions
+MESSAGE_TYPES: t.Mapping[str, MessageTypeInfo] = types.MappingProxyType(_REGISTRY)
+
+
+def register_message_type(message_class: MT) -> MT:
+    """
+    Register a message class, so that messages of its type can be packed and
+    unpacked. May be used as a class decorator.
+
+    Registering a class which is already registered has no effect.
+
+    :raises TypeError: if the class is not a message class
+    :raises ValueError: if another class is registered with the same message type
+    """
+    global _version
+    if not (isinstance(message_class, type) and issubclass(message_class, Message)):
+        raise TypeError(f"{message_class!r} is not a Message class")
+    message_type = getattr(message_class.Meta, "message_type", None)
+    if not isinstance(message_type, str):
+        raise TypeError(f"{message_class.__name__} does not declare a message_type")
+
+    registered = _REGISTRY.get(message_type)
+    if registered is not None:
+        if registered.message_class is not message_class:
+            raise ValueError(
+                f"message type {message_type!r} is already registered "
+                f"to {registered.message_class.__name__}"
+            )
+        return message_class
+
+    _REGISTRY[message_type] = MessageTypeInfo(message_class)
+    _version += 1
+    return message_class
+
+
+def unregister_message_type(message_type: str) -> None:
+    """
+    Remove a message type from the registry.
+
+    :raises KeyError: if the message type is not registered
+    """
+    global _version
+    del _REGISTRY[message_type]
+    _version += 1
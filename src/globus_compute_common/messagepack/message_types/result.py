@@ -6,6 +6,11 @@ import uuid
 import pydantic
 
 from .base import Message, meta
+from .payload_reference import (
+    PayloadReference,
+    check_payload_form,
+    payload_form_json_schema,
+)
 from .task_transition import TaskTransition
 
 
@@ -16,14 +21,31 @@ class ResultErrorDetails(pydantic.BaseModel):
     user_message: str
 
 
-@meta(message_type="result")
+@meta(
+    message_type="result",
+    lazy_field="data",
+    lazy_passthrough=("is_error",),
+    omit_if_none=("data", "data_reference"),
+)
 class Result(Message):
+    model_config = pydantic.ConfigDict(
+        json_schema_extra=payload_form_json_schema("data")
+    )
+
     task_id: uuid.UUID
-    data: str
+    # the result is either inline, or held in a task storage; readers which predate
+    # references cannot read a result without inline data
+    data: t.Optional[str] = None
+    data_reference: t.Optional[PayloadReference] = None
     details: t.Optional[t.Dict[t.Any, t.Any]] = None
     error_details: t.Optional[ResultErrorDetails] = None
     task_statuses: t.Optional[t.List[TaskTransition]] = None
 
+    @pydantic.model_validator(mode="after")
+    def _check_payload_form(self) -> Result:
+        check_payload_form(self, "data")
+        return self
+
     @property
     def is_error(self) -> bool:
         return self.error_details is not None
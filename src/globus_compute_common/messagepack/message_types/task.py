@@ -1,12 +1,27 @@
 import typing as t
 import uuid
 
+import pydantic
+
 from .base import Message, meta
 from .container import Container
+from .payload_reference import (
+    PayloadReference,
+    check_payload_form,
+    payload_form_json_schema,
+)
 
 
-@meta(message_type="task")
+@meta(
+    message_type="task",
+    lazy_field="task_buffer",
+    omit_if_none=("task_buffer", "task_buffer_reference"),
+)
 class Task(Message):
+    model_config = pydantic.ConfigDict(
+        json_schema_extra=payload_form_json_schema("task_buffer")
+    )
+
     task_id: uuid.UUID
 
     # for backward compatibility; to be removed when we support only
@@ -14,4 +29,13 @@ class Task(Message):
     container_id: t.Optional[uuid.UUID] = None
 
     container: t.Optional[Container] = None
-    task_buffer: str
+
+    # the payload is either inline, or held in a task storage; readers which predate
+    # references cannot read a task without an inline payload
+    task_buffer: t.Optional[str] = None
+    task_buffer_reference: t.Optional[PayloadReference] = None
+
+    @pydantic.model_validator(mode="after")
+    def _check_payload_form(self) -> "Task":
+        check_payload_form(self, "task_buffer")
+        return self
@@ -0,0 +1,358 @@
+"""
+A compact, columnar encoding of the task statuses carried by status reports.
+
+Status reports map task IDs to lists of transitions. In the dict-of-lists form, each
+transition is written on the wire as an object repeating the keys "timestamp",
+"state", and "actor". For large reports, both the objects and the repeated keys are
+costly.
+
+A `TaskStatusColumns` holds the same data as parallel arrays, one entry per
+transition:
+
+  - `task_index`: the index of the transition's task in `task_ids`
+  - `timestamps`: the transition timestamp
+  - `states`: the TaskState code of the transition
+  - `actors`: the ActorName code of the transition
+
+Enum codes are defined in `messagepack._enum_codes`. On the wire, the columns are
+written as an array of arrays, in that order after the task IDs:
+
+    [
+      ["<task id>", ...],
+      [0, 0, ...],
+      [1700000000, 1700000001, ...],
+      [3, 6, ...],
+      [2, 0, ...]
+    ]
+
+The dict-of-lists form is always written as an object, so the two forms are told
+apart by their encoding, whatever the task IDs are.
+
+The `task_statuses` of a status report is always a dict of lists. A report which is
+built from a `TaskStatusColumns` or a `ColumnarTaskStatuses`, or unpacked from the
+columnar form, holds a `ColumnarTaskStatuses`, which is packed in the columnar form.
+The columns are encoded from the dict when it is packed, so changes to the dict are
+packed too.
+
+Readers which predate the columnar form cannot read it, so it must not be sent until
+all readers support it.
+"""
+
+from __future__ import annotations
+
+import typing as t
+from array import array
+from collections.abc import Mapping
+
+import pydantic
+from pydantic_core import core_schema
+
+from ...tasks.constants import ActorName, TaskState
+from .._enum_codes import ACTOR_NAME_CODES, TASK_STATE_CODES, reverse_codes
+from .task_transition import TaskTransition
+
+_STATE_CODES = reverse_codes(TASK_STATE_CODES)
+_ACTOR_CODES = reverse_codes(ACTOR_NAME_CODES)
+
+
+class TaskStatusColumns(Mapping[str, t.List[TaskTransition]]):
+    """
+    Task statuses stored as parallel arrays.
+
+    Build one transition at a time with `append()`, or convert an existing mapping
+    with `from_dict()`. Tasks are kept in the order in which they are first seen,
+    and transitions in the order in which they are appended.
+    """
+
+    def __init__(self) -> None:
+        self._task_ids: list[str] = []
+        self._task_positions: dict[str, int] = {}
+        self._task_index = array("I")
+        self._timestamps = array("q")
+        self._states = array("B")
+        self._actors = array("B")
+        # for each task, the positions of its transitions; built when first needed
+        self._rows: list[list[int]] | None = None
+
+    def __repr__(self) -> str:
+        return (
+            f"TaskStatusColumns({len(self._task_ids)} tasks, "
+            f"{len(self._timestamps)} transitions)"
+        )
+
+    @property
+    def task_ids(self) -> t.Sequence[str]:
+        return self._task_ids
+
+    @property
+    def task_index(self) -> t.Sequence[int]:
+        return self._task_index
+
+    @property
+    def timestamps(self) -> t.Sequence[int]:
+        return self._timestamps
+
+    @property
+    def states(self) -> t.Sequence[int]:
+        return self._states
+
+    @property
+    def actors(self) -> t.Sequence[int]:
+        return self._actors
+
+    @property
+    def transition_count(self) -> int:
+        return len(self._timestamps)
+
+    def add_task(self, task_id: str) -> int:
+        """
+        Add a task, which may have no transitions, and return its index.
+
+        Adding a task which is already present returns its existing index.
+        """
+        try:
+            return self._task_positions[task_id]
+        except KeyError:
+            pass
+        if not isinstance(task_id, str):
+            raise TypeError(f"task IDs must be strings, not {type(task_id).__name__}")
+        position = self._task_positions[task_id] = len(self._task_ids)
+        self._task_ids.append(task_id)
+        self._rows = None
+        return position
+
+    def append(
+        self, task_id: str, timestamp: int, state: TaskState, actor: ActorName
+    ) -> None:
+        """Add a transition for a task."""
+        # the enums are str-based, so their values also find their codes
+        try:
+            state_code = _STATE_CODES[state]
+            actor_code = _ACTOR_CODES[actor]
+        except KeyError as err:
+            raise ValueError(f"{err.args[0]!r} has no columnar encoding") from err
+        self._task_index.append(self.add_task(task_id))
+        self._timestamps.append(timestamp)
+        self._states.append(state_code)
+        self._actors.append(actor_code)
+        self._rows = None
+
+    @classmethod
+    def from_dict(
+        cls, task_statuses: t.Mapping[str, t.Iterable[TaskTransition]]
+    ) -> TaskStatusColumns:
+        """Convert from the dict-of-lists form."""
+        if isinstance(task_statuses, TaskStatusColumns):
+            return task_statuses
+        columns = cls()
+        append = columns.append
+        for task_id, transitions in task_statuses.items():
+            columns.add_task(task_id)
+            for transition in transitions:
+                append(
+                    task_id, transition.timestamp, transition.state, transition.actor
+                )
+        return columns
+
+    def to_dict(self) -> dict[str, list[TaskTransition]]:
+        """Convert to the dict-of-lists form."""
+        statuses: dict[str, list[TaskTransition]] = {
+            task_id: [] for task_id in self._task_ids
+        }
+        rows = list(statuses.values())
+        for position, timestamp, state, actor in zip(
+            self._task_index, self._timestamps, self._states, self._actors
+        ):
+            rows[position].append(
+                _transition(timestamp, TASK_STATE_CODES[state], ACTOR_NAME_CODES[actor])
+            )
+        return statuses
+
+    @classmethod
+    def from_columns(
+        cls,
+        task_ids: t.Iterable[str],
+        task_index: t.Iterable[int],
+        timestamps: t.Iterable[int],
+        states: t.Iterable[int],
+        actors: t.Iterable[int],
+    ) -> TaskStatusColumns:
+        """
+        Build from columns, which are written on the wire in the order of these
+        arguments.
+
+        :raises ValueError: if the columns are inconsistent, or contain unknown codes
+        """
+        columns = cls()
+        for position, task_id in enumerate(task_ids):
+            if columns.add_task(task_id) != position:
+                raise ValueError(f"duplicate task ID {task_id!r}")
+        try:
+            columns._task_index = array("I", task_index)
+            columns._timestamps = array("q", timestamps)
+            columns._states = array("B", states)
+            columns._actors = array("B", actors)
+        except OverflowError as err:
+            raise ValueError(f"column value out of range: {err}") from err
+
+        transition_columns = (
+            columns._task_index,
+            columns._timestamps,
+            columns._states,
+            columns._actors,
+        )
+        if len({len(column) for column in transition_columns}) != 1:
+            raise ValueError("columns must all have the same length")
+        if columns._timestamps:
+            if max(columns._task_index) >= len(columns._task_ids):
+                raise ValueError("task_index refers to an unknown task")
+            if max(columns._states) >= len(TASK_STATE_CODES):
+                raise ValueError("unrecognized TaskState code")
+            if max(columns._actors) >= len(ACTOR_NAME_CODES):
+                raise ValueError("unrecognized ActorName code")
+        return columns
+
+    def to_columns(self) -> dict[str, list[t.Any]]:
+        """Convert to columns, which are written on the wire in this order."""
+        return {
+            "task_ids": list(self._task_ids),
+            "task_index": self._task_index.tolist(),
+            "timestamps": self._timestamps.tolist(),
+            "states": self._states.tolist(),
+            "actors": self._actors.tolist(),
+        }
+
+    def _to_wire(self) -> tuple[list[t.Any], ...]:
+        return tuple(self.to_columns().values())
+
+    def _get_rows(self) -> list[list[int]]:
+        rows = self._rows
+        if rows is None:
+            rows = self._rows = [[] for _ in self._task_ids]
+            for row, position in enumerate(self._task_index):
+                rows[position].append(row)
+        return rows
+
+    def __getitem__(self, task_id: str) -> list[TaskTransition]:
+        rows = self._get_rows()[self._task_positions[task_id]]
+        timestamps, states, actors = self._timestamps, self._states, self._actors
+        return [
+            _transition(
+                timestamps[row],
+                TASK_STATE_CODES[states[row]],
+                ACTOR_NAME_CODES[actors[row]],
+            )
+            for row in rows
+        ]
+
+    def __iter__(self) -> t.Iterator[str]:
+        return iter(self._task_ids)
+
+    def __len__(self) -> int:
+        return len(self._task_ids)
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._task_positions
+
+    @classmethod
+    def __get_pydantic_core_schema__(
+        cls, source: t.Any, handler: pydantic.GetCoreSchemaHandler
+    ) -> core_schema.CoreSchema:
+        wire_schema = _wire_schema()
+        from_wire_schema = core_schema.no_info_after_validator_function(
+            lambda columns: cls.from_columns(*columns), wire_schema
+        )
+        return core_schema.json_or_python_schema(
+            json_schema=from_wire_schema,
+            python_schema=core_schema.union_schema(
+                [core_schema.is_instance_schema(cls), from_wire_schema]
+            ),
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda columns: columns._to_wire(), return_schema=wire_schema
+            ),
+        )
+
+
+def _wire_schema() -> core_schema.TupleSchema:
+    # the columns, in the order of the arguments of from_columns()
+    return core_schema.tuple_schema(
+        [
+            core_schema.list_schema(core_schema.str_schema()),
+            core_schema.list_schema(core_schema.int_schema(ge=0)),
+            core_schema.list_schema(core_schema.int_schema()),
+            core_schema.list_schema(core_schema.int_schema(ge=0)),
+            core_schema.list_schema(core_schema.int_schema(ge=0)),
+        ]
+    )
+
+
+_validate_transition = TaskTransition.__pydantic_validator__.validate_python
+
+
+def _transition(timestamp: int, state: TaskState, actor: ActorName) -> TaskTransition:
+    # the columns were validated when they were built, but validating the model is
+    # still faster than model_construct(), which matters when converting large reports
+    return t.cast(
+        TaskTransition,
+        _validate_transition({"timestamp": timestamp, "state": state, "actor": actor}),
+    )
+
+
+class ColumnarTaskStatuses(t.Dict[str, t.List[TaskTransition]]):
+    """
+    The task statuses of a report which is packed in the columnar form.
+
+    This is an ordinary dict of task IDs to lists of transitions, which is marked so
+    that a report holding it packs it as columns.
+    """
+
+
+def _task_statuses_form(value: t.Any) -> str:
+    # the dict-of-lists form is written as an object, and the columnar form as an
+    # array, so no dict can be mistaken for columns
+    if isinstance(value, (TaskStatusColumns, list, tuple)):
+        return "columns"
+    if isinstance(value, ColumnarTaskStatuses):
+        return "columnar_dict"
+    return "dict"
+
+
+_DictForm = t.Dict[str, t.List[TaskTransition]]
+
+
+def _serialize_task_statuses(
+    value: dict[str, list[TaskTransition]],
+    handler: core_schema.SerializerFunctionWrapHandler,
+) -> t.Any:
+    if isinstance(value, ColumnarTaskStatuses):
+        return TaskStatusColumns.from_dict(value)._to_wire()
+    return handler(value)
+
+
+class _TaskStatusesSchema:
+    def __get_pydantic_core_schema__(
+        self, source: t.Any, handler: pydantic.GetCoreSchemaHandler
+    ) -> core_schema.CoreSchema:
+        dict_schema = handler.generate_schema(_DictForm)
+        return core_schema.tagged_union_schema(
+            {
+                "columns": core_schema.no_info_after_validator_function(
+                    lambda columns: ColumnarTaskStatuses(columns.to_dict()),
+                    handler.generate_schema(TaskStatusColumns),
+                ),
+                # a ColumnarTaskStatuses which is validated again keeps its form
+                "columnar_dict": core_schema.no_info_after_validator_function(
+                    ColumnarTaskStatuses, dict_schema
+                ),
+                "dict": dict_schema,
+            },
+            discriminator=_task_statuses_form,
+            serialization=core_schema.wrap_serializer_function_ser_schema(
+                _serialize_task_statuses, schema=dict_schema
+            ),
+        )
+
+
+# the type of the `task_statuses` field of status reports, which is always a dict of
+# lists, but may be given as a TaskStatusColumns, or unpacked from the columnar form
+TaskStatuses = t.Annotated[_DictForm, _TaskStatusesSchema()]
@@ -0,0 +1,201 @@
+"""
+Negotiation of the protocol version used to send messages to each peer.
+
+Readers detect the protocol version of every message from its version byte, so the
+two sides of a connection need not agree on a single version: each sender only needs
+to know which versions its peer can read. A `ProtocolNegotiator` advertises the
+versions which this side can read, in the handshake of whatever transport carries
+the messages, and chooses a version for each peer from what that peer advertised:
+
+    negotiator = ProtocolNegotiator(preference=(2, 1))
+    send_handshake(
+        {
+            "protocol_versions": negotiator.advertise(),
+            "compression_codecs": negotiator.advertise_codecs(),
+        }
+    )
+
+    # on receiving the peer's handshake
+    negotiator.negotiate(
+        conn_id,
+        handshake.get("protocol_versions"),
+        handshake.get("compression_codecs"),
+    )
+    conn.send(negotiator.pack(conn_id, message))
+
+    # when the connection closes
+    negotiator.forget(conn_id)
+
+A peer which does not advertise its versions predates negotiation, and is sent
+`fallback_version`, so that a newer protocol version can be rolled out to one side
+of a connection at a time.
+
+Compression is negotiated in the same way: a compressed message has a version byte
+which older readers do not recognize, so messages are only compressed for peers
+which advertised that they can read the codec, whatever the packer's
+`compress_threshold`.
+"""
+
+from __future__ import annotations
+
+import typing as t
+
+from . import compression
+from .exceptions import UnrecognizedProtocolVersion
+from .lazy import LazyMessage
+from .message_types import FrozenMessage, Message
+from .packer import DEFAULT_MESSAGE_PACKER, MessagePacker
+
+
+class ProtocolNegotiator:
+    """
+    Choose, and remember, the protocol version used to send messages to each peer,
+    and whether they may be compressed.
+
+    :param packer: the packer which packs messages to each peer
+    :param preference: the protocol versions which this side may send, from most to
+        least preferred; by default, only v1, since v2 is faster only for messages
+        with large payloads, and is slower for status reports and small messages
+    :param fallback_version: the version sent to peers which did not advertise
+        their versions
+    """
+
+    def __init__(
+        self,
+        packer: MessagePacker = DEFAULT_MESSAGE_PACKER,
+        *,
+        preference: t.Iterable[int] = (1,),
+        fallback_version: int = 1,
+    ) -> None:
+        available = sorted(
+            (
+                version
+                for version, impl in packer.IMPLEMENTATIONS.items()
+                if impl.available
+            ),
+            reverse=True,
+        )
+        preference = tuple(preference)
+        for version in (*preference, fallback_version):
+            if version not in available:
+                raise ValueError(f"protocol version {version} is not available")
+
+        self.packer = packer
+        self._available = tuple(available)
+        self.preference = preference
+        self.fallback_version = fallback_version
+        self._versions: dict[t.Hashable, int] = {}
+        self._compressed_peers: set[t.Hashable] = set()
+
+    def advertise(self) -> str:
+        """
+        The protocol versions which this side can read, e.g. "2,1", for the peer to
+        pass to `negotiate()`.
+        """
+        return ",".join(str(version) for version in self._available)
+
+    def advertise_codecs(self) -> str:
+        """
+        The compression codecs which this side can read, e.g. "1", for the peer to
+        pass to `negotiate()`.
+        """
+        return ",".join(str(codec) for codec in compression.CODECS)
+
+    def select(self, offered: str | t.Iterable[int] | None) -> int:
+        """
+        Choose the most preferred version which the peer can read, without
+        remembering it.
+
+        :param offered: the versions which the peer advertised, either as the string
+            returned by its `advertise()` or as integers; None if it did not advertise
+        :raises ValueError: if the advertised versions are malformed
+        :raises UnrecognizedProtocolVersion: if no version can be read by the peer
+        """
+        if offered is None:
+            return self.fallback_version
+
+        readable = _parse_advertised(offered, "protocol versions")
+        for version in self.preference:
+            if version in readable:
+                return version
+        raise UnrecognizedProtocolVersion(
+            f"no protocol version in common with peer, which can read "
+            f"{sorted(readable)}, while this side can send {list(self.preference)}"
+        )
+
+    def negotiate(
+        self,
+        peer: t.Hashable,
+        offered: str | t.Iterable[int] | None,
+        codecs: str | t.Iterable[int] | None = None,
+    ) -> int:
+        """
+        Choose the version used to send messages to a peer, as `select()` does, and
+        whether they may be compressed, and remember both until the peer is
+        forgotten.
+
+        :param codecs: the compression codecs which the peer advertised, either as
+            the string returned by its `advertise_codecs()` or as integers; None if
+            it did not advertise them, in which case messages to it are never
+            compressed
+        :raises ValueError: if the advertised versions or codecs are malformed
+        """
+        version = self.select(offered)
+        compressed = codecs is not None and compression.CODEC_ZLIB in (
+            _parse_advertised(codecs, "compression codecs")
+        )
+
+        self._versions[peer] = version
+        if compressed:
+            self._compressed_peers.add(peer)
+        else:
+            self._compressed_peers.discard(peer)
+        return version
+
+    def protocol_version(self, peer: t.Hashable) -> int:
+        """
+        The version negotiated for a peer, or `fallback_version` if there has been
+        no negotiation with it.
+        """
+        return self._versions.get(peer, self.fallback_version)
+
+    def can_compress(self, peer: t.Hashable) -> bool:
+        """
+        Whether messages to a peer may be compressed, which is only the case if it
+        advertised a codec which this side compresses with.
+        """
+        return peer in self._compressed_peers
+
+    def forget(self, peer: t.Hashable) -> None:
+        """Forget the version negotiated for a peer, e.g. when its connection closes."""
+        self._versions.pop(peer, None)
+        self._compressed_peers.discard(peer)
+
+    def pack(
+        self,
+        peer: t.Hashable,
+        message: Message | LazyMessage | FrozenMessage,
+        *,
+        compress: bool | None = None,
+    ) -> bytes:
+        """
+        Pack a message with the version negotiated for a peer.
+
+        :param compress: as for `MessagePacker.pack()`, except that messages are
+            never compressed for a peer which cannot read them, even if compression
+            is requested
+        """
+        if not self.can_compress(peer):
+            compress = False
+        return self.packer.pack(
+            message, protocol_version=self.protocol_version(peer), compress=compress
+        )
+
+
+def _parse_advertised(advertised: str | t.Iterable[int], what: str) -> set[int]:
+    if not isinstance(advertised, str):
+        return set(advertised)
+    try:
+        return {int(item) for item in advertised.split(",") if item}
+    except ValueError:
+        raise ValueError(f"malformed {what}: {advertised!r}")
@@ -1,41 +1,280 @@
 from __future__ import annotations
 
-from .exceptions import UnrecognizedProtocolVersion
-from .message_types import Message
-from .protocol import MessagePackProtocol
+import typing as t
+
+from . import compression
+from .container_cache import ContainerCache
+from .exceptions import InvalidMessageError, UnrecognizedProtocolVersion
+from .framing import MessageStreamDecoder, iter_frames
+from .lazy import LazyMessage
+from .message_types import FrozenMessage, Message
+from .protocol import MessageHeader, MessagePackProtocol, ReadableBuffer, UnpackMode
 from .protocol_versions.proto1 import MessagePackProtocolV1
+from .protocol_versions.proto2 import MessagePackProtocolV2
 
 
 class MessagePacker:
     IMPLEMENTATIONS: dict[int, MessagePackProtocol] = {
         1: MessagePackProtocolV1(),
+        2: MessagePackProtocolV2(),
     }
 
-    def __init__(self, default_protocol_version: int = 1) -> None:
+    def __init__(
+        self,
+        default_protocol_version: int = 1,
+        *,
+        compress_threshold: int | None = None,
+        max_decompressed_size: int | None = None,
+        unpack_mode: UnpackMode | str = UnpackMode.DEFAULT,
+        container_cache: ContainerCache | None = None,
+    ) -> None:
+        """
+        :param default_protocol_version: the protocol version used to pack messages
+            when none is given
+        :param compress_threshold: if set, packed messages of at least this many
+            bytes are compressed, unless compression is explicitly disabled
+        :param max_decompressed_size: if set, compressed messages which decompress
+            to more than this many bytes are rejected as invalid
+        :param unpack_mode: how strictly unpacked messages are checked; one of
+            "strict", which rejects messages with unknown fields, "default", or
+            "trusted", which unpacks messages from trusted senders faster
+        :param container_cache: if set, the containers embedded in unpacked tasks
+            are interned in this cache, so that tasks with identical containers
+            share a single, immutable, instance
+        """
         self._default_protocol_version = default_protocol_version
+        self._compress_threshold = compress_threshold
+        self._max_decompressed_size = max_decompressed_size
+        self._unpack_mode = UnpackMode(unpack_mode)
+        self._container_cache = container_cache
+
+    def detect_protocol_version(self, buf: ReadableBuffer) -> int:
+        """
+        read the first byte of the buffer and decode it
 
-    def detect_protocol_version(self, buf: bytes) -> int:
-        """read the first byte of the buffer and decode it"""
+        the compression flag is ignored, so a compressed message reports the protocol
+        version of the message within it
+        """
         if not buf:
             raise ValueError("cannot detect_protocol_version on empty data")
         version_byte = buf[0:1]
-        return int.from_bytes(version_byte, byteorder="big", signed=False)
+        version = int.from_bytes(version_byte, byteorder="big", signed=False)
+        return version & ~compression.COMPRESSED_FLAG
 
-    def pack(self, message: Message, *, protocol_version: int | None = None) -> bytes:
-        if protocol_version is None:
-            protocol_version = self._default_protocol_version
-        impl = self.IMPLEMENTATIONS[protocol_version]
-        return impl.pack(message)
+    def _decompress(self, buf: ReadableBuffer) -> ReadableBuffer:
+        # pass uncompressed messages through untouched
+        if not compression.is_compressed(buf):
+            return buf
+        return compression.decompress(buf, max_size=self._max_decompressed_size)
 
-    def unpack(self, buf: bytes) -> Message:
+    def _implementation_for(self, buf: ReadableBuffer) -> MessagePackProtocol:
         protocol_version = self.detect_protocol_version(buf)
         try:
-            impl = self.IMPLEMENTATIONS[protocol_version]
+            return self.IMPLEMENTATIONS[protocol_version]
         except KeyError:
             raise UnrecognizedProtocolVersion(
                 f"message had unknown protocol version {protocol_version}"
             )
-        return impl.unpack(buf)
+
+    def pack(
+        self,
+        message: Message | LazyMessage | FrozenMessage,
+        *,
+        protocol_version: int | None = None,
+        compress: bool | None = None,
+    ) -> bytes:
+        """
+        Pack a message.
+
+        A LazyMessage which was unpacked with the same protocol version is not
+        re-encoded; its original bytes are returned. A FrozenMessage is packed as
+        the message which it is a frozen variant of.
+
+        :param compress: whether to compress the message. By default, messages are
+            compressed if they reach the packer's `compress_threshold` and
+            compression makes them smaller.
+        """
+        if protocol_version is None:
+            protocol_version = self._default_protocol_version
+        impl = self.IMPLEMENTATIONS[protocol_version]
+        packed = _pack_with(impl, protocol_version, message)
+
+        if compress is None:
+            threshold = self._compress_threshold
+            if threshold is None or len(packed) < threshold:
+                return packed
+            compressed = compression.compress(packed)
+            return compressed if len(compressed) < len(packed) else packed
+        if compress:
+            return compression.compress(packed)
+        return packed
+
+    def pack_many(
+        self,
+        messages: t.Iterable[Message | LazyMessage | FrozenMessage],
+        *,
+        protocol_version: int | None = None,
+    ) -> bytes:
+        """
+        Pack several messages into a single newline-delimited payload.
+
+        Only protocol versions which never write newlines into a message, like v1, can
+        be used. Any other version raises a ValueError. Messages are never compressed.
+        """
+        if protocol_version is None:
+            protocol_version = self._default_protocol_version
+        impl = self.IMPLEMENTATIONS[protocol_version]
+        if not impl.newline_delimited:
+            raise ValueError(
+                f"protocol version {protocol_version} does not support "
+                "newline-delimited payloads"
+            )
+        return b"\n".join(
+            _pack_with(impl, protocol_version, message) for message in messages
+        )
+
+    def unpack(self, buf: ReadableBuffer) -> Message:
+        buf = self._decompress(buf)
+        impl = self._implementation_for(buf)
+        return impl.unpack(
+            buf, mode=self._unpack_mode, container_cache=self._container_cache
+        )
+
+    def unpack_lazy(self, buf: ReadableBuffer) -> LazyMessage:
+        """
+        Unpack a message, leaving its payload undecoded until it is accessed.
+
+        Only the protocol versions which support it unpack lazily; for others, the
+        message is fully decoded.
+        """
+        buf = self._decompress(buf)
+        impl = self._implementation_for(buf)
+        return impl.unpack_lazy(
+            buf, mode=self._unpack_mode, container_cache=self._container_cache
+        )
+
+    def unpack_frozen(self, buf: ReadableBuffer) -> FrozenMessage:
+        """
+        Unpack a message into its frozen variant, which uses less memory.
+
+        :raises TypeError: if the message class has no frozen variant
+        """
+        buf = self._decompress(buf)
+        impl = self._implementation_for(buf)
+        return impl.unpack_frozen(buf, mode=self._unpack_mode)
+
+    def peek(self, buf: ReadableBuffer) -> MessageHeader:
+        """
+        Read the protocol version, message type, and task ID of a message, without
+        unpacking it.
+
+        This is meant for routing messages: the original buffer can be forwarded
+        untouched once its destination is known. For v1 messages, only as much of
+        the buffer as is needed is scanned, and no message object is created. Other
+        protocol versions unpack the message. Compressed messages are decompressed,
+        and the protocol version of the message within is reported.
+
+        The message is not validated, so a message which can be peeked may still fail
+        to unpack. A message which cannot be read raises an InvalidMessageError.
+        """
+        buf = self._decompress(buf)
+        return self._implementation_for(buf).peek(buf)
+
+    def unpack_batch(
+        self, bufs: t.Sequence[ReadableBuffer]
+    ) -> tuple[list[Message | None], list[InvalidMessageError | None]]:
+        """
+        Unpack a batch of messages, which may use different protocol versions.
+
+        Rather than raising an error on the first message which cannot be unpacked,
+        errors are collected and returned. The result is a pair of lists, parallel to
+        the input: for each buffer either the message is set and the error is None,
+        or the message is None and the error is set.
+
+        Errors are always InvalidMessageErrors. Where another error (e.g. a pydantic
+        ValidationError) caused the failure, it is available as the ``__cause__``.
+        """
+        messages: list[Message | None] = [None] * len(bufs)
+        errors: list[InvalidMessageError | None] = [None] * len(bufs)
+
+        # group the buffers by protocol version, so that each version is dispatched
+        # once for the whole batch
+        by_version: dict[int, list[int]] = {}
+        for idx, buf in enumerate(bufs):
+            if not buf:
+                errors[idx] = InvalidMessageError("cannot unpack empty data")
+            else:
+                by_version.setdefault(buf[0], []).append(idx)
+
+        for version_byte, indices in by_version.items():
+            protocol_version = version_byte & ~compression.COMPRESSED_FLAG
+            impl = self.IMPLEMENTATIONS.get(protocol_version)
+            if impl is None:
+                for idx in indices:
+                    errors[idx] = UnrecognizedProtocolVersion(
+                        f"message had unknown protocol version {protocol_version}"
+                    )
+                continue
+
+            impl_unpack = impl.unpack
+            mode, container_cache = self._unpack_mode, self._container_cache
+            compressed = version_byte != protocol_version
+            for idx in indices:
+                try:
+                    if compressed:
+                        buf = self._decompress(bufs[idx])
+                    else:
+                        buf = bufs[idx]
+                    messages[idx] = impl_unpack(
+                        buf, mode=mode, container_cache=container_cache
+                    )
+                except InvalidMessageError as err:
+                    errors[idx] = err
+                except ValueError as err:
+                    wrapped = InvalidMessageError(f"could not unpack message: {err}")
+                    wrapped.__cause__ = err
+                    errors[idx] = wrapped
+
+        return messages, errors
+
+    def iter_unpack(
+        self, buf_or_stream: ReadableBuffer | t.BinaryIO, *, chunk_size: int = 65536
+    ) -> t.Iterator[Message]:
+        """
+        Iterate over the messages in a newline-delimited payload.
+
+        The payload may be given as a bytes-like buffer, or as a binary stream which
+        will be read in chunks of `chunk_size` bytes until it is exhausted.
+        """
+        if isinstance(buf_or_stream, (bytes, bytearray, memoryview)):
+            for frame in iter_frames(buf_or_stream):
+                yield self.unpack(frame)
+            return
+
+        decoder = self.stream_decoder()
+        while chunk := buf_or_stream.read(chunk_size):
+            yield from decoder.feed(chunk)
+        yield from decoder.finish()
+
+    def stream_decoder(self) -> MessageStreamDecoder:
+        """
+        Create a decoder for newline-delimited payloads which arrive in chunks.
+        """
+        return MessageStreamDecoder(self)
+
+
+def _pack_with(
+    impl: MessagePackProtocol,
+    protocol_version: int,
+    message: Message | LazyMessage | FrozenMessage,
+) -> bytes:
+    if isinstance(message, LazyMessage):
+        if message.protocol_version == protocol_version:
+            return bytes(message.raw)
+        message = message.load()
+    elif isinstance(message, FrozenMessage):
+        return impl.pack_frozen(message)
+    return impl.pack(message)
 
 
 DEFAULT_MESSAGE_PACKER = MessagePacker()
@@ -0,0 +1,111 @@
+"""
+Moving the payloads of messages into and out of a task storage.
+
+The payload of a `Task` (`task_buffer`) or a `Result` (`data`) may be kept in a task
+storage, e.g. in S3 by a `RedisS3Storage`, rather than in the message itself, so that
+a large payload does not pass through every queue which carries the message. Such a
+message carries a `PayloadReference` in place of its payload (in
+`task_buffer_reference` or `data_reference`), which is packed instead of the payload.
+
+    message = offload_payload(message, storage)  # before sending
+    message = resolve_payload(message, storage)  # after receiving
+
+Payloads are stored as the payload (for a `Task`) or the result (for a `Result`) of
+the task with the message's task ID, just as the storage would store them for the
+task itself.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import typing as t
+import uuid
+
+from ..task_storage import StorageException, TaskStorage
+from ..tasks import TaskState
+from .message_types import PayloadReference, Result, Task
+
+PM = t.TypeVar("PM", Task, Result)
+
+# for each message class, its payload field, and the name under which a task storage
+# stores that payload for a task
+_PAYLOADS: dict[type[Task | Result], tuple[str, str]] = {
+    Task: ("task_buffer", "payload"),
+    Result: ("data", "result"),
+}
+
+
+class _StorageRecord:
+    """The fields of a task which a task storage reads and writes."""
+
+    def __init__(self, task_id: uuid.UUID) -> None:
+        self.task_id = str(task_id)
+        self.endpoint: str | None = None
+        self.status = TaskState.RECEIVED
+        self.result: str | None = None
+        self.result_reference: dict[str, t.Any] | None = None
+        self.payload: str | None = None
+        self.payload_reference: dict[str, t.Any] | None = None
+
+
+def _sha256(payload: str) -> str:
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def offload_payload(message: PM, storage: TaskStorage, *, min_size: int = 0) -> PM:
+    """
+    Store the payload of a message in a task storage, and return a copy of the
+    message which refers to it.
+
+    The message is returned unchanged if its payload is shorter than `min_size`, if
+    it already refers to its payload, or if the storage would keep the payload in the
+    task record itself (as `ImplicitRedisStorage` does, and `RedisS3Storage` does for
+    small payloads), where a receiver of the message could not reach it.
+
+    :raises StorageException: if the payload could not be stored
+    """
+    field, kind = _PAYLOADS[type(message)]
+    payload = getattr(message, field)
+    if payload is None or len(payload) < min_size:
+        return message
+
+    record = _StorageRecord(message.task_id)
+    getattr(storage, f"store_{kind}")(record, payload)
+    stored = getattr(record, f"{kind}_reference")
+    if stored is None or getattr(record, kind) is not None:
+        return message
+
+    reference = PayloadReference(**stored, size=len(payload), sha256=_sha256(payload))
+    return message.model_copy(update={field: None, f"{field}_reference": reference})
+
+
+def resolve_payload(message: PM, storage: TaskStorage) -> PM:
+    """
+    Fetch the payload to which a message refers from a task storage, and return a
+    copy of the message with its payload inline.
+
+    A message which has its payload inline is returned unchanged.
+
+    :raises StorageException: if the payload could not be fetched, or does not match
+        the size or checksum in the reference
+    """
+    field, kind = _PAYLOADS[type(message)]
+    reference: PayloadReference | None = getattr(message, f"{field}_reference")
+    if reference is None:
+        return message
+
+    record = _StorageRecord(message.task_id)
+    setattr(record, f"{kind}_reference", reference.storage_reference())
+    payload = getattr(storage, f"get_{kind}")(record)
+    if payload is None:
+        raise StorageException(
+            f"the {kind} of task {message.task_id} was not found in storage"
+        )
+    if len(payload) != reference.size or (
+        reference.sha256 is not None and _sha256(payload) != reference.sha256
+    ):
+        raise StorageException(
+            f"the {kind} of task {message.task_id} in storage does not match its "
+            "reference"
+        )
+    return message.model_copy(update={field: payload, f"{field}_reference": None})
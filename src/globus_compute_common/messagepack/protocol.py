@@ -6,14 +6,83 @@ A MessagePackProtocol only needs to define two actions:
   - unpack()
 
 And the two must be inverses on any valid inputs.
+
+Messages may be unpacked from any bytes-like buffer (bytes, bytearray, or memoryview),
+and protocols should avoid copying the buffer where possible.
+
+A protocol may also define unpack_lazy(), which leaves the payload of a message
+undecoded until it is needed, and peek(), which reads only the header of a message.
+By default, both unpack the whole message.
+
+Unpacking takes an UnpackMode, which determines how much checking is done on messages
+beyond validating them against their message classes, and optionally a ContainerCache,
+with which the containers embedded in tasks are shared between tasks.
+
+Frozen messages are packed with pack_frozen() and unpacked with unpack_frozen(). By
+default, these convert from and to messages, but a protocol may build and read them
+directly.
+
+A protocol which guarantees that packed messages never contain a newline declares
+itself as `newline_delimited`, allowing multiple messages to be framed with newlines.
 """
 
+from __future__ import annotations
+
 import abc
+import enum
+import typing as t
+import uuid
+
+from .exceptions import InvalidMessageError
+from .lazy import LazyMessage
+from .message_types import FrozenMessage, Message, freeze
+
+if t.TYPE_CHECKING:
+    from .container_cache import ContainerCache
+
+# the buffer types which can be unpacked
+ReadableBuffer: t.TypeAlias = t.Union[bytes, bytearray, memoryview]
 
-from .message_types import Message
+
+class MessageHeader(t.NamedTuple):
+    """
+    The fields of a message which are needed to route it.
+
+    `task_id` is None for messages which are not about a task.
+    """
+
+    protocol_version: int
+    message_type: str
+    task_id: t.Optional[uuid.UUID]
+
+
+class UnpackMode(str, enum.Enum):
+    """
+    How strictly messages are checked when they are unpacked.
+
+    - STRICT: unknown fields are rejected with an InvalidMessageError
+    - DEFAULT: unknown fields are ignored and reported to the unknown field reporter
+    - TRUSTED: unknown fields are ignored without being looked for, and protocols may
+      use faster means of building messages which produce less detailed errors; only
+      for messages from trusted senders
+    """
+
+    STRICT = "strict"
+    DEFAULT = "default"
+    TRUSTED = "trusted"
 
 
 class MessagePackProtocol(abc.ABC):
+    newline_delimited: t.ClassVar[bool] = False
+
+    @property
+    def available(self) -> bool:
+        """
+        Whether messages can be packed and unpacked with this protocol, i.e. whether
+        its dependencies are installed.
+        """
+        return True
+
     @abc.abstractmethod
     def pack(self, message: Message) -> bytes:
         """
@@ -21,7 +90,59 @@ class MessagePackProtocol(abc.ABC):
         """
 
     @abc.abstractmethod
-    def unpack(self, buf: bytes) -> Message:
+    def unpack(
+        self,
+        buf: ReadableBuffer,
+        *,
+        mode: UnpackMode = UnpackMode.DEFAULT,
+        container_cache: ContainerCache | None = None,
+    ) -> Message:
         """
         Unpack bytes into a message.
         """
+
+    def unpack_lazy(
+        self,
+        buf: ReadableBuffer,
+        *,
+        mode: UnpackMode = UnpackMode.DEFAULT,
+        container_cache: ContainerCache | None = None,
+    ) -> LazyMessage:
+        """
+        Unpack bytes into a message whose payload may be decoded on first access.
+        """
+        return LazyMessage(
+            buf, self.unpack(buf, mode=mode, container_cache=container_cache)
+        )
+
+    def pack_frozen(self, message: FrozenMessage) -> bytes:
+        """
+        Pack a frozen message into the same bytes as the message it is a variant of.
+        """
+        return self.pack(message.to_message())
+
+    def unpack_frozen(
+        self, buf: ReadableBuffer, *, mode: UnpackMode = UnpackMode.DEFAULT
+    ) -> FrozenMessage:
+        """
+        Unpack bytes into the frozen variant of a message.
+
+        :raises TypeError: if the message class has no frozen variant
+        """
+        return freeze(self.unpack(buf, mode=mode))
+
+    def peek(self, buf: ReadableBuffer) -> MessageHeader:
+        """
+        Read the header of a message, without necessarily unpacking the message.
+
+        :raises InvalidMessageError: if the message cannot be read
+        """
+        try:
+            message = self.unpack(buf)
+        except InvalidMessageError:
+            raise
+        except ValueError as err:
+            raise InvalidMessageError(f"could not peek message: {err}") from err
+        return MessageHeader(
+            buf[0], message.message_type, getattr(message, "task_id", None)
+        )
@@ -0,0 +1,137 @@
+"""
+A minimal scanner for locating values in a JSON document without decoding them.
+
+The scanner finds the extent of each member of a JSON object as a pair of offsets,
+so that callers can decode only the members they need. Strings are skipped by
+searching for their closing quotes, so a large string costs very little to skip.
+
+The scanner works on any bytes-like buffer and does not fully validate the
+document. Values which it locates must still be decoded by a real JSON parser.
+"""
+
+from __future__ import annotations
+
+import re
+import typing as t
+
+from ..protocol import ReadableBuffer
+
+_QUOTE = ord('"')
+_BACKSLASH = ord("\\")
+_COLON = ord(":")
+_COMMA = ord(",")
+_OPEN_BRACE = ord("{")
+_CLOSE_BRACE = ord("}")
+_OPEN = frozenset(b"{[")
+
+_WHITESPACE_RE = re.compile(rb"[ \t\n\r]*")
+_QUOTE_RE = re.compile(rb'"')
+_STRUCTURAL_RE = re.compile(rb'["{}\[\]]')
+_SCALAR_RE = re.compile(rb"[^,}\] \t\n\r]*")
+
+
+class JSONScanError(ValueError):
+    """The document is not well-formed enough to be scanned."""
+
+
+def _skip_whitespace(buf: memoryview, pos: int) -> int:
+    match = _WHITESPACE_RE.match(buf, pos)
+    assert match is not None  # the pattern can match an empty string
+    return match.end()
+
+
+def _at(buf: memoryview, pos: int, char: int) -> bool:
+    return pos < len(buf) and buf[pos] == char
+
+
+def _expect(buf: memoryview, pos: int, char: int) -> None:
+    if not _at(buf, pos, char):
+        raise JSONScanError(f"expected {chr(char)!r} at offset {pos}")
+
+
+def skip_string(buf: memoryview, pos: int) -> int:
+    """
+    Given the offset of an opening quote, return the offset just past the closing
+    quote.
+    """
+    start = pos + 1
+    while True:
+        match = _QUOTE_RE.search(buf, start)
+        if match is None:
+            raise JSONScanError("unterminated string")
+        end = match.start()
+        # the quote is escaped if it is preceded by an odd number of backslashes
+        backslash = end
+        while buf[backslash - 1] == _BACKSLASH:
+            backslash -= 1
+        if (end - backslash) % 2 == 0:
+            return end + 1
+        start = end + 1
+
+
+def skip_value(buf: memoryview, pos: int) -> int:
+    """Given the offset of the start of a value, return the offset of its end."""
+    if pos >= len(buf):
+        raise JSONScanError("unexpected end of document")
+
+    first = buf[pos]
+    if first == _QUOTE:
+        return skip_string(buf, pos)
+
+    if first not in _OPEN:
+        # a number, or one of true, false, null
+        match = _SCALAR_RE.match(buf, pos)
+        assert match is not None  # the pattern can match an empty string
+        if match.end() == pos:
+            raise JSONScanError(f"expected a value at offset {pos}")
+        return match.end()
+
+    depth = 0
+    while True:
+        match = _STRUCTURAL_RE.search(buf, pos)
+        if match is None:
+            raise JSONScanError("unterminated object or array")
+        pos = match.start()
+        char = buf[pos]
+        if char == _QUOTE:
+            pos = skip_string(buf, pos)
+            continue
+        depth += 1 if char in _OPEN else -1
+        pos += 1
+        if depth == 0:
+            return pos
+
+
+def iter_object(
+    buf: ReadableBuffer, pos: int = 0
+) -> t.Iterator[tuple[memoryview, int, int]]:
+    """
+    Iterate over the members of the object which starts at (or after whitespace at)
+    `pos`, yielding `(key, start, end)` for each.
+
+    `key` is the undecoded key, including its quotes, and `start` and `end` are the
+    offsets of the member's value.
+    """
+    view = memoryview(buf)
+    pos = _skip_whitespace(view, pos)
+    _expect(view, pos, _OPEN_BRACE)
+    pos = _skip_whitespace(view, pos + 1)
+    if _at(view, pos, _CLOSE_BRACE):
+        return
+
+    while True:
+        _expect(view, pos, _QUOTE)
+        key_end = skip_string(view, pos)
+        key = view[pos:key_end]
+
+        pos = _skip_whitespace(view, key_end)
+        _expect(view, pos, _COLON)
+        start = _skip_whitespace(view, pos + 1)
+        end = skip_value(view, start)
+        yield key, start, end
+
+        pos = _skip_whitespace(view, end)
+        if _at(view, pos, _CLOSE_BRACE):
+            return
+        _expect(view, pos, _COMMA)
+        pos = _skip_whitespace(view, pos + 1)
@@ -24,6 +24,18 @@ Because newlines are a forbidden character, multiple messages may be newline-del
     \x01{"message_type":"foo","data":{}}
     \x01{"message_type":"bar","data":{}}
 
+== Parsing
+
+The JSON parser can only read bytes, so the body of a message is copied for it. If
+the `orjson` package is installed, the bodies of large tasks and results are instead
+parsed straight from the buffer which holds them, without a copy.
+
+== Peeking
+
+The header of a message (its type and, for messages about a task, the task ID) can be
+read by scanning the JSON body only up to those fields. Other values are skipped
+without being decoded, and the message is not validated.
+
 == Unknown Field Handling (loading)
 
 The protocol defines the following behavior for missing and unknown fields:
@@ -32,36 +44,60 @@ The protocol defines the following behavior for missing and unknown fields:
     pydantic ValidationError
 
   - if a payload defines fields which are not included in the current message
-    definitions, they are ignored and a warning is logged
+    definitions, they are ignored and reported to DEFAULT_UNKNOWN_FIELD_REPORTER,
+    which logs a warning
 
   - if an envelope includes unknown fields (other than "message_type" and "data"), they
-    are ignored and a warning is logged
+    are ignored and reported in the same way
 
 Therefore, new fields may be added to the message classes, but they must not be
 required until all messages contain those fields.
+
+In strict mode, unknown fields are instead rejected. In trusted mode, they are not
+looked for, and a message is validated directly from its JSON in a single pass; if that
+fails, the message is unpacked again as usual, so that errors are unchanged.
 """  # noqa: E501
 
 from __future__ import annotations
 
 import json
-import logging
+import re
 import typing as t
+import uuid
 
 import pydantic
-
-from ..message_types import ALL_MESSAGE_CLASSES, Message
-from ..protocol import MessagePackProtocol
-
-log = logging.getLogger(__name__)
+import pydantic_core
+
+try:
+    import orjson
+
+    has_orjson = True
+except ImportError:
+    has_orjson = False
+
+from ..container_cache import ContainerCache
+from ..exceptions import InvalidMessageError
+from ..lazy import LazyMessage
+from ..message_types import (
+    MESSAGE_TYPES,
+    EPStatusReport,
+    FrozenMessage,
+    ManagerStatusReport,
+    Message,
+    MessageTypeInfo,
+    Task,
+    TaskTransition,
+    frozen,
+    registry,
+)
+from ..message_types.registry import known_fields
+from ..protocol import MessageHeader, MessagePackProtocol, ReadableBuffer, UnpackMode
+from ..unknown_fields import DEFAULT_UNKNOWN_FIELD_REPORTER
+from ._json_scan import JSONScanError, iter_object
 
 # protocol version and reserved byte as a byte array
 _VERSION_BYTE = (1).to_bytes(1, byteorder="big", signed=False)
 
-# internal to this module, a mapping from message classes to their names
-_MESSAGE_TYPE_MAP: dict[str, type[Message]] = {
-    m.Meta.message_type: m for m in ALL_MESSAGE_CLASSES
-}
-
 
 class MessageEnvelope(pydantic.BaseModel):
     message_type: str
@@ -70,62 +106,427 @@ class MessageEnvelope(pydantic.BaseModel):
     @pydantic.field_validator("message_type")
     @classmethod
     def message_type_is_known(cls, v: str) -> str:
-        if v not in _MESSAGE_TYPE_MAP:
+        if v not in MESSAGE_TYPES:
             # pydantic will wrap this message + context in a ValidationError
             raise ValueError("unrecognized value")
         return v
 
 
-_ModelT = t.TypeVar("_ModelT", bound=t.Union[Message, MessageEnvelope])
+_ENVELOPE_FIELDS = known_fields(MessageEnvelope)
 
 
-def _log_unknown_fields(model: type[_ModelT], data: dict[str, t.Any]) -> None:
-    if issubclass(model, MessageEnvelope):
-        outer_type = "envelope"
-        message_type = data["message_type"]
-    elif issubclass(model, Message):
-        outer_type = "data"
-        message_type = model.Meta.message_type
-    else:
-        raise NotImplementedError
+def _check_unknown_fields(
+    outer_type: str,
+    message_type: str,
+    unknown_fields: t.AbstractSet[str],
+    mode: UnpackMode,
+) -> None:
+    if unknown_fields:
+        if mode is UnpackMode.STRICT:
+            raise InvalidMessageError(
+                f"unknown {outer_type} fields in a {message_type} message: "
+                f"{sorted(unknown_fields)}"
+            )
+        DEFAULT_UNKNOWN_FIELD_REPORTER.report(outer_type, message_type, unknown_fields)
+
+
+def _load_envelope(
+    payload: t.Any, mode: UnpackMode = UnpackMode.DEFAULT
+) -> MessageEnvelope:
+    envelope = MessageEnvelope.model_validate(payload)
+    if mode is not UnpackMode.TRUSTED:
+        _check_unknown_fields(
+            "envelope", envelope.message_type, payload.keys() - _ENVELOPE_FIELDS, mode
+        )
+    return envelope
+
+
+def _load(
+    info: MessageTypeInfo,
+    data: dict[str, t.Any],
+    mode: UnpackMode = UnpackMode.DEFAULT,
+    container_cache: ContainerCache | None = None,
+) -> Message:
+    container_key = None
+    if container_cache is not None and issubclass(info.message_class, Task):
+        container_data = data.get("container")
+        if type(container_data) is dict:
+            container_key, container = container_cache.lookup(container_data)
+            if container is not None:
+                # a model instance is taken as-is by the validator, so the cached
+                # container is shared rather than validated again
+                data = {**data, "container": container}
+                container_key = None
+
+    message = info.validate(data)
+    if mode is not UnpackMode.TRUSTED:
+        _check_unknown_fields(
+            "data", info.message_type, info.unknown_fields(data), mode
+        )
+    if container_key is not None:
+        task = t.cast(Task, message)
+        if task.container is not None:
+            # the task holds the immutable copy which is cached, like later tasks
+            task.container = t.cast(ContainerCache, container_cache).store(
+                container_key, task.container
+            )
+    return message
+
+
+def _load_frozen(
+    info: MessageTypeInfo,
+    data: dict[str, t.Any],
+    mode: UnpackMode = UnpackMode.DEFAULT,
+) -> FrozenMessage:
+    frozen_class = frozen._frozen_class_for(info.message_class)
+    message = frozen._get_adapter(frozen_class).validate_python(data)
+    if mode is not UnpackMode.TRUSTED:
+        _check_unknown_fields(
+            "data", info.message_type, info.unknown_fields(data), mode
+        )
+    return t.cast(FrozenMessage, message)
 
-    model_ = t.cast(type[pydantic.BaseModel], model)
 
-    unknown_fields = set(data)
-    for name, field in model_.model_fields.items():
-        unknown_fields.discard(name)
-        unknown_fields.discard(field.alias)
+# in trusted mode, a whole message is validated from JSON in a single pass, as a
+# union of envelopes (one for each registered message type) which is discriminated by
+# the message type; this is rebuilt whenever the registry changes
+_trusted_validator: tuple[int, pydantic.TypeAdapter[t.Any]] | None = None
 
-    if unknown_fields:
-        log.warning(
-            "encountered unknown %s fields while reading a %s message: %s",
-            outer_type,
-            message_type,
-            unknown_fields,
+
+def _get_trusted_validator() -> pydantic.TypeAdapter[t.Any]:
+    global _trusted_validator
+    if _trusted_validator is not None and _trusted_validator[0] == registry._version:
+        return _trusted_validator[1]
+
+    # the types here are built at runtime, so they are Any to mypy
+    envelopes: list[t.Any] = []
+    for message_type, info in MESSAGE_TYPES.items():
+        literal: t.Any = t.Literal[message_type]
+        envelope = pydantic.create_model(
+            f"{info.message_class.__name__}Envelope",
+            message_type=(literal, ...),
+            data=(info.message_class, ...),
         )
+        envelopes.append(t.Annotated[envelope, pydantic.Tag(message_type)])
+    union: t.Any = t.Union[tuple(envelopes)]
+    adapter: pydantic.TypeAdapter[t.Any] = pydantic.TypeAdapter(
+        t.Annotated[union, pydantic.Discriminator("message_type")]
+    )
+    _trusted_validator = (registry._version, adapter)
+    return adapter
+
+
+def _loads(body: ReadableBuffer) -> t.Any:
+    try:
+        return pydantic_core.from_json(bytes(body))
+    except ValueError:
+        # the stdlib decoder is more permissive (e.g. it accepts lone surrogates),
+        # so fall back to it before reporting an error
+        return json.loads(bytes(body))
+
+
+def _loads_string(value: memoryview) -> t.Any:
+    """Decode a JSON string, reading it straight from its buffer if possible."""
+    if has_orjson:
+        try:
+            return orjson.loads(value)
+        except orjson.JSONDecodeError:
+            pass
+    return _loads(value)
+
+
+# the bodies of messages of at least this size, whose type has a payload field, are
+# parsed straight from their buffer by orjson, if it is installed, rather than from
+# a copy; copying smaller bodies costs little
+_PARSE_IN_PLACE_THRESHOLD = 65536
+# the start of a body written by pack(), e.g. b'{"message_type":"task"'
+_MESSAGE_TYPE_RE = re.compile(rb'\{"message_type":"(\w+)"')
+# a sentinel for a body which has not been parsed
+_UNPARSED: t.Any = object()
+
+
+def _has_float(value: t.Any) -> bool:
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        value_type = type(value)
+        if value_type is dict:
+            stack.extend(value.values())
+        elif value_type is list:
+            stack.extend(value)
+        elif value_type is float:
+            return True
+    return False
+
+
+def _parse_in_place(buf: ReadableBuffer) -> t.Any:
+    """
+    Parse the body of a large message with a payload straight from its buffer,
+    without copying the body for the parser.
+
+    Otherwise, or if the body cannot be parsed in this way, return `_UNPARSED`.
+    """
+    body = memoryview(buf)[1:]
+    if not has_orjson or len(body) < _PARSE_IN_PLACE_THRESHOLD:
+        return _UNPARSED
+    match = _MESSAGE_TYPE_RE.match(body)
+    if match is None:
+        return _UNPARSED
+    info = MESSAGE_TYPES.get(match[1].decode())
+    if info is None or info.message_class.Meta.lazy_field is None:
+        return _UNPARSED
+
+    try:
+        payload = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        return _UNPARSED
+    # orjson parses integers which do not fit in 64 bits as floats, where the other
+    # parsers keep them exact, so a body with any floats is parsed again; apart
+    # from the payload, which is a single string, these bodies are small to search
+    if _has_float(payload):
+        return _UNPARSED
+    return payload
+
+
+def _decode(
+    buf: ReadableBuffer, mode: UnpackMode, payload: t.Any = _UNPARSED
+) -> tuple[MessageTypeInfo, dict[str, t.Any]]:
+    """
+    Decode a message into the description of its type and its data.
+
+    :param payload: the parsed body of the message, if it has already been parsed
+    """
+    if payload is _UNPARSED:
+        # strip the version byte header
+        # the JSON parser can only read bytes, so this is the one copy of the body
+        # it is not kept after parsing, so it is freed before the data is validated
+        payload = _loads(bytes(memoryview(buf)[1:]))
+
+    # fast path: for a well-formed envelope, take the data directly, skipping the
+    # construction of a MessageEnvelope
+    if type(payload) is dict:
+        message_type = payload.get("message_type")
+        data = payload.get("data")
+        if type(message_type) is str and type(data) is dict:
+            info = MESSAGE_TYPES.get(message_type)
+            if info is not None:
+                if len(payload) > 2 and mode is not UnpackMode.TRUSTED:
+                    _check_unknown_fields(
+                        "envelope",
+                        message_type,
+                        payload.keys() - _ENVELOPE_FIELDS,
+                        mode,
+                    )
+                return info, data
+
+    # slow path: validate the envelope, which produces detailed errors
+    envelope = _load_envelope(payload, mode)
+    return MESSAGE_TYPES[envelope.message_type], envelope.data
+
+
+# for each message type, the bytes of a packed message which precede the data
+# e.g. b'\x01{"message_type":"task","data":'
+# this is filled as message types are first packed
+_PACK_PREFIXES: dict[str, bytes] = {}
+_PACK_SUFFIX = b"}"
+
+
+def _pack_prefix(message_type: str) -> bytes:
+    try:
+        return _PACK_PREFIXES[message_type]
+    except KeyError:
+        pass
+    prefix = _PACK_PREFIXES[message_type] = (
+        _VERSION_BYTE
+        + b'{"message_type":'
+        + pydantic_core.to_json(message_type)
+        + b',"data":'
+    )
+    return prefix
+
+
+# status reports may pack their task statuses in the dict-of-lists form or the
+# columnar form, and pydantic serializes a field with such a choice to JSON in two
+# passes; a report in the (common) dict-of-lists form is serialized as a twin class
+# whose field only has that form, which is done in one
+_DICT_FORM_SERIALIZERS: dict[type[Message], pydantic_core.SchemaSerializer] = {
+    report_class: pydantic.create_model(
+        report_class.__name__,
+        __base__=report_class,
+        task_statuses=(t.Dict[str, t.List[TaskTransition]], ...),
+    ).__pydantic_serializer__
+    for report_class in (EPStatusReport, ManagerStatusReport)
+}
+
 
+def _serializer(message: Message) -> pydantic_core.SchemaSerializer:
+    serializer = _DICT_FORM_SERIALIZERS.get(type(message))
+    if serializer is None or type(getattr(message, "task_statuses")) is not dict:
+        serializer = message.__pydantic_serializer__
+    return serializer
 
-def _load(model: type[_ModelT], data: dict[str, t.Any]) -> _ModelT:
-    model_ = t.cast("type[pydantic.BaseModel]", model)
-    ret = model_.model_validate(data)
-    _log_unknown_fields(model, data)
-    return t.cast(_ModelT, ret)
+
+# a sentinel for envelope fields which peek() has not found
+_NOT_FOUND: t.Any = object()
+# the first byte of a JSON string, which is the only form of payload deferred by
+# unpack_lazy()
+_QUOTE = ord('"')
 
 
 class MessagePackProtocolV1(MessagePackProtocol):
+    newline_delimited = True
+
     def pack(self, message: Message) -> bytes:
-        body = MessageEnvelope(
-            message_type=message.message_type, data=message.model_dump()
+        message_type = message.message_type
+        info = MESSAGE_TYPES.get(message_type)
+        if info is None:
+            # not a registered message type; validating an envelope will raise an error
+            body = MessageEnvelope(
+                message_type=message.message_type, data=message.model_dump()
+            )
+            return _VERSION_BYTE + body.model_dump_json().encode()
+
+        # serialize the message directly to JSON (which is always UTF-8) and wrap it
+        # in the envelope, producing the same bytes as serializing a MessageEnvelope
+        data = _serializer(message).to_json(
+            message, exclude=info.omitted_fields(message)
+        )
+        return b"".join((_pack_prefix(message_type), data, _PACK_SUFFIX))
+
+    def pack_frozen(self, message: FrozenMessage) -> bytes:
+        message_type = message.message_type
+        info = MESSAGE_TYPES.get(message_type)
+        if info is None:
+            return self.pack(message.to_message())
+        # a frozen message serializes to the same JSON as its message
+        data = frozen._get_adapter(type(message)).serializer.to_json(
+            message, exclude=info.omitted_fields(message)
+        )
+        return b"".join((_pack_prefix(message_type), data, _PACK_SUFFIX))
+
+    def unpack(
+        self,
+        buf: ReadableBuffer,
+        *,
+        mode: UnpackMode = UnpackMode.DEFAULT,
+        container_cache: ContainerCache | None = None,
+    ) -> Message:
+        payload = _parse_in_place(buf)
+        # containers are only interned when messages are validated from Python data,
+        # so the single pass of trusted mode is skipped when there is a cache, and
+        # for a body which was parsed without copying it
+        if (
+            mode is UnpackMode.TRUSTED
+            and container_cache is None
+            and payload is _UNPARSED
+        ):
+            try:
+                # the JSON parser can only read bytes, so copy the body
+                envelope = _get_trusted_validator().validate_json(
+                    bytes(memoryview(buf)[1:])
+                )
+                return t.cast(Message, envelope.data)
+            except ValueError:
+                # unpack the message again in the usual way, so that the error is
+                # as detailed as it would otherwise be
+                pass
+
+        info, data = _decode(buf, mode, payload)
+        return _load(info, data, mode, container_cache)
+
+    def unpack_frozen(
+        self, buf: ReadableBuffer, *, mode: UnpackMode = UnpackMode.DEFAULT
+    ) -> FrozenMessage:
+        info, data = _decode(buf, mode, _parse_in_place(buf))
+        return _load_frozen(info, data, mode)
+
+    def unpack_lazy(
+        self,
+        buf: ReadableBuffer,
+        *,
+        mode: UnpackMode = UnpackMode.DEFAULT,
+        container_cache: ContainerCache | None = None,
+    ) -> LazyMessage:
+        view = memoryview(buf)
+        try:
+            envelope = {
+                _loads(key): (start, end) for key, start, end in iter_object(view, 1)
+            }
+            message_type = _loads(view[slice(*envelope["message_type"])])
+            data_start, _ = envelope["data"]
+            info = MESSAGE_TYPES[message_type]
+            data_spans = {
+                _loads(key): (start, end)
+                for key, start, end in iter_object(view, data_start)
+            }
+        except (JSONScanError, KeyError, TypeError):
+            # an irregular envelope or data; unpacking the message normally will
+            # either raise an appropriate error or produce the message
+            return LazyMessage(
+                buf, self.unpack(buf, mode=mode, container_cache=container_cache)
+            )
+
+        lazy_field = info.message_class.Meta.lazy_field
+        payload_span = data_spans.pop(lazy_field, None) if lazy_field else None
+        # only a string payload is deferred; any other value (e.g. null, in a message
+        # which refers to its payload) is unpacked normally
+        if payload_span is None or view[payload_span[0]] != _QUOTE:
+            return LazyMessage(
+                buf, self.unpack(buf, mode=mode, container_cache=container_cache)
+            )
+
+        if len(envelope) > 2 and mode is not UnpackMode.TRUSTED:
+            _check_unknown_fields(
+                "envelope", message_type, envelope.keys() - _ENVELOPE_FIELDS, mode
+            )
+        data = {
+            key: _loads(view[start:end]) for key, (start, end) in data_spans.items()
+        }
+        # stand in an empty string for the payload while validating the other fields
+        # unknown fields are logged here, as they would be by unpack()
+        data[lazy_field] = ""
+        message = _load(info, data, mode, container_cache)
+        return LazyMessage(
+            buf,
+            message,
+            raw_payload=view[slice(*payload_span)],
+            decode_payload=_loads_string,
         )
-        # encode() defaults to UTF-8, which is what the protocol specifies
-        return _VERSION_BYTE + body.model_dump_json().encode()
-
-    def unpack(self, buf: bytes) -> Message:
-        # strip the version byte header
-        body = buf[1:]
-        payload = json.loads(body)
-        envelope = _load(MessageEnvelope, payload)
 
-        message_class = _MESSAGE_TYPE_MAP[envelope.message_type]
-        message = _load(message_class, envelope.data)
-        return message
+    def peek(self, buf: ReadableBuffer) -> MessageHeader:
+        # scan the envelope and data only as far as the fields being read
+        # other values, like a large `task_buffer`, are skipped without being decoded
+        view = memoryview(buf)
+        try:
+            message_type, data_start = _NOT_FOUND, _NOT_FOUND
+            for key, start, end in iter_object(view, 1):
+                name = _loads(key)
+                if name == "message_type":
+                    message_type = _loads(view[start:end])
+                elif name == "data":
+                    data_start = start
+                if message_type is not _NOT_FOUND and data_start is not _NOT_FOUND:
+                    break
+
+            info = MESSAGE_TYPES.get(message_type)
+            if info is None:
+                raise InvalidMessageError(f"unrecognized message type {message_type!r}")
+            if data_start is _NOT_FOUND:
+                raise InvalidMessageError("message envelope has no data")
+
+            task_id = None
+            if "task_id" in info.known_fields:
+                for key, start, end in iter_object(view, data_start):
+                    if _loads(key) == "task_id":
+                        task_id = uuid.UUID(_loads(view[start:end]))
+                        break
+                else:
+                    raise InvalidMessageError(
+                        f"{message_type} message data has no task_id"
+                    )
+        except InvalidMessageError:
+            raise
+        except (ValueError, TypeError, AttributeError) as err:
+            raise InvalidMessageError(f"could not read message header: {err}") from err
+
+        return MessageHeader(view[0], message_type, task_id)
@@ -0,0 +1,238 @@
+"""
+This file defines Protocol Version 2 of the funcx messagepack protocol.
+
+v2 of the protocol does the following:
+- each message is encoded as a msgpack document with a one-byte header
+- the first byte of the header contains the protocol version, always 2
+- the body is a msgpack array of exactly two elements: the message type (a string) and
+  the message data (a map)
+- the message type determines which class is used to load the content of the data
+
+Strings are stored as length-prefixed UTF-8, so large fields like `Task.task_buffer`
+and `Result.data` are copied onto the wire as-is rather than being escaped.
+
+That makes v2 much faster than v1 for messages with large payloads, for which it is
+meant. For status reports and small messages, it is slower than v1, which packs and
+unpacks JSON in a single native pass, where v2 builds Python objects and encodes
+UUIDs and enums in Python.
+
+Some values are encoded with msgpack extension types:
+
+  - ext type 1: a UUID, stored as its 16 raw bytes
+  - ext type 2: a TaskState, stored as a one-byte code
+  - ext type 3: an ActorName, stored as a one-byte code
+
+Enum codes are defined in `messagepack._enum_codes`. Enum members which do not have a
+code are encoded as their string values.
+
+Because the body is binary, v2 messages may contain newlines and cannot be
+newline-delimited.
+
+== Unknown Field Handling (loading)
+
+Unknown fields in the message data are handled exactly as they are in v1: they are
+ignored and reported to DEFAULT_UNKNOWN_FIELD_REPORTER.
+"""
+
+from __future__ import annotations
+
+import enum
+import threading
+import typing as t
+import uuid
+
+import pydantic_core
+
+from ...tasks.constants import ActorName, TaskState
+from .._enum_codes import ACTOR_NAME_CODES, TASK_STATE_CODES, reverse_codes
+from ..container_cache import ContainerCache
+from ..exceptions import InvalidMessageError
+from ..message_types import (
+    MESSAGE_TYPES,
+    FrozenMessage,
+    Message,
+    MessageTypeInfo,
+    frozen,
+)
+from ..protocol import MessagePackProtocol, ReadableBuffer, UnpackMode
+from .proto1 import _load, _load_frozen, _serializer
+
+try:
+    import msgpack
+
+    has_msgpack = True
+except ImportError:
+    has_msgpack = False
+
+# the protocol version, which is written as the first byte of each message
+_PROTOCOL_VERSION = 2
+
+_EXT_UUID = 1
+_EXT_TASK_STATE = 2
+_EXT_ACTOR_NAME = 3
+
+# enum class -> (ext type, code table)
+_ENUM_CODES: dict[type[enum.Enum], tuple[int, tuple[enum.Enum, ...]]] = {
+    TaskState: (_EXT_TASK_STATE, TASK_STATE_CODES),
+    ActorName: (_EXT_ACTOR_NAME, ACTOR_NAME_CODES),
+}
+
+if has_msgpack:
+    # the packed form of every enum member which has a code, and the reverse, built
+    # once so that each enum in a message costs a lookup rather than an allocation
+    # enum class -> (member -> ext)
+    _ENUM_ENCODERS: dict[type[enum.Enum], dict[enum.Enum, msgpack.ExtType]] = {
+        enum_class: {
+            member: msgpack.ExtType(ext_type, bytes((code,)))
+            for member, code in reverse_codes(codes).items()
+        }
+        for enum_class, (ext_type, codes) in _ENUM_CODES.items()
+    }
+    # (ext type, data) -> member
+    _ENUM_DECODERS: dict[tuple[int, bytes], enum.Enum] = {
+        (ext.code, ext.data): member
+        for exts in _ENUM_ENCODERS.values()
+        for member, ext in exts.items()
+    }
+
+# msgpack packers are not thread-safe, so each thread reuses its own, rather than
+# allocating a new buffer for every message
+_packers = threading.local()
+# a packer's buffer grows to fit the largest message which it packs; a packer which
+# has packed a larger message than this is discarded, so that its buffer is not kept
+_MAX_PACKER_BUFFER_SIZE = 4 * 1024 * 1024
+
+
+def _check_has_msgpack() -> None:
+    # defer this error until the caller tries to pack or unpack, so that the protocol
+    # can be registered even without the 'msgpack' dependency
+    if not has_msgpack:
+        raise RuntimeError("""\
+Cannot use messagepack protocol version 2 if the 'msgpack' package is not available.
+Either install it explicitly or install the 'msgpack' extra, as in
+
+    pip install 'globus-compute-common[msgpack]'
+
+""")
+
+
+def _default(obj: t.Any) -> t.Any:
+    # msgpack is used with `strict_types=True` so that str-based enums reach this hook
+    # rather than being packed as plain strings
+    # as a result, any subclass of a builtin type also arrives here
+    # UUIDs and coded enums are by far the most common, so are checked first
+    # (`_make()` skips the argument checks of `ExtType()`, which always pass here)
+    if type(obj) is uuid.UUID:
+        return msgpack.ExtType._make((_EXT_UUID, obj.bytes))
+    exts = _ENUM_ENCODERS.get(type(obj))
+    if exts is not None and obj in exts:
+        return exts[obj]
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, uuid.UUID):
+        return msgpack.ExtType(_EXT_UUID, obj.bytes)
+    if isinstance(obj, str):
+        return str.__str__(obj)
+    if isinstance(obj, int):
+        return int(obj)
+    if isinstance(obj, float):
+        return float(obj)
+    if isinstance(obj, dict):
+        return dict(obj)
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return list(obj)
+    # anything else is encoded the same way that v1 would write it into JSON
+    return pydantic_core.to_jsonable_python(obj)
+
+
+def _ext_hook(ext_type: int, data: bytes) -> t.Any:
+    member = _ENUM_DECODERS.get((ext_type, data))
+    if member is not None:
+        return member
+    if ext_type == _EXT_UUID:
+        return uuid.UUID(bytes=bytes(data))
+    if ext_type in (_EXT_TASK_STATE, _EXT_ACTOR_NAME):
+        raise ValueError(f"unrecognized code for ext type {ext_type}")
+    raise ValueError(f"unrecognized ext type {ext_type}")
+
+
+def _pack(message_type: str, data: dict[str, t.Any]) -> bytes:
+    _check_has_msgpack()
+    try:
+        packer: msgpack.Packer = _packers.packer
+    except AttributeError:
+        packer = _packers.packer = msgpack.Packer(
+            default=_default, strict_types=True, use_bin_type=True, autoreset=False
+        )
+    try:
+        # the version byte is also the msgpack encoding of the integer 2, so the
+        # whole message is built in the packer's buffer and copied out once
+        packer.pack(_PROTOCOL_VERSION)
+        packer.pack([message_type, data])
+        packed: bytes = packer.bytes()
+    finally:
+        packer.reset()
+    if len(packed) > _MAX_PACKER_BUFFER_SIZE:
+        del _packers.packer
+    return packed
+
+
+def _decode(buf: ReadableBuffer) -> tuple[MessageTypeInfo, dict[str, t.Any]]:
+    """Decode a message into the description of its type and its data."""
+    _check_has_msgpack()
+    # strip the version byte header, without copying the body
+    body = memoryview(buf)[1:]
+    try:
+        payload = msgpack.unpackb(
+            body, ext_hook=_ext_hook, raw=False, strict_map_key=False
+        )
+    except (ValueError, msgpack.UnpackException) as err:
+        raise InvalidMessageError(f"could not decode message body: {err}") from err
+
+    if not isinstance(payload, list) or len(payload) != 2:
+        raise InvalidMessageError("message body must be a two-element array")
+    message_type, data = payload
+    info = MESSAGE_TYPES.get(message_type) if isinstance(message_type, str) else None
+    if info is None:
+        raise InvalidMessageError(f"unrecognized message type {message_type!r}")
+    if not isinstance(data, dict):
+        raise InvalidMessageError("message data must be a map")
+    return info, data
+
+
+def _omitted_fields(message: Message | FrozenMessage) -> set[str] | None:
+    info = MESSAGE_TYPES.get(message.message_type)
+    return None if info is None else info.omitted_fields(message)
+
+
+class MessagePackProtocolV2(MessagePackProtocol):
+    @property
+    def available(self) -> bool:
+        return has_msgpack
+
+    def pack(self, message: Message) -> bytes:
+        data = _serializer(message).to_python(message, exclude=_omitted_fields(message))
+        return _pack(message.message_type, data)
+
+    def pack_frozen(self, message: FrozenMessage) -> bytes:
+        # a frozen message dumps to the same data as its message
+        data = frozen._get_adapter(type(message)).dump_python(
+            message, exclude=_omitted_fields(message)
+        )
+        return _pack(message.message_type, data)
+
+    def unpack(
+        self,
+        buf: ReadableBuffer,
+        *,
+        mode: UnpackMode = UnpackMode.DEFAULT,
+        container_cache: ContainerCache | None = None,
+    ) -> Message:
+        info, data = _decode(buf)
+        return _load(info, data, mode, container_cache)
+
+    def unpack_frozen(
+        self, buf: ReadableBuffer, *, mode: UnpackMode = UnpackMode.DEFAULT
+    ) -> FrozenMessage:
+        info, data = _decode(buf)
+        return _load_frozen(info, data, mode)
@@ -0,0 +1,134 @@
+"""
+Aggregated reporting of unknown fields in unpacked messages.
+
+Unknown fields are expected when a newer sender adds a field to a message, and such a
+sender will usually add it to every message it sends. Rather than logging a warning
+for every message, an `UnknownFieldReporter` logs a warning the first time that it
+sees each combination of message type and unknown fields, and counts later
+occurrences. Every `interval` seconds, it logs a summary of the occurrences which it
+has counted since the last summary.
+
+The counts since the reporter was created are available from `counts()`, e.g. for
+export as metrics.
+
+Messages are reported to `DEFAULT_UNKNOWN_FIELD_REPORTER` by all protocol versions.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import typing as t
+
+log = logging.getLogger(__name__)
+
+
+class UnknownFields(t.NamedTuple):
+    """A combination of unknown fields, as counted by an `UnknownFieldReporter`."""
+
+    # where the fields were found: "envelope" or "data"
+    location: str
+    message_type: str
+    fields: frozenset[str]
+
+
+class UnknownFieldReporter:
+    """
+    Count unknown fields, and log warnings about them periodically.
+
+    :param interval: the minimum number of seconds between summaries
+    :param max_keys: the number of distinct combinations of unknown fields which are
+        counted separately; further combinations are only counted in
+        `overflow_count`, so that a sender cannot use unbounded memory
+    """
+
+    def __init__(self, interval: float = 60.0, *, max_keys: int = 1024) -> None:
+        self.interval = interval
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._counts: dict[UnknownFields, int] = {}
+        # the occurrences of each combination which have not yet been logged
+        self._pending: dict[UnknownFields, int] = {}
+        self._overflow_count = 0
+        self._pending_overflow = 0
+        self._last_summary = time.monotonic()
+
+    def report(
+        self, location: str, message_type: str, fields: t.AbstractSet[str]
+    ) -> None:
+        """Record that a message had unknown fields."""
+        if not fields:
+            return
+        key = UnknownFields(location, message_type, frozenset(fields))
+        with self._lock:
+            count = self._counts.get(key)
+            first = count is None and len(self._counts) < self.max_keys
+            if first:
+                self._counts[key] = 1
+            elif count is not None:
+                self._counts[key] = count + 1
+                self._pending[key] = self._pending.get(key, 0) + 1
+            else:
+                self._overflow_count += 1
+                self._pending_overflow += 1
+            due = time.monotonic() - self._last_summary >= self.interval
+
+        if first:
+            log.warning(
+                "encountered unknown %s fields while reading a %s message: %s",
+                location,
+                message_type,
+                set(fields),
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Log a summary of the occurrences counted since the last summary."""
+        now = time.monotonic()
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            overflow, self._pending_overflow = self._pending_overflow, 0
+            elapsed = now - self._last_summary
+            self._last_summary = now
+
+        for key, count in pending.items():
+            log.warning(
+                "encountered unknown %s fields in %d more %s messages "
+                "in the last %.0fs: %s",
+                key.location,
+                count,
+                key.message_type,
+                elapsed,
+                set(key.fields),
+            )
+        if overflow:
+            log.warning(
+                "encountered unknown fields in %d more messages in the last %.0fs, "
+                "with too many different combinations of fields to count separately",
+                overflow,
+                elapsed,
+            )
+
+    def counts(self) -> dict[UnknownFields, int]:
+        """The number of messages with each combination of unknown fields."""
+        with self._lock:
+            return dict(self._counts)
+
+    @property
+    def overflow_count(self) -> int:
+        """The number of messages whose unknown fields were not counted separately."""
+        return self._overflow_count
+
+    def reset(self) -> None:
+        """Forget all counts, so that every combination is logged again."""
+        with self._lock:
+            self._counts.clear()
+            self._pending.clear()
+            self._overflow_count = 0
+            self._pending_overflow = 0
+            self._last_summary = time.monotonic()
+
+
+DEFAULT_UNKNOWN_FIELD_REPORTER = UnknownFieldReporter()
@@ -1,16 +1,29 @@
 from .connection import default_redis_connection_factory, redis_connection_error_logging
-from .fields import HasRedisFields, HasRedisFieldsMeta, RedisField
+from .fields import (
+    HasRedisFields,
+    HasRedisFieldsMeta,
+    RedisField,
+    buffered_writes,
+    invalidate_cache,
+    missing_fields,
+    refresh_fields,
+    save_fields,
+)
 from .pubsub import ComputeRedisPubSub
 from .serde import (
+    BINARY_UUID_SERDE,
     DEFAULT_SERDE,
     FLOAT_SERDE,
     INT_SERDE,
     JSON_SERDE,
+    MSGPACK_SERDE,
     UUID_SERDE,
+    ComputeRedisBinaryUUIDSerde,
     ComputeRedisEnumSerde,
     ComputeRedisFloatSerde,
     ComputeRedisIntSerde,
     ComputeRedisJSONSerde,
+    ComputeRedisMsgpackSerde,
     ComputeRedisSerde,
     ComputeRedisUUIDSerde,
 )
@@ -23,16 +36,25 @@ __all__ = (
     "HasRedisFields",
     "HasRedisFieldsMeta",
     "RedisField",
+    "invalidate_cache",
+    "refresh_fields",
+    "save_fields",
+    "buffered_writes",
+    "missing_fields",
     "ComputeRedisSerde",
     "ComputeRedisIntSerde",
     "ComputeRedisFloatSerde",
     "ComputeRedisJSONSerde",
     "ComputeRedisUUIDSerde",
+    "ComputeRedisBinaryUUIDSerde",
+    "ComputeRedisMsgpackSerde",
     "DEFAULT_SERDE",
     "INT_SERDE",
     "FLOAT_SERDE",
     "JSON_SERDE",
     "UUID_SERDE",
+    "BINARY_UUID_SERDE",
+    "MSGPACK_SERDE",
     "ComputeRedisEnumSerde",
     "ComputeRedisPubSub",
 )
@@ -26,9 +26,27 @@ Either install it explicitly or install the 'redis' extra, as in
 """)
 
 
+@t.overload
 def default_redis_connection_factory(
     redis_url: t.Optional[str] = None,
-) -> "redis.Redis[str]":
+    *,
+    decode_responses: t.Literal[True] = True,
+) -> "redis.Redis[str]": ...
+
+
+@t.overload
+def default_redis_connection_factory(
+    redis_url: t.Optional[str] = None,
+    *,
+    decode_responses: t.Literal[False],
+) -> "redis.Redis[bytes]": ...
+
+
+def default_redis_connection_factory(
+    redis_url: t.Optional[str] = None,
+    *,
+    decode_responses: bool = True,
+) -> "redis.Redis[t.Any]":
     """
     Construct a Redis client for a given redis URL.
     If no URL is given, the COMPUTE_COMMON_REDIS_URL environment variable will be used.
@@ -38,12 +56,22 @@ def default_redis_connection_factory(
       redis://localhost:6379
 
     will be used as the default.
+
+    By default, responses are decoded to str. Pass `decode_responses=False` for a
+    client which returns bytes, which is required to read fields stored with binary
+    serdes, such as `MSGPACK_SERDE`.
     """
     _check_has_redis()
 
     if redis_url is None:
         redis_url = os.getenv("COMPUTE_COMMON_REDIS_URL", "redis://localhost:6379")
 
+    if not decode_responses:
+        return redis.Redis.from_url(
+            redis_url,
+            decode_responses=False,
+            health_check_interval=30,
+        )
     return redis.Redis.from_url(
         redis_url,
         decode_responses=True,
@@ -1,9 +1,142 @@
+import contextlib
+import time
+import types
 import typing as t
 
 from .serde import DEFAULT_SERDE, ComputeRedisSerde
 
 _null_key = "__NULL_KEY__"
 
+# the attribute of an owning object which holds its cached field values, as
+# {key: (expiry time, serialized value)}
+_CACHE_ATTR = "_redis_field_cache"
+# the attribute of an owning object which holds the values of its fields which have
+# been set, but not yet written, while its writes are buffered, as
+# {key: serialized value}
+_PENDING_ATTR = "_redis_field_pending"
+
+
+def _field_cache(owner: t.Any) -> t.Dict[str, t.Tuple[float, t.Any]]:
+    try:
+        cache: t.Dict[str, t.Tuple[float, t.Any]] = owner.__dict__[_CACHE_ATTR]
+    except KeyError:
+        cache = owner.__dict__[_CACHE_ATTR] = {}
+    return cache
+
+
+def invalidate_cache(owner: t.Any, *keys: str) -> None:
+    """
+    Discard the cached values of an object's RedisFields, so that they are read from
+    redis when next accessed.
+
+    :param owner: the object whose fields are cached
+    :param keys: the names of the fields to discard; by default, all of them
+    """
+    cache = owner.__dict__.get(_CACHE_ATTR)
+    if not cache:
+        return
+    if not keys:
+        cache.clear()
+    for key in keys:
+        cache.pop(key, None)
+
+
+def _declared_fields(owner: t.Any) -> t.Mapping[str, "RedisField"]:
+    fields: t.Mapping[str, RedisField] = getattr(type(owner), "__redis_fields__", {})
+    return fields
+
+
+def refresh_fields(owner: t.Any) -> t.Dict[str, t.Any]:
+    """
+    Read every RedisField of an object from redis, with a single HMGET, and return
+    their values.
+
+    The values of fields which have a `cache_ttl` (see `RedisField`) are cached, as
+    if each had been read, and so are read from the cache until they expire. Fields
+    without one are read from redis on every access, as usual.
+    """
+    fields = _declared_fields(owner)
+    if not fields:
+        return {}
+    now = time.monotonic()
+    values = owner.redis_client.hmget(owner.hname, [f.key for f in fields.values()])
+    loaded = {}
+    for (name, field), value in zip(fields.items(), values):
+        field._cache(owner, value, now)
+        loaded[name] = (
+            field.default if value is None else field.serde.deserialize(value)
+        )
+    return loaded
+
+
+def missing_fields(owner: t.Any) -> t.List[str]:
+    """
+    Read the required RedisFields of an object from redis, with a single HMGET, and
+    return the names of those which are not set, in the order in which they were
+    declared.
+    """
+    required = [
+        (name, field)
+        for name, field in _declared_fields(owner).items()
+        if field.required
+    ]
+    if not required:
+        return []
+    values = owner.redis_client.hmget(owner.hname, [f.key for _, f in required])
+    return [name for (name, _), value in zip(required, values) if value is None]
+
+
+def save_fields(owner: t.Any, *, expire: t.Optional[int] = None) -> None:
+    """
+    Write the buffered fields of an object to redis, with a single HSET, in a
+    transaction.
+
+    :param owner: the object whose fields are written
+    :param expire: if set, the object's hash is also set to expire in this many
+        seconds, in the same transaction
+    """
+    pending = owner.__dict__.get(_PENDING_ATTR)
+    if not pending and expire is None:
+        return
+    with owner.redis_client.pipeline() as pipe:
+        if pending:
+            pipe.hset(owner.hname, mapping=pending)
+        if expire is not None:
+            pipe.expire(owner.hname, expire)
+        pipe.execute()
+    if pending:
+        now = time.monotonic()
+        fields = _declared_fields(owner)
+        for key, value in pending.items():
+            fields[key]._cache(owner, value, now)
+        pending.clear()
+
+
+@contextlib.contextmanager
+def buffered_writes(
+    owner: t.Any, *, expire: t.Optional[int] = None
+) -> t.Iterator[None]:
+    """
+    Buffer the values set on an object's RedisFields, rather than writing each one to
+    redis as it is set, and write them with `save_fields()` when the block exits.
+
+    While writes are buffered, reading a field which has been set returns the value
+    which was set. If the block raises an exception, the values which have not been
+    saved are discarded.
+
+    :param owner: the object whose fields are buffered
+    :param expire: passed to `save_fields()` when the block exits
+    :raises RuntimeError: if the object's writes are already buffered
+    """
+    if _PENDING_ATTR in owner.__dict__:
+        raise RuntimeError("writes to this object are already buffered")
+    owner.__dict__[_PENDING_ATTR] = {}
+    try:
+        yield
+        save_fields(owner, expire=expire)
+    finally:
+        del owner.__dict__[_PENDING_ATTR]
+
 
 class RedisField:
     """
@@ -13,12 +146,44 @@ class RedisField:
     owner's hname in `owner.hname` to uniquely identify the keys.
 
     Fields can be serialized and deserialized by setting a ComputeRedisSerde.
+
+    By default, every access reads the field from redis. If a `cache_ttl` is set, on
+    the field or as `redis_field_cache_ttl` on the owning object, the value read from
+    redis is cached on the owning object for that many seconds, and values which are
+    set are written through to the cache. `refresh_fields()` (or
+    `HasRedisFields.refresh()`) reads every field of an object at once, and caches
+    the values of those which have a `cache_ttl`. Cached values may be stale if the
+    field is written elsewhere; discard them with `invalidate_cache()`.
+
+    Within `buffered_writes()` (or `HasRedisFields.buffer_writes()`), values which are
+    set are kept on the owning object, and written together when the block exits.
+
+    A field which is not set in redis reads as its `default`, which is shared by every
+    read, and so must be immutable; mutable defaults, like lists and dicts, are
+    rejected. Fields may be declared `required`, in which case `missing_fields()`
+    reports them if they are not set.
     """
 
-    # TODO: have a cache and TTL on the properties so that we aren't making so many
-    #       redis gets?
-    def __init__(self, serde: ComputeRedisSerde = DEFAULT_SERDE) -> None:
+    def __init__(
+        self,
+        serde: ComputeRedisSerde = DEFAULT_SERDE,
+        *,
+        cache_ttl: t.Optional[float] = None,
+        required: bool = False,
+        default: t.Any = None,
+    ) -> None:
+        if cache_ttl is not None and cache_ttl < 0:
+            raise ValueError("cache_ttl must not be negative")
+        # as for dataclasses, unhashable values are taken to be mutable
+        if type(default).__hash__ is None:
+            raise ValueError(
+                f"mutable default {type(default).__name__} is not allowed, since it "
+                "would be shared by every read: use an immutable value"
+            )
         self.serde = serde
+        self.cache_ttl = cache_ttl
+        self.required = required
+        self.default = default
         self.key: str = _null_key  # will be overwritten
 
     def _check_null_key(self) -> None:
@@ -29,14 +194,44 @@ class RedisField:
                 "metaclass to HasRedisFieldsMeta."
             )
 
+    def _cache_ttl(self, owner: t.Any) -> t.Optional[float]:
+        if self.cache_ttl is not None:
+            return self.cache_ttl
+        return getattr(owner, "redis_field_cache_ttl", None)
+
+    def _cache(self, owner: t.Any, value: t.Any, now: float) -> None:
+        # a value is cached for cache_ttl seconds; without a cache_ttl, it is not
+        cache_ttl = self._cache_ttl(owner)
+        if cache_ttl is not None:
+            _field_cache(owner)[self.key] = (now + cache_ttl, value)
+
     def __get__(self, owner: t.Any, ownertype: t.Type[t.Any]) -> t.Any:
+        if owner is None:
+            return self
         self._check_null_key()
-        value = owner.redis_client.hget(owner.hname, self.key)
-        return None if value is None else self.serde.deserialize(value)
+        # the serialized value is cached, so that each access deserializes a new
+        # copy, which the caller may modify
+        now = time.monotonic()
+        pending = owner.__dict__.get(_PENDING_ATTR)
+        entry = owner.__dict__.get(_CACHE_ATTR, {}).get(self.key)
+        if pending and self.key in pending:
+            value = pending[self.key]
+        elif entry is not None and entry[0] > now:
+            value = entry[1]
+        else:
+            value = owner.redis_client.hget(owner.hname, self.key)
+            self._cache(owner, value, now)
+        return self.default if value is None else self.serde.deserialize(value)
 
     def __set__(self, owner: t.Any, val: t.Any) -> None:
         self._check_null_key()
-        owner.redis_client.hset(owner.hname, self.key, self.serde.serialize(val))
+        value = self.serde.serialize(val)
+        pending = owner.__dict__.get(_PENDING_ATTR)
+        if pending is not None:
+            pending[self.key] = value
+            return
+        owner.redis_client.hset(owner.hname, self.key, value)
+        self._cache(owner, value, time.monotonic())
 
 
 class HasRedisFieldsMeta(type):
@@ -47,15 +242,70 @@ class HasRedisFieldsMeta(type):
 
     This inspects all class attributes and sets the keys on RedisField
     attributes to be the same as their attribute name.
+
+    It also records every RedisField of the class, including those which it inherits,
+    in `__redis_fields__`, a read-only mapping of attribute names to fields. Inherited
+    fields come first, in the order in which they were declared, and a field which is
+    redefined keeps the position of the field which it replaces.
     """
 
+    __redis_fields__: t.Mapping[str, RedisField]
+
     # don't type check __new__ -- metaclasses are hard for mypy
     def __new__(mcls, classname, bases, class_attrs):  # type: ignore
         for attrname, value in class_attrs.items():
             if isinstance(value, RedisField):
                 value.key = attrname
-        return super().__new__(mcls, classname, bases, class_attrs)
+        cls = super().__new__(mcls, classname, bases, class_attrs)
+
+        fields: t.Dict[str, RedisField] = {}
+        for klass in reversed(cls.__mro__):
+            for attrname, value in vars(klass).items():
+                if isinstance(value, RedisField):
+                    fields[attrname] = value
+                elif attrname in fields:
+                    # a field which is hidden by another attribute is no longer a field
+                    del fields[attrname]
+        cls.__redis_fields__ = types.MappingProxyType(fields)
+        return cls
 
 
 class HasRedisFields(metaclass=HasRedisFieldsMeta):
-    pass
+    __redis_fields__: t.ClassVar[t.Mapping[str, RedisField]]
+
+    def refresh(self) -> t.Dict[str, t.Any]:
+        """
+        Read every RedisField of this object at once, caching the values of those
+        which have a `cache_ttl`, and return them. See `refresh_fields()`.
+        """
+        return refresh_fields(self)
+
+    def missing_fields(self) -> t.List[str]:
+        """
+        The names of the required RedisFields of this object which are not set in
+        redis. See `missing_fields()`.
+        """
+        return missing_fields(self)
+
+    def invalidate_cache(self, *keys: str) -> None:
+        """
+        Discard the cached values of this object's RedisFields. See
+        `invalidate_cache()`.
+        """
+        invalidate_cache(self, *keys)
+
+    def save(self, *, expire: t.Optional[int] = None) -> None:
+        """
+        Write the buffered fields of this object in a single transaction. See
+        `save_fields()`.
+        """
+        save_fields(self, expire=expire)
+
+    def buffer_writes(
+        self, *, expire: t.Optional[int] = None
+    ) -> t.ContextManager[None]:
+        """
+        Buffer the values set on this object's RedisFields, and write them in a
+        single transaction when the block exits. See `buffered_writes()`.
+        """
+        return buffered_writes(self, expire=expire)
@@ -3,24 +3,58 @@ import json
 import typing as t
 import uuid
 
+try:
+    import msgpack
+
+    has_msgpack = True
+except ImportError:
+    has_msgpack = False
+
+# values read from redis are str if the connection decodes responses, and bytes if
+# it does not
+RedisValue = t.Union[str, bytes]
+
+# the first byte of a value written by a binary serde, which cannot begin a value
+# written by any text serde, as it is never valid in UTF-8 (nor used by msgpack)
+_BINARY_MARKER = b"\xc1"
+
+
+def _text(value: RedisValue) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def _check_has_msgpack() -> None:
+    # defer this error until the caller tries to serialize or deserialize, so that
+    # the serde can be defined even without the 'msgpack' dependency
+    if not has_msgpack:
+        raise RuntimeError("""\
+Cannot use ComputeRedisMsgpackSerde if the 'msgpack' package is not available.
+Either install it explicitly or install the 'msgpack' extra, as in
+
+    pip install 'globus-compute-common[msgpack]'
+
+""")
+
 
 class ComputeRedisSerde:
     """
     A Serializer/Deserializer for data going into or out of Redis.
 
     The base implementation just stringifies data and does nothing when
-    deserializing.
+    deserializing, other than to decode values read from a connection which does not
+    decode responses.
     """
 
-    def serialize(self, value: t.Any) -> str:
+    def serialize(self, value: t.Any) -> RedisValue:
         return str(value)
 
-    def deserialize(self, value: str) -> t.Any:
-        return value
+    def deserialize(self, value: RedisValue) -> t.Any:
+        return _text(value)
 
 
 class ComputeRedisIntSerde(ComputeRedisSerde):
-    def deserialize(self, value: str) -> int:
+    def deserialize(self, value: RedisValue) -> int:
+        value = _text(value)
         try:
             return int(value)
         except ValueError as e:
@@ -30,7 +64,8 @@ class ComputeRedisIntSerde(ComputeRedisSerde):
 
 
 class ComputeRedisFloatSerde(ComputeRedisSerde):
-    def deserialize(self, value: str) -> float:
+    def deserialize(self, value: RedisValue) -> float:
+        value = _text(value)
         try:
             return float(value)
         except ValueError as e:
@@ -40,10 +75,10 @@ class ComputeRedisFloatSerde(ComputeRedisSerde):
 
 
 class ComputeRedisJSONSerde(ComputeRedisSerde):
-    def serialize(self, value: t.Any) -> str:
+    def serialize(self, value: t.Any) -> RedisValue:
         return json.dumps(value)
 
-    def deserialize(self, value: str) -> t.Any:
+    def deserialize(self, value: RedisValue) -> t.Any:
         return json.loads(value)
 
 
@@ -51,15 +86,16 @@ class ComputeRedisEnumSerde(ComputeRedisSerde):
     def __init__(self, enum_class: t.Type[enum.Enum]) -> None:
         self.enum_class = enum_class
 
-    def serialize(self, value: t.Any) -> str:
+    def serialize(self, value: t.Any) -> RedisValue:
         return str(value.value)
 
-    def deserialize(self, value: str) -> t.Any:
-        return self.enum_class(value)
+    def deserialize(self, value: RedisValue) -> t.Any:
+        return self.enum_class(_text(value))
 
 
 class ComputeRedisUUIDSerde(ComputeRedisSerde):
-    def deserialize(self, value: str) -> t.Any:
+    def deserialize(self, value: RedisValue) -> t.Any:
+        value = _text(value)
         try:
             return uuid.UUID(value)
         except ValueError as e:
@@ -68,8 +104,50 @@ class ComputeRedisUUIDSerde(ComputeRedisSerde):
             ) from e
 
 
+class ComputeRedisBinaryUUIDSerde(ComputeRedisUUIDSerde):
+    """
+    Stores UUIDs as their 16 raw bytes, rather than as 36 characters of text.
+
+    Values can only be read from a connection which does not decode responses.
+    UUIDs stored as text are still read, so a field can be switched to this serde
+    without rewriting its existing values.
+    """
+
+    def serialize(self, value: t.Any) -> RedisValue:
+        return uuid.UUID(str(value)).bytes
+
+    def deserialize(self, value: RedisValue) -> t.Any:
+        if isinstance(value, bytes) and len(value) == 16:
+            return uuid.UUID(bytes=value)
+        return super().deserialize(value)
+
+
+class ComputeRedisMsgpackSerde(ComputeRedisJSONSerde):
+    """
+    Stores values as msgpack, which is more compact than JSON, and faster to
+    decode. Requires the 'msgpack' package.
+
+    Values can only be read from a connection which does not decode responses.
+    Values stored as JSON are still read, so a field can be switched to this serde
+    from `ComputeRedisJSONSerde` without rewriting its existing values.
+    """
+
+    def serialize(self, value: t.Any) -> RedisValue:
+        _check_has_msgpack()
+        packed: bytes = msgpack.packb(value)
+        return _BINARY_MARKER + packed
+
+    def deserialize(self, value: RedisValue) -> t.Any:
+        if isinstance(value, bytes) and value[:1] == _BINARY_MARKER:
+            _check_has_msgpack()
+            return msgpack.unpackb(value[1:])
+        return super().deserialize(value)
+
+
 DEFAULT_SERDE = ComputeRedisSerde()
 INT_SERDE = ComputeRedisIntSerde()
 FLOAT_SERDE = ComputeRedisFloatSerde()
 JSON_SERDE = ComputeRedisJSONSerde()
 UUID_SERDE = ComputeRedisUUIDSerde()
+BINARY_UUID_SERDE = ComputeRedisBinaryUUIDSerde()
+MSGPACK_SERDE = ComputeRedisMsgpackSerde()
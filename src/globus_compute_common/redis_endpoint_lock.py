@@ -1,7 +1,7 @@
 import typing as t
 from datetime import datetime
 
-from .redis import FLOAT_SERDE, HasRedisFieldsMeta, RedisField
+from .redis import FLOAT_SERDE, HasRedisFields, RedisField
 
 try:
     import redis
@@ -11,7 +11,7 @@ except ImportError:
     has_redis = False
 
 
-class RedisEndpointLock(metaclass=HasRedisFieldsMeta):
+class RedisEndpointLock(HasRedisFields):
     """
     ORM-esque class to wrap access to a lock on an endpoint UUID
 
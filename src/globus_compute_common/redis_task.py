@@ -5,7 +5,7 @@ from .redis import (
     INT_SERDE,
     JSON_SERDE,
     ComputeRedisEnumSerde,
-    HasRedisFieldsMeta,
+    HasRedisFields,
     RedisField,
 )
 from .tasks import InternalTaskState, TaskState
@@ -18,7 +18,12 @@ except ImportError:
     has_redis = False
 
 
-class RedisTask(metaclass=HasRedisFieldsMeta):
+def _should_expire(ttl_val: int, expiration: int) -> bool:
+    # the expiry of a task is set if it was not already set, and may only be reduced
+    return ttl_val < 0 or expiration < ttl_val
+
+
+class RedisTask(HasRedisFields):
     """
     ORM-esque class to wrap access to properties of tasks.
 
@@ -48,31 +53,38 @@ class RedisTask(metaclass=HasRedisFieldsMeta):
 
     There are several elements of this pattern of use which need to be fixed. It is
     important to be aware of the following:
-    - there is currently no use of Redis transactions, so nothing is atomic
+    - apart from the creation of a task, which is written in a single transaction,
+      there is no use of Redis transactions, so nothing is atomic; use
+      `buffer_writes()` to write several fields at once
     - Each time a field descriptor is accessed, it is read, returned, and discarded.
       Reading a field multiple times, even in a single python statement, is vulnerable
-      to data races
+      to data races. Setting `redis_field_cache_ttl` on a task caches the fields which
+      it reads for that many seconds, at the risk of reading stale values
     - no field requirements or validity are enforced -- reading a field can raise an
-      error if bad data were written to Redis
+      error if bad data were written to Redis, and required fields may be unset,
+      which `missing_fields()` reports
     - each field is read individually, which can be inefficient and inconsistent (vs
-      getall or setall semantics)
+      getall or setall semantics); `refresh()` reads all fields at once, and returns
+      their values (and caches them, if `redis_field_cache_ttl` is set)
     """
 
     # 2 weeks in seconds
     DEFAULT_TTL: t.ClassVar[int] = 1209600
 
     # required fields
-    # TODO: when `required=True` is supported in `RedisField`, set it for all of these
-    status = t.cast(TaskState, RedisField(serde=ComputeRedisEnumSerde(TaskState)))
+    status = t.cast(
+        TaskState, RedisField(serde=ComputeRedisEnumSerde(TaskState), required=True)
+    )
     internal_status = t.cast(
-        InternalTaskState, RedisField(serde=ComputeRedisEnumSerde(InternalTaskState))
+        InternalTaskState,
+        RedisField(serde=ComputeRedisEnumSerde(InternalTaskState), required=True),
     )
-    user_id = t.cast(int, RedisField(serde=INT_SERDE))
-    owner_id = t.cast(str, RedisField())
-    function_id = t.cast(str, RedisField())
-    container = t.cast(str, RedisField())
-    task_group_id = t.cast(str, RedisField())
-    queue_name = t.cast(str, RedisField())
+    user_id = t.cast(int, RedisField(serde=INT_SERDE, required=True))
+    owner_id = t.cast(str, RedisField(required=True))
+    function_id = t.cast(str, RedisField(required=True))
+    container = t.cast(str, RedisField(required=True))
+    task_group_id = t.cast(str, RedisField(required=True))
+    queue_name = t.cast(str, RedisField(required=True))
     # end required fields
 
     endpoint_id = t.cast(t.Optional[str], RedisField())
@@ -144,37 +156,43 @@ class RedisTask(metaclass=HasRedisFieldsMeta):
         # TODO: reject `RedisTask()` if the task_id already exists:
         #   if RedisTask.exists(redis_client, task_id): raise ...
 
-        # if required attributes are not yet set, initialize them to their defaults
-        if self.status is None:
-            self.status = TaskState.WAITING_FOR_EP  # type: ignore[unreachable]
-        if self.internal_status is None:
-            self.internal_status = (  # type: ignore[unreachable]
-                InternalTaskState.INCOMPLETE
-            )
-
-        # remaining RedisField attributes
-        if user_id is not None:
-            self.user_id = user_id
-        if owner_id is not None:
-            self.owner_id = owner_id
-        if function_id is not None:
-            self.function_id = function_id
-        if container is not None:
-            self.container = container
-        if payload is not None:
-            self.payload = payload
-        if payload_reference is not None:
-            self.payload_reference = payload_reference
-        if task_group_id is not None:
-            self.task_group_id = task_group_id
-        if queue_name is not None:
-            self.queue_name = queue_name
-        if endpoint_id is not None:
-            self.endpoint_id = endpoint_id
-        if details is not None:
-            self.details = details
-
-        self.ttl = self.DEFAULT_TTL
+        # read what is needed of any existing task in a single round trip, and then
+        # write the task in another, in a single transaction
+        with redis_client.pipeline(transaction=False) as pipe:
+            pipe.hmget(self.hname, ["status", "internal_status"])
+            pipe.ttl(self.hname)
+            (status, internal_status), ttl_val = pipe.execute()
+        expire = self.DEFAULT_TTL if _should_expire(ttl_val, self.DEFAULT_TTL) else None
+
+        with self.buffer_writes(expire=expire):
+            # if required attributes are not yet set, initialize them to their
+            # defaults
+            if status is None:
+                self.status = TaskState.WAITING_FOR_EP
+            if internal_status is None:
+                self.internal_status = InternalTaskState.INCOMPLETE
+
+            # remaining RedisField attributes
+            if user_id is not None:
+                self.user_id = user_id
+            if owner_id is not None:
+                self.owner_id = owner_id
+            if function_id is not None:
+                self.function_id = function_id
+            if container is not None:
+                self.container = container
+            if payload is not None:
+                self.payload = payload
+            if payload_reference is not None:
+                self.payload_reference = payload_reference
+            if task_group_id is not None:
+                self.task_group_id = task_group_id
+            if queue_name is not None:
+                self.queue_name = queue_name
+            if endpoint_id is not None:
+                self.endpoint_id = endpoint_id
+            if details is not None:
+                self.details = details
 
     @property
     def ttl(self) -> int:
@@ -184,13 +202,13 @@ class RedisTask(metaclass=HasRedisFieldsMeta):
     def ttl(self, expiration: int) -> None:
         """Expires task after expiration time, if not already set."""
         ttl_val = self.redis_client.ttl(self.hname)
-        if ttl_val < 0 or expiration < ttl_val:
-            # expire was not already set
+        if _should_expire(ttl_val, expiration):
             self.redis_client.expire(self.hname, expiration)
 
     def delete(self) -> None:
         """Removes this task from Redis, to be used after the result is gotten"""
         self.redis_client.delete(self.hname)
+        self.invalidate_cache()
 
     @classmethod
     def exists(cls, redis_client: "redis.Redis[t.Any]", task_id: str) -> bool:
@@ -1,5 +1,7 @@
 import pytest
 
+from globus_compute_common.messagepack import DEFAULT_UNKNOWN_FIELD_REPORTER
+
 
 def pytest_addoption(parser):
     parser.addoption(
@@ -31,3 +33,10 @@ def _unset_envvar_if_set(monkeypatch):
     # test behaviors from changing
     # TODO: allow use of the redis URL env var to control test behavior
     monkeypatch.delenv("COMPUTE_COMMON_REDIS_URL", raising=False)
+
+
+@pytest.fixture(autouse=True)
+def _reset_unknown_field_reporter():
+    # unknown fields are only logged the first time they are seen, so forget them
+    # between tests
+    DEFAULT_UNKNOWN_FIELD_REPORTER.reset()
@@ -1,5 +1,6 @@
 import json
 import logging
+import tracemalloc
 import typing as t
 import uuid
 
@@ -7,6 +8,8 @@ import pydantic
 import pytest
 
 from globus_compute_common.messagepack import (
+    InvalidMessageError,
+    MessageHeader,
     MessagePacker,
     UnrecognizedProtocolVersion,
     WrongMessageTypeError,
@@ -14,6 +17,7 @@ from globus_compute_common.messagepack import (
     unpack,
 )
 from globus_compute_common.messagepack.message_types import (
+    MESSAGE_TYPES,
     Container,
     EPStatusReport,
     ManagerStatusReport,
@@ -24,14 +28,19 @@ from globus_compute_common.messagepack.message_types import (
     TaskTransition,
 )
 from globus_compute_common.messagepack.message_types.base import Message, meta
+from globus_compute_common.messagepack.protocol_versions import proto1
 from globus_compute_common.messagepack.protocol_versions.proto1 import (
     MessageEnvelope,
-    _load,
+    _load_envelope,
 )
 from globus_compute_common.tasks.constants import ActorName, TaskState
 
 ID_ZERO = uuid.UUID(int=0)
 
+skip_without_orjson = pytest.mark.skipif(
+    not proto1.has_orjson, reason="test requires orjson lib"
+)
+
 
 @meta(message_type="result")
 class ResultV1(Message):
@@ -306,8 +315,8 @@ def test_result_back_compat(orig_class, new_class, init_args, expect_values):
     def test_unpack(buf: bytes, force_class) -> Message:
         body = buf[1:]
         payload = json.loads(body)
-        envelope = _load(MessageEnvelope, payload)
-        return _load(force_class, envelope.data)
+        envelope = _load_envelope(payload)
+        return force_class.model_validate(envelope.data)
 
     do_unpack = test_unpack
 
@@ -483,7 +492,7 @@ def test_cannot_unpack_message_wrong_type(payload, expect_err):
 
 def test_cannot_unpack_unrecognized_protocol_version():
     buf = crudely_pack_data({"message_type": "foo", "data": {}})
-    buf = b"\x02" + buf[1:]
+    buf = b"\x7f" + buf[1:]
     with pytest.raises(UnrecognizedProtocolVersion):
         unpack(buf)
 
@@ -614,3 +623,257 @@ def test_messages_can_assert_type():
         message.assert_one_of_types(Result, EPStatusReport)
     with pytest.raises(WrongMessageTypeError):
         message.assert_one_of_types()
+
+
+def test_well_formed_unpack_skips_envelope_validation(monkeypatch):
+    def _fail_validate(*args, **kwargs):
+        raise AssertionError("the envelope should not be validated")
+
+    monkeypatch.setattr(MessageEnvelope, "model_validate", _fail_validate)
+    msg = unpack(pack(Task(task_id=ID_ZERO, task_buffer="foo")))
+    assert isinstance(msg, Task)
+
+
+def test_unpack_accepts_lone_surrogates():
+    buf = crudely_pack_data(
+        {
+            "message_type": "task",
+            "data": {"task_id": str(ID_ZERO), "task_buffer": "foo\ud800"},
+        }
+    )
+    msg = unpack(buf)
+    assert msg.task_buffer == "foo\ud800"
+
+
+def _pack_via_envelope(message: Message) -> bytes:
+    # the original v1 packing implementation, for comparison, leaving out the fields
+    # which are omitted when they are None
+    info = MESSAGE_TYPES[message.message_type]
+    data = message.model_dump(exclude=info.omitted_fields(message))
+    body = MessageEnvelope(message_type=message.message_type, data=data)
+    return b"\x01" + body.model_dump_json().encode()
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        TaskCancel(task_id=ID_ZERO),
+        Task(task_id=ID_ZERO, task_buffer='some "quoted"\n\tdata ☃ \U0001f600'),
+        Task(
+            task_id=ID_ZERO,
+            container_id=ID_ZERO,
+            container=Container(container_id=ID_ZERO, name="c", images=[]),
+            task_buffer="foo",
+        ),
+        Result(
+            task_id=ID_ZERO,
+            data="foo",
+            details={"a": [1, 2.5, None, True], 3: {"nested": ID_ZERO}},
+            error_details=ResultErrorDetails(code="c", user_message="m"),
+            task_statuses=[
+                TaskTransition(
+                    timestamp=1, state=TaskState.SUCCESS, actor=ActorName.WORKER
+                )
+            ],
+        ),
+        EPStatusReport(
+            endpoint_id=ID_ZERO,
+            ep_status_report={"state": TaskState.RUNNING, "float": 1e100},
+            task_statuses={},
+        ),
+        ManagerStatusReport(task_statuses={}),
+    ],
+    ids=lambda m: type(m).__name__,
+)
+def test_pack_matches_envelope_serialization(message):
+    assert pack(message) == _pack_via_envelope(message)
+
+
+def test_cannot_pack_unknown_message_type():
+    @meta(message_type="foo")
+    class MyMessage(Message):
+        pass
+
+    with pytest.raises(pydantic.ValidationError):
+        pack(MyMessage())
+
+
+def test_unpack_batch():
+    packer = MessagePacker()
+    good = [
+        Task(task_id=ID_ZERO, task_buffer="foo"),
+        TaskCancel(task_id=ID_ZERO),
+        Result(task_id=ID_ZERO, data="bar"),
+    ]
+    bufs = [
+        pack(good[0]),
+        b"",
+        crudely_pack_data({"message_type": "task", "data": {}}),
+        pack(good[1]),
+        b"\x7f" + pack(good[1])[1:],
+        b"\x01not json",
+        pack(good[2]),
+    ]
+    messages, errors = packer.unpack_batch(bufs)
+    assert len(messages) == len(errors) == len(bufs)
+
+    assert messages[0] == good[0]
+    assert messages[3] == good[1]
+    assert messages[6] == good[2]
+    for idx in (0, 3, 6):
+        assert errors[idx] is None
+
+    for idx in (1, 2, 4, 5):
+        assert messages[idx] is None
+        assert isinstance(errors[idx], InvalidMessageError)
+    assert isinstance(errors[2].__cause__, pydantic.ValidationError)
+    assert isinstance(errors[4], UnrecognizedProtocolVersion)
+
+
+def test_unpack_batch_empty():
+    assert MessagePacker().unpack_batch([]) == ([], [])
+
+
+@pytest.mark.parametrize("buffer_type", [bytes, bytearray, memoryview])
+def test_unpack_accepts_buffer_types(buffer_type):
+    message = Task(task_id=ID_ZERO, task_buffer="foo")
+    buf = buffer_type(pack(message))
+    packer = MessagePacker()
+    assert packer.detect_protocol_version(buf) == 1
+    assert unpack(buf) == message
+    assert packer.unpack_batch([buf]) == ([message], [None])
+
+
+def test_unpack_from_view_into_larger_buffer():
+    message = Task(task_id=ID_ZERO, task_buffer="foo")
+    on_wire = pack(message)
+    received = bytearray(b"header" + on_wire + b"trailer")
+    view = memoryview(received)[len(b"header") : -len(b"trailer")]
+    assert unpack(view) == message
+    assert list(MessagePacker().iter_unpack(view)) == [message]
+
+
+@skip_without_orjson
+@pytest.mark.parametrize("mode", ["default", "trusted"])
+@pytest.mark.parametrize(
+    "message_class, field", [(Task, "task_buffer"), (Result, "data")]
+)
+def test_unpack_large_message_does_not_copy_body(mode, message_class, field):
+    size = 10_000_000
+    message = message_class(task_id=ID_ZERO, **{field: "x\n" * (size // 2)})
+    on_wire = pack(message)
+    packer = MessagePacker(unpack_mode=mode)
+
+    for unpack_fn in (packer.unpack, lambda buf: packer.unpack_lazy(buf).load()):
+        tracemalloc.start()
+        try:
+            unpacked = unpack_fn(memoryview(on_wire))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert unpacked == message
+        # the only large allocation is the unpacked payload itself
+        assert peak < 1.5 * size
+
+
+@pytest.mark.parametrize(
+    "has_orjson", [pytest.param(True, marks=skip_without_orjson), False]
+)
+def test_unpack_large_message_values_are_exact(monkeypatch, has_orjson):
+    monkeypatch.setattr(proto1, "has_orjson", has_orjson)
+    message = Result(
+        task_id=ID_ZERO,
+        data="x" * 100_000,
+        details={"big": 2**70, "float": 0.5, "nested": [{"big": -(2**64)}]},
+    )
+    unpacked = unpack(pack(message))
+    assert unpacked.details == message.details
+    assert type(unpacked.details["big"]) is int
+
+    # a body which orjson cannot parse is parsed as usual
+    buf = crudely_pack_data(
+        {
+            "message_type": "task",
+            "data": {"task_id": str(ID_ZERO), "task_buffer": "\ud800" + "x" * 100_000},
+        }
+    )
+    assert unpack(buf).task_buffer == "\ud800" + "x" * 100_000
+
+
+SOME_ID = uuid.UUID("058cf505-a09e-4af3-a5f2-eb2e931af141")
+
+
+@pytest.mark.parametrize(
+    "message, expect_header",
+    [
+        (
+            Task(task_id=SOME_ID, task_buffer='{"task_id": "' + str(ID_ZERO) + '"}'),
+            MessageHeader(1, "task", SOME_ID),
+        ),
+        (TaskCancel(task_id=SOME_ID), MessageHeader(1, "task_cancel", SOME_ID)),
+        (Result(task_id=SOME_ID, data="x" * 1000), MessageHeader(1, "result", SOME_ID)),
+        (
+            ManagerStatusReport(task_statuses={}),
+            MessageHeader(1, "manager_status_report", None),
+        ),
+    ],
+    ids=lambda m: type(m).__name__,
+)
+def test_peek(message, expect_header):
+    header = MessagePacker().peek(pack(message))
+    assert header == expect_header
+    protocol_version, message_type, task_id = header
+    assert task_id == getattr(message, "task_id", None)
+
+
+def test_peek_does_not_decode_other_fields(monkeypatch):
+    buf = crudely_pack_data(
+        {
+            "data": {"task_buffer": "x" * 1000, "task_id": str(SOME_ID)},
+            "message_type": "task",
+        }
+    )
+    decoded = []
+    real_loads = proto1._loads
+    monkeypatch.setattr(
+        proto1, "_loads", lambda body: decoded.append(bytes(body)) or real_loads(body)
+    )
+    assert MessagePacker().peek(buf) == MessageHeader(1, "task", SOME_ID)
+    assert all(len(body) < 100 for body in decoded)
+
+
+def test_peek_does_not_validate():
+    # peeking stops before the malformed task_buffer
+    buf = crudely_pack_data({"message_type": "task", "data": {"task_id": str(SOME_ID)}})
+    buf = buf[:-2] + b',"task_buffer":tru}}'
+    packer = MessagePacker()
+    assert packer.peek(buf) == MessageHeader(1, "task", SOME_ID)
+    with pytest.raises(ValueError):
+        packer.unpack(buf)
+
+
+@pytest.mark.parametrize(
+    "buf, expect_err",
+    [
+        (b"\x01not json", InvalidMessageError),
+        (crudely_pack_data({"message_type": "foo", "data": {}}), InvalidMessageError),
+        (crudely_pack_data({"message_type": 1, "data": {}}), InvalidMessageError),
+        (crudely_pack_data({"data": {}}), InvalidMessageError),
+        (crudely_pack_data({"message_type": "task"}), InvalidMessageError),
+        (crudely_pack_data({"message_type": "task", "data": []}), InvalidMessageError),
+        (crudely_pack_data({"message_type": "task", "data": {}}), InvalidMessageError),
+        (
+            crudely_pack_data({"message_type": "task", "data": {"task_id": "foo"}}),
+            InvalidMessageError,
+        ),
+        (
+            crudely_pack_data({"message_type": "task", "data": {"task_id": 1}}),
+            InvalidMessageError,
+        ),
+        (b"\x7f{}", UnrecognizedProtocolVersion),
+    ],
+)
+def test_peek_invalid(buf, expect_err):
+    with pytest.raises(expect_err):
+        MessagePacker().peek(buf)
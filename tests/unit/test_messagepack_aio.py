@@ -0,0 +1,96 @@
+import asyncio
+import concurrent.futures
+import uuid
+
+import pytest
+
+from globus_compute_common.messagepack import (
+    AsyncMessagePacker,
+    InvalidMessageError,
+    MessagePacker,
+)
+from globus_compute_common.messagepack.message_types import Result, Task, TaskCancel
+
+SMALL = Task(task_id=uuid.UUID(int=1), task_buffer="small")
+LARGE = Result(task_id=uuid.UUID(int=2), data="x" * 200_000)
+MESSAGES = [SMALL, LARGE, TaskCancel(task_id=uuid.UUID(int=3)), SMALL]
+
+
+class CountingExecutor(concurrent.futures.ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+@pytest.fixture
+def executor():
+    with CountingExecutor() as executor:
+        yield executor
+
+
+def test_small_messages_are_unpacked_inline(executor):
+    packer = AsyncMessagePacker(executor=executor)
+    assert asyncio.run(packer.unpack_async(MessagePacker().pack(SMALL))) == SMALL
+    assert executor.submitted == 0
+
+
+def test_large_messages_are_offloaded(executor):
+    packer = AsyncMessagePacker(executor=executor)
+    buf = MessagePacker().pack(LARGE)
+    assert asyncio.run(packer.unpack_async(buf)) == LARGE
+    assert asyncio.run(packer.unpack_async(memoryview(buf))) == LARGE
+    assert executor.submitted == 2
+
+    inline = AsyncMessagePacker(offload_threshold=None, executor=executor)
+    assert asyncio.run(inline.unpack_async(buf)) == LARGE
+    assert executor.submitted == 2
+
+
+def test_offloaded_errors_are_raised(executor):
+    packer = AsyncMessagePacker(executor=executor, offload_threshold=1)
+    with pytest.raises(ValueError):
+        asyncio.run(packer.unpack_async(b"\x01not json"))
+    with pytest.raises(InvalidMessageError):
+        asyncio.run(packer.unpack_async(b"\x7f{}"))
+
+
+def test_unpack_in_a_process_pool():
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+        packer = AsyncMessagePacker(executor=executor)
+        buf = memoryview(MessagePacker().pack(LARGE))
+        assert asyncio.run(packer.unpack_async(buf)) == LARGE
+
+
+@pytest.mark.parametrize("chunk_size", [7, 65536, 1_000_000])
+def test_iter_unpack_async_from_a_stream_reader(executor, chunk_size):
+    payload = MessagePacker().pack_many(MESSAGES)
+
+    async def main():
+        reader = asyncio.StreamReader()
+        reader.feed_data(payload)
+        reader.feed_eof()
+        packer = AsyncMessagePacker(executor=executor)
+        return [
+            m async for m in packer.iter_unpack_async(reader, chunk_size=chunk_size)
+        ]
+
+    assert asyncio.run(main()) == MESSAGES
+    assert executor.submitted == 1
+
+
+def test_iter_unpack_async_from_an_async_iterable():
+    payload = MessagePacker().pack_many(MESSAGES) + b"\n\n"
+
+    async def chunks():
+        for start in range(0, len(payload), 1000):
+            yield payload[start : start + 1000]
+
+    async def main():
+        packer = AsyncMessagePacker()
+        return [m async for m in packer.iter_unpack_async(chunks())]
+
+    assert asyncio.run(main()) == MESSAGES
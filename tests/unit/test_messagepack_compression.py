@@ -0,0 +1,143 @@
+import uuid
+import zlib
+
+import pytest
+
+from globus_compute_common.messagepack import (
+    InvalidMessageError,
+    MessageHeader,
+    MessagePacker,
+    UnrecognizedProtocolVersion,
+    pack,
+)
+from globus_compute_common.messagepack.compression import (
+    COMPRESSED_FLAG,
+    compress,
+    decompress,
+    is_compressed,
+)
+from globus_compute_common.messagepack.message_types import (
+    ManagerStatusReport,
+    Result,
+    Task,
+)
+
+try:
+    import msgpack  # noqa: F401
+
+    has_msgpack = True
+except ImportError:
+    has_msgpack = False
+
+ID_ZERO = uuid.UUID(int=0)
+BIG_TASK = Task(task_id=ID_ZERO, task_buffer="some serialized function " * 1000)
+SMALL_TASK = Task(task_id=ID_ZERO, task_buffer="foo")
+
+
+@pytest.fixture
+def packer():
+    return MessagePacker()
+
+
+@pytest.mark.parametrize(
+    "protocol_version",
+    [1, pytest.param(2, marks=pytest.mark.skipif(not has_msgpack, reason="msgpack"))],
+)
+def test_compressed_round_trip(packer, protocol_version):
+    on_wire = packer.pack(BIG_TASK, protocol_version=protocol_version, compress=True)
+    assert on_wire[0] == protocol_version | COMPRESSED_FLAG
+    assert is_compressed(on_wire)
+    assert len(on_wire) < len(packer.pack(BIG_TASK, protocol_version=protocol_version))
+
+    assert packer.detect_protocol_version(on_wire) == protocol_version
+    assert packer.unpack(on_wire) == BIG_TASK
+    assert packer.unpack(memoryview(on_wire)) == BIG_TASK
+    assert packer.unpack_lazy(on_wire).load() == BIG_TASK
+    assert packer.peek(on_wire) == MessageHeader(protocol_version, "task", ID_ZERO)
+
+
+def test_decompress_restores_packed_message():
+    on_wire = pack(BIG_TASK)
+    assert decompress(compress(on_wire)) == on_wire
+
+
+def test_compression_is_off_by_default(packer):
+    assert not is_compressed(packer.pack(BIG_TASK))
+    assert not is_compressed(packer.pack(BIG_TASK, compress=False))
+
+
+def test_compress_threshold():
+    packer = MessagePacker(compress_threshold=1000)
+    assert is_compressed(packer.pack(BIG_TASK))
+    assert not is_compressed(packer.pack(SMALL_TASK))
+    assert not is_compressed(packer.pack(BIG_TASK, compress=False))
+    assert is_compressed(packer.pack(SMALL_TASK, compress=True))
+
+
+def test_compress_threshold_skips_incompressible_messages():
+    packer = MessagePacker(compress_threshold=10)
+    # a short message grows when compressed
+    message = ManagerStatusReport(task_statuses={})
+    assert len(compress(pack(message))) > len(pack(message))
+    assert not is_compressed(packer.pack(message))
+
+
+def test_unpack_batch_with_compressed_messages(packer):
+    bufs = [
+        packer.pack(BIG_TASK, compress=True),
+        packer.pack(SMALL_TASK),
+        packer.pack(SMALL_TASK, compress=True)[:-3],
+        b"\xff" + packer.pack(SMALL_TASK)[1:],
+    ]
+    messages, errors = packer.unpack_batch(bufs)
+    assert messages == [BIG_TASK, SMALL_TASK, None, None]
+    assert errors[:2] == [None, None]
+    assert isinstance(errors[2], InvalidMessageError)
+    assert isinstance(errors[3], UnrecognizedProtocolVersion)
+
+
+def test_repack_lazy_compressed_message(packer):
+    on_wire = packer.pack(BIG_TASK, compress=True)
+    lazy = packer.unpack_lazy(on_wire)
+    assert packer.pack(lazy) == pack(BIG_TASK)
+    assert packer.pack(lazy, compress=True) == on_wire
+    assert not lazy.is_loaded
+
+
+@pytest.mark.parametrize(
+    "buf, match",
+    [
+        (b"\x81", "missing its codec"),
+        (b"\x81\x07" + zlib.compress(b"{}"), "unrecognized compression codec"),
+        (b"\x81\x01not zlib", "could not decompress"),
+        (b"\x81\x01" + zlib.compress(b"{}" * 100)[:-5], "truncated"),
+        (b"\x81\x01" + zlib.compress(b"{}") + b"extra", "trailing data"),
+    ],
+)
+def test_invalid_compressed_messages(packer, buf, match):
+    with pytest.raises(InvalidMessageError, match=match):
+        packer.unpack(buf)
+
+
+def test_max_decompressed_size():
+    on_wire = pack(BIG_TASK, compress=True)
+    size = len(pack(BIG_TASK)) - 1
+
+    packer = MessagePacker(max_decompressed_size=size)
+    assert packer.unpack(on_wire) == BIG_TASK
+
+    packer = MessagePacker(max_decompressed_size=size - 1)
+    with pytest.raises(InvalidMessageError, match="maximum size"):
+        packer.unpack(on_wire)
+
+
+def test_compress_rejects_unknown_codec():
+    with pytest.raises(ValueError, match="codec"):
+        compress(pack(SMALL_TASK), codec=7)
+
+
+def test_result_data_compresses_well(packer):
+    message = Result(
+        task_id=ID_ZERO, data="gASVNAAAAAAAAACMCGJ1aWx0aW5zlIwFcHJpbnSUk5Qu" * 500
+    )
+    assert len(packer.pack(message, compress=True)) < len(packer.pack(message)) / 10
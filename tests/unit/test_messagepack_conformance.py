@@ -0,0 +1,113 @@
+import base64
+import json
+import pathlib
+
+import pytest
+
+from globus_compute_common.messagepack import MessagePacker
+from globus_compute_common.messagepack.conformance import (
+    build_corpus,
+    envelope_json_schema,
+    generate,
+    sample_messages,
+)
+from globus_compute_common.messagepack.message_types import (
+    ALL_MESSAGE_CLASSES,
+    MESSAGE_TYPES,
+)
+
+try:
+    import msgpack  # noqa: F401
+
+    has_msgpack = True
+except ImportError:
+    has_msgpack = False
+
+skip_without_msgpack = pytest.mark.skipif(
+    not has_msgpack, reason="test requires msgpack lib"
+)
+
+CONFORMANCE_DIR = pathlib.Path(__file__).parents[2] / "conformance"
+
+
+def _refs(schema):
+    if isinstance(schema, dict):
+        for key, value in schema.items():
+            if key == "$ref":
+                yield value
+            else:
+                yield from _refs(value)
+    elif isinstance(schema, list):
+        for value in schema:
+            yield from _refs(value)
+
+
+def test_samples_cover_all_message_classes():
+    assert {type(m) for m in sample_messages().values()} == ALL_MESSAGE_CLASSES
+
+
+@pytest.mark.parametrize("message_type", sorted(MESSAGE_TYPES))
+def test_envelope_json_schema(message_type):
+    schema = envelope_json_schema(message_type)
+    assert schema["properties"]["message_type"] == {"const": message_type}
+    assert schema["required"] == ["message_type", "data"]
+    # every reference resolves to a top-level definition
+    for ref in _refs(schema):
+        assert ref.startswith("#/$defs/")
+        assert ref[len("#/$defs/") :] in schema["$defs"]
+
+
+def test_envelope_json_schema_uses_wire_field_names():
+    schema = envelope_json_schema("ep_status_report")
+    properties = schema["$defs"]["EPStatusReport"]["properties"]
+    assert "global_state" in properties
+    assert "ep_status_report" not in properties
+
+
+def test_envelope_json_schema_unknown_message_type():
+    with pytest.raises(KeyError):
+        envelope_json_schema("foo")
+
+
+@pytest.mark.parametrize(
+    "entry", build_corpus([1, 2] if has_msgpack else [1]), ids=lambda e: e["name"]
+)
+def test_corpus_entries_round_trip(entry):
+    packer = MessagePacker()
+    packed = base64.b64decode(entry["packed"])
+    message = packer.unpack(packed)
+    assert message == sample_messages()[entry["name"]]
+    assert message.message_type == entry["message_type"]
+    assert packed[0] == entry["protocol_version"]
+    assert packer.pack(message, protocol_version=entry["protocol_version"]) == packed
+    if entry["protocol_version"] == 1:
+        envelope = json.loads(packed[1:])
+        assert envelope == {
+            "message_type": entry["message_type"],
+            "data": entry["data"],
+        }
+
+
+@skip_without_msgpack
+def test_generate_is_incremental(tmp_path):
+    written = generate(tmp_path)
+    assert len(written) == len(MESSAGE_TYPES) + 1
+    assert generate(tmp_path) == []
+
+    corpus = tmp_path / "corpus.json"
+    corpus.write_text("[]")
+    stale_schema = tmp_path / "schemas" / "foo.json"
+    stale_schema.write_text("{}")
+    assert generate(tmp_path, check=True) == [str(corpus), str(stale_schema)]
+    assert corpus.read_text() == "[]"
+
+    assert generate(tmp_path) == [str(corpus), str(stale_schema)]
+    assert not stale_schema.exists()
+    assert generate(tmp_path, check=True) == []
+
+
+@skip_without_msgpack
+def test_committed_conformance_files_are_up_to_date():
+    assert generate(CONFORMANCE_DIR, check=True) == [], (
+        "regenerate with `make conformance`"
+    )
@@ -0,0 +1,185 @@
+import copy
+import json
+import pickle
+import uuid
+
+import pydantic
+import pytest
+
+from globus_compute_common.messagepack import ContainerCache, MessagePacker
+from globus_compute_common.messagepack.message_types import (
+    Container,
+    ContainerImage,
+    Result,
+    Task,
+)
+
+try:
+    import msgpack  # noqa: F401
+
+    has_msgpack = True
+except ImportError:
+    has_msgpack = False
+
+PROTOCOL_VERSIONS = [
+    1,
+    pytest.param(2, marks=pytest.mark.skipif(not has_msgpack, reason="msgpack")),
+]
+
+
+def _container(name="Some Container", n_images=2):
+    images = [
+        ContainerImage(
+            image_type="docker",
+            location=f"python:3.{i}",
+            created_at=1,
+            modified_at=2,
+            build_status="ready",
+            build_stderr=None,
+        )
+        for i in range(n_images)
+    ]
+    return Container(container_id=uuid.UUID(int=1), name=name, images=images)
+
+
+def _task(container):
+    return Task(task_id=uuid.uuid4(), container=container, task_buffer="foo")
+
+
+def test_maxsize_must_be_positive():
+    with pytest.raises(ValueError):
+        ContainerCache(maxsize=0)
+
+
+@pytest.mark.parametrize("protocol_version", PROTOCOL_VERSIONS)
+def test_tasks_with_identical_containers_share_an_instance(protocol_version):
+    cache = ContainerCache()
+    packer = MessagePacker(default_protocol_version=protocol_version)
+    bufs = [packer.pack(_task(_container())) for _ in range(3)]
+
+    cached = MessagePacker(container_cache=cache)
+    tasks = [cached.unpack(buf) for buf in bufs]
+    assert tasks[0].container is tasks[1].container is tasks[2].container
+    assert (cache.misses, cache.hits, len(cache)) == (1, 2, 1)
+
+    # the tasks are the same as those unpacked without the cache
+    assert tasks == [packer.unpack(buf) for buf in bufs]
+
+
+@pytest.mark.parametrize("protocol_version", PROTOCOL_VERSIONS)
+def test_different_containers_are_not_shared(protocol_version):
+    packer = MessagePacker(
+        default_protocol_version=protocol_version, container_cache=ContainerCache()
+    )
+    first = packer.unpack(packer.pack(_task(_container())))
+    renamed = packer.unpack(packer.pack(_task(_container(name="Other"))))
+    fewer_images = packer.unpack(packer.pack(_task(_container(n_images=1))))
+
+    assert first.container.name == "Some Container"
+    assert renamed.container.name == "Other"
+    assert len(fewer_images.container.images) == 1
+
+
+def test_lazy_and_batch_unpacking_share_containers():
+    packer = MessagePacker(container_cache=ContainerCache())
+    bufs = [packer.pack(_task(_container())) for _ in range(2)]
+
+    lazy = packer.unpack_lazy(bufs[0])
+    messages, errors = packer.unpack_batch(bufs)
+    assert errors == [None, None]
+    assert lazy.container is messages[0].container is messages[1].container
+    assert lazy.load().container is lazy.container
+
+
+def test_trusted_mode_shares_containers():
+    packer = MessagePacker(unpack_mode="trusted", container_cache=ContainerCache())
+    bufs = [packer.pack(_task(_container())) for _ in range(2)]
+    first, second = (packer.unpack(buf) for buf in bufs)
+    assert first.container is second.container
+
+
+def test_least_recently_used_container_is_evicted():
+    cache = ContainerCache(maxsize=2)
+    packer = MessagePacker(container_cache=cache)
+    a, b, c = (packer.pack(_task(_container(name=name))) for name in "abc")
+
+    container_a = packer.unpack(a).container
+    packer.unpack(b)
+    assert packer.unpack(a).container is container_a
+    # b is the least recently used, so it is evicted
+    packer.unpack(c)
+    assert len(cache) == 2
+    assert packer.unpack(a).container is container_a
+    assert (cache.hits, cache.misses) == (2, 3)
+    packer.unpack(b)
+    assert cache.misses == 4
+
+    cache.clear()
+    assert (len(cache), cache.hits, cache.misses) == (0, 0, 0)
+    assert packer.unpack(a).container is not container_a
+
+
+def test_tasks_without_containers_and_other_messages():
+    cache = ContainerCache()
+    packer = MessagePacker(container_cache=cache)
+    task = Task(task_id=uuid.uuid4(), task_buffer="foo")
+    result = Result(task_id=uuid.uuid4(), data="foo")
+    assert packer.unpack(packer.pack(task)) == task
+    assert packer.unpack(packer.pack(result)) == result
+    assert (len(cache), cache.hits, cache.misses) == (0, 0, 0)
+
+
+def test_invalid_container_raises_the_same_error():
+    data = {
+        "task_id": str(uuid.uuid4()),
+        "task_buffer": "foo",
+        "container": {"container_id": "not a uuid", "name": "c", "images": []},
+    }
+    buf = b"\x01" + json.dumps({"message_type": "task", "data": data}).encode()
+
+    cache = ContainerCache()
+    with pytest.raises(pydantic.ValidationError) as cached_error:
+        MessagePacker(container_cache=cache).unpack(buf)
+    with pytest.raises(pydantic.ValidationError) as plain_error:
+        MessagePacker().unpack(buf)
+    assert str(cached_error.value) == str(plain_error.value)
+    # an invalid container is never cached
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize("protocol_version", PROTOCOL_VERSIONS)
+def test_cached_containers_are_immutable(protocol_version):
+    packer = MessagePacker(
+        default_protocol_version=protocol_version, container_cache=ContainerCache()
+    )
+    buf = packer.pack(_task(_container()))
+    first, second = packer.unpack(buf), packer.unpack(buf)
+    container = first.container
+
+    with pytest.raises(pydantic.ValidationError):
+        container.name = "Other"
+    with pytest.raises(pydantic.ValidationError):
+        container.images[0].location = "elsewhere"
+    with pytest.raises(TypeError):
+        container.images.append(container.images[0])
+    with pytest.raises(TypeError):
+        del container.images[0]
+    assert second.container == _container()
+
+    # a shared container compares equal to, and packs the same as, a plain one
+    assert isinstance(container, Container)
+    assert container == _container() and _container() == container
+    assert container != _container(name="Other")
+    assert container.model_dump() == _container().model_dump()
+    assert packer.pack(first) == buf
+
+    # the container of one task is changed by replacing it
+    first.container = _container(name="Other")
+    assert packer.unpack(buf).container.name == "Some Container"
+
+
+def test_tasks_with_cached_containers_can_be_copied():
+    packer = MessagePacker(container_cache=ContainerCache())
+    task = packer.unpack(packer.pack(_task(_container())))
+    assert copy.deepcopy(task) == task
+    assert pickle.loads(pickle.dumps(task)) == task
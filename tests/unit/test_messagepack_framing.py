@@ -0,0 +1,155 @@
+import io
+import uuid
+
+import pytest
+
+from globus_compute_common.messagepack import (
+    FrameDecoder,
+    InvalidMessageError,
+    MessagePacker,
+    MessageStreamDecoder,
+    pack,
+)
+from globus_compute_common.messagepack.message_types import Result, Task, TaskCancel
+
+MESSAGES = [
+    Task(task_id=uuid.UUID(int=i), task_buffer=f"buffer\n{i}") for i in range(5)
+] + [
+    TaskCancel(task_id=uuid.UUID(int=10)),
+    Result(task_id=uuid.UUID(int=11), data="result\ndata"),
+]
+
+
+@pytest.fixture
+def packer():
+    return MessagePacker()
+
+
+def test_pack_many_is_newline_delimited(packer):
+    payload = packer.pack_many(MESSAGES)
+    assert payload.split(b"\n") == [pack(m) for m in MESSAGES]
+
+
+def test_pack_many_accepts_generators(packer):
+    payload = packer.pack_many(m for m in MESSAGES)
+    assert list(packer.iter_unpack(payload)) == MESSAGES
+
+
+def test_pack_many_rejects_binary_protocol(packer):
+    with pytest.raises(ValueError, match="newline-delimited"):
+        packer.pack_many(MESSAGES, protocol_version=2)
+
+
+@pytest.mark.parametrize(
+    "payload_transform",
+    [
+        lambda p: p,
+        lambda p: p + b"\n",
+        lambda p: b"\n" + p.replace(b"\n", b"\n\n") + b"\n\n",
+        bytearray,
+    ],
+)
+def test_iter_unpack_bytes(packer, payload_transform):
+    payload = payload_transform(packer.pack_many(MESSAGES))
+    assert list(packer.iter_unpack(payload)) == MESSAGES
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 100, 65536])
+@pytest.mark.parametrize("trailing_newline", [True, False])
+def test_iter_unpack_stream(packer, chunk_size, trailing_newline):
+    payload = packer.pack_many(MESSAGES)
+    if trailing_newline:
+        payload += b"\n"
+    stream = io.BytesIO(payload)
+    assert list(packer.iter_unpack(stream, chunk_size=chunk_size)) == MESSAGES
+
+
+def test_iter_unpack_empty(packer):
+    assert list(packer.iter_unpack(b"")) == []
+    assert list(packer.iter_unpack(io.BytesIO(b"\n\n"))) == []
+
+
+def test_stream_decoder_yields_messages_as_completed(packer):
+    decoder = packer.stream_decoder()
+    assert isinstance(decoder, MessageStreamDecoder)
+    first, second = pack(MESSAGES[0]), pack(MESSAGES[1])
+
+    assert list(decoder.feed(first[:10])) == []
+    assert decoder.pending == 10
+    assert list(decoder.feed(first[10:])) == []
+    assert list(decoder.feed(b"\n" + second[:5])) == [MESSAGES[0]]
+    assert decoder.pending == 5
+    assert list(decoder.feed(second[5:] + b"\n")) == [MESSAGES[1]]
+    assert decoder.pending == 0
+    assert list(decoder.finish()) == []
+
+
+def test_stream_decoder_consumes_chunks_eagerly(packer):
+    decoder = MessageStreamDecoder(packer)
+    first_chunk = packer.pack_many(MESSAGES[:2]) + b"\n"
+    second_chunk = packer.pack_many(MESSAGES[2:]) + b"\n"
+
+    first = decoder.feed(first_chunk)
+    second = decoder.feed(second_chunk)
+    assert decoder.pending == 0
+    # iterators consumed out of order still get their own messages
+    assert list(second) == MESSAGES[2:]
+    assert list(first) == MESSAGES[:2]
+
+
+def test_stream_decoder_finish_resets(packer):
+    decoder = MessageStreamDecoder(packer)
+    assert list(decoder.feed(pack(MESSAGES[0]))) == []
+    assert list(decoder.finish()) == [MESSAGES[0]]
+    assert decoder.pending == 0
+    assert list(decoder.feed(pack(MESSAGES[1]) + b"\n")) == [MESSAGES[1]]
+
+
+def test_stream_decoder_resumes_after_an_invalid_message(packer):
+    decoder = MessageStreamDecoder(packer)
+    chunk = b"\n".join([pack(MESSAGES[0]), b"\x01{}", b"\x09", pack(MESSAGES[1])])
+
+    messages = decoder.feed(chunk + b"\n")
+    assert next(messages) == MESSAGES[0]
+    with pytest.raises(ValueError):
+        next(messages)
+    with pytest.raises(InvalidMessageError, match="unknown protocol version"):
+        next(messages)
+    # the messages which followed the invalid ones are not lost
+    assert list(messages) == [MESSAGES[1]]
+
+    messages = decoder.feed(b"\x01{}")
+    assert list(messages) == []
+    messages = decoder.finish()
+    with pytest.raises(ValueError):
+        next(messages)
+    assert list(messages) == []
+
+
+def test_frame_decoder_detaches_frames_without_copying_them(packer):
+    decoder = FrameDecoder()
+    first, second = pack(MESSAGES[0]), pack(MESSAGES[1])
+
+    # a chunk which ends with a newline detaches the whole buffer
+    buffer = decoder._buffer
+    frames = list(decoder.feed(first + b"\n"))
+    assert frames[0].obj is buffer
+    assert decoder._buffer is not buffer
+
+    # otherwise, only the complete frames are detached
+    frames = list(decoder.feed(first + b"\n" + second[:5]))
+    assert [bytes(frame) for frame in frames] == [first]
+    assert frames[0].obj is not decoder._buffer
+    assert decoder._buffer == second[:5]
+
+
+def test_frame_decoder_yields_frames(packer):
+    decoder = FrameDecoder()
+    first, second = pack(MESSAGES[0]), pack(MESSAGES[1])
+
+    assert list(decoder.feed(first[:10])) == []
+    frames = list(decoder.feed(first[10:] + b"\n\n" + second))
+    assert [bytes(frame) for frame in frames] == [first]
+    assert decoder.pending == len(second)
+    assert [bytes(frame) for frame in decoder.finish()] == [second]
+    assert decoder.pending == 0
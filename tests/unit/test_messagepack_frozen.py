@@ -0,0 +1,151 @@
+import dataclasses
+import json
+import uuid
+
+import pydantic
+import pytest
+
+from globus_compute_common.messagepack import (
+    DEFAULT_UNKNOWN_FIELD_REPORTER,
+    InvalidMessageError,
+    MessagePacker,
+)
+from globus_compute_common.messagepack.conformance import sample_messages
+from globus_compute_common.messagepack.message_types import (
+    ALL_MESSAGE_CLASSES,
+    FROZEN_CLASSES,
+    FrozenContainer,
+    FrozenResult,
+    FrozenTask,
+    FrozenTaskTransition,
+    Task,
+    TaskStatusColumns,
+    freeze,
+    register_message_type,
+    unregister_message_type,
+)
+from globus_compute_common.messagepack.message_types.base import Message, meta
+from globus_compute_common.messagepack.protocol import MessagePackProtocol
+
+try:
+    import msgpack  # noqa: F401
+
+    has_msgpack = True
+except ImportError:
+    has_msgpack = False
+
+PROTOCOL_VERSIONS = [
+    1,
+    pytest.param(2, marks=pytest.mark.skipif(not has_msgpack, reason="msgpack")),
+]
+SAMPLES = sample_messages()
+
+
+def test_every_message_class_has_a_frozen_variant():
+    assert FROZEN_CLASSES.keys() == ALL_MESSAGE_CLASSES
+    for message_class, frozen_class in FROZEN_CLASSES.items():
+        assert frozen_class.message_class is message_class
+        # the same fields, in the same order, so that both are packed alike
+        names = [field.name for field in dataclasses.fields(frozen_class)]
+        assert names == list(message_class.model_fields)
+
+
+@pytest.mark.parametrize("protocol_version", PROTOCOL_VERSIONS)
+@pytest.mark.parametrize("name", SAMPLES)
+def test_frozen_messages_are_interchangeable(protocol_version, name):
+    message = SAMPLES[name]
+    packer = MessagePacker(default_protocol_version=protocol_version)
+    on_wire = packer.pack(message)
+
+    frozen = packer.unpack_frozen(on_wire)
+    assert type(frozen) is FROZEN_CLASSES[type(message)]
+    assert frozen == freeze(message)
+    assert frozen.message_type == message.message_type
+    assert frozen.to_message() == message
+    assert packer.pack(frozen) == on_wire
+    if protocol_version == 1:
+        assert packer.pack_many([frozen, message]) == packer.pack_many([message] * 2)
+
+
+@pytest.mark.parametrize("protocol_version", PROTOCOL_VERSIONS)
+def test_default_protocol_implementation(protocol_version):
+    impl = MessagePacker.IMPLEMENTATIONS[protocol_version]
+    message = SAMPLES["result"]
+    on_wire = impl.pack(message)
+    frozen = MessagePackProtocol.unpack_frozen(impl, on_wire)
+    assert frozen == impl.unpack_frozen(on_wire)
+    assert MessagePackProtocol.pack_frozen(impl, frozen) == on_wire
+
+
+def test_frozen_messages_are_immutable_and_slotted():
+    frozen = freeze(SAMPLES["task"])
+    assert isinstance(frozen, FrozenTask)
+    assert not hasattr(frozen, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        frozen.task_buffer = "bar"
+
+    assert isinstance(frozen.container, FrozenContainer)
+    assert isinstance(frozen.container.images, tuple)
+
+    result = freeze(SAMPLES["result"])
+    assert isinstance(result, FrozenResult)
+    assert all(isinstance(s, FrozenTaskTransition) for s in result.task_statuses)
+    assert not result.is_error
+    assert freeze(SAMPLES["result_error"]).is_error
+
+
+def test_status_report_forms_are_kept():
+    report = freeze(SAMPLES["ep_status_report"])
+    for transitions in report.task_statuses.values():
+        assert all(isinstance(s, FrozenTaskTransition) for s in transitions)
+    columns = freeze(SAMPLES["ep_status_report_columns"])
+    assert isinstance(columns.task_statuses, TaskStatusColumns)
+    assert columns.global_state == {}
+
+    # the task statuses of a columnar report are frozen as columns, however given
+    data = {
+        "endpoint_id": columns.endpoint_id,
+        "global_state": {},
+        "task_statuses": SAMPLES["ep_status_report_columns"].task_statuses,
+    }
+    validated = pydantic.TypeAdapter(type(columns)).validate_python(data)
+    assert isinstance(validated.task_statuses, TaskStatusColumns)
+    assert validated == columns
+
+
+def test_unpack_frozen_checks_unknown_fields():
+    data = {"task_id": str(uuid.uuid4()), "task_buffer": "foo", "foo": 1}
+    buf = b"\x01" + json.dumps({"message_type": "task", "data": data}).encode()
+
+    assert MessagePacker().unpack_frozen(buf).task_buffer == "foo"
+    assert len(DEFAULT_UNKNOWN_FIELD_REPORTER.counts()) == 1
+    with pytest.raises(InvalidMessageError, match="unknown data fields"):
+        MessagePacker(unpack_mode="strict").unpack_frozen(buf)
+
+
+def test_unpack_frozen_invalid_and_compressed_messages():
+    packer = MessagePacker()
+    buf = b'\x01{"message_type":"task","data":{"task_id":"foo","task_buffer":""}}'
+    with pytest.raises(pydantic.ValidationError):
+        packer.unpack_frozen(buf)
+
+    task = Task(task_id=uuid.uuid4(), task_buffer="x" * 1000)
+    compressed = packer.pack(task, compress=True)
+    assert packer.unpack_frozen(compressed).to_message() == task
+    assert packer.pack(freeze(task), compress=True) == compressed
+
+
+def test_message_types_without_a_frozen_variant():
+    @register_message_type
+    @meta(message_type="frozen_heartbeat")
+    class Heartbeat(Message):
+        sequence: int
+
+    try:
+        packer = MessagePacker()
+        with pytest.raises(TypeError, match="do not have a frozen variant"):
+            freeze(Heartbeat(sequence=1))
+        with pytest.raises(TypeError, match="do not have a frozen variant"):
+            packer.unpack_frozen(packer.pack(Heartbeat(sequence=1)))
+    finally:
+        unregister_message_type("frozen_heartbeat")
@@ -0,0 +1,270 @@
+import json
+import logging
+import uuid
+
+import pydantic
+import pytest
+
+from globus_compute_common.messagepack import (
+    InvalidMessageError,
+    LazyMessage,
+    MessagePacker,
+    pack,
+    unpack,
+)
+from globus_compute_common.messagepack.message_types import (
+    Container,
+    Result,
+    ResultErrorDetails,
+    Task,
+    TaskCancel,
+    TaskTransition,
+)
+from globus_compute_common.messagepack.protocol_versions import proto1
+from globus_compute_common.messagepack.protocol_versions._json_scan import (
+    JSONScanError,
+    iter_object,
+)
+from globus_compute_common.tasks.constants import ActorName, TaskState
+
+try:
+    import msgpack  # noqa: F401
+
+    has_msgpack = True
+except ImportError:
+    has_msgpack = False
+
+ID_ZERO = uuid.UUID(int=0)
+SOME_ID = uuid.UUID("058cf505-a09e-4af3-a5f2-eb2e931af141")
+
+TASK = Task(
+    task_id=SOME_ID,
+    container=Container(container_id=ID_ZERO, name='a "task_buffer":', images=[]),
+    task_buffer='big "payload" with \\"escapes\\" and {braces} ☃ \\',
+)
+RESULT = Result(
+    task_id=SOME_ID,
+    data="x" * 1000,
+    details={"data": "not the payload", "nested": {"data": [1, 2]}},
+    error_details=ResultErrorDetails(code="c", user_message="m"),
+    task_statuses=[
+        TaskTransition(timestamp=1, state=TaskState.SUCCESS, actor=ActorName.WORKER)
+    ],
+)
+
+
+def crudely_pack_data(data):
+    return b"\x01" + json.dumps(data, separators=(",", ":")).encode()
+
+
+@pytest.fixture
+def packer():
+    return MessagePacker()
+
+
+@pytest.mark.parametrize("message", [TASK, RESULT], ids=lambda m: type(m).__name__)
+def test_unpack_lazy_defers_payload(packer, message):
+    lazy = packer.unpack_lazy(pack(message))
+    assert isinstance(lazy, LazyMessage)
+    assert lazy.message_class is type(message)
+    assert lazy.message_type == message.message_type
+    assert lazy.protocol_version == 1
+    assert not lazy.is_loaded
+
+    # routing fields are decoded and validated
+    assert lazy.task_id == SOME_ID
+    assert not lazy.is_loaded
+    # the payload is an undecoded slice of the buffer
+    payload_field = message.Meta.lazy_field
+    assert json.loads(bytes(lazy.raw_payload)) == getattr(message, payload_field)
+
+    # accessing the payload decodes it
+    assert getattr(lazy, payload_field) == getattr(message, payload_field)
+    assert lazy.is_loaded
+    assert lazy.raw_payload is None
+    assert lazy.load() == message
+
+
+def test_lazy_routing_fields(packer):
+    lazy = packer.unpack_lazy(pack(RESULT))
+    assert lazy.details == RESULT.details
+    assert lazy.error_details == RESULT.error_details
+    assert lazy.task_statuses == RESULT.task_statuses
+    assert lazy.is_error
+    assert not lazy.is_loaded
+
+
+@pytest.mark.parametrize("message", [TASK, RESULT], ids=lambda m: type(m).__name__)
+def test_lazy_model_methods_decode_the_payload(packer, message):
+    payload_field = message.Meta.lazy_field
+
+    lazy = packer.unpack_lazy(pack(message))
+    assert lazy.model_dump() == message.model_dump()
+    assert lazy.is_loaded
+
+    lazy = packer.unpack_lazy(pack(message))
+    assert lazy.model_dump_json() == message.model_dump_json()
+
+    lazy = packer.unpack_lazy(pack(message))
+    copied = lazy.model_copy()
+    assert getattr(copied, payload_field) == getattr(message, payload_field)
+    assert copied == message
+
+
+def test_repack_lazy_message_without_decoding(packer, monkeypatch):
+    on_wire = pack(TASK)
+    lazy = packer.unpack_lazy(memoryview(on_wire))
+
+    def _fail_loads(body):
+        raise AssertionError("the payload should not be decoded")
+
+    monkeypatch.setattr(proto1, "_loads", _fail_loads)
+    assert packer.pack(lazy) == on_wire
+    assert packer.pack_many([lazy, lazy]) == on_wire + b"\n" + on_wire
+    assert not lazy.is_loaded
+
+
+@pytest.mark.skipif(not has_msgpack, reason="test requires msgpack lib")
+def test_repack_lazy_message_to_other_version(packer):
+    lazy = packer.unpack_lazy(pack(TASK))
+    on_wire = packer.pack(lazy, protocol_version=2)
+    assert lazy.is_loaded
+    assert unpack(on_wire) == TASK
+
+    # v2 does not defer decoding, but produces a LazyMessage all the same
+    lazy2 = packer.unpack_lazy(on_wire)
+    assert lazy2.is_loaded
+    assert lazy2.protocol_version == 2
+    assert lazy2.task_buffer == TASK.task_buffer
+    assert packer.pack(lazy2, protocol_version=2) == on_wire
+
+
+def test_unpack_lazy_message_without_payload_field(packer):
+    message = TaskCancel(task_id=SOME_ID)
+    lazy = packer.unpack_lazy(pack(message))
+    assert lazy.is_loaded
+    assert lazy.raw_payload is None
+    assert lazy.task_id == SOME_ID
+    assert lazy.load() == message
+
+
+def test_unpack_lazy_irregular_json(packer):
+    # written by hand, so that the payload key really is duplicated; the last
+    # member wins, as it does for json.loads()
+    buf = (
+        b'\x01 {  "data" : {\n  "task_buffer": "foo \\"bar\\"",  "container" : null, '
+        b'"task_id":"058cf505-a09e-4af3-a5f2-eb2e931af141" , '
+        b'"task_buffer"  :  "the real buffer" } ,\t"message_type" : "task" } '
+    )
+    assert buf.count(b'"task_buffer"') == 2
+    lazy = packer.unpack_lazy(buf)
+    assert not lazy.is_loaded
+    assert lazy.load() == unpack(buf)
+    assert lazy.task_buffer == "the real buffer"
+
+
+@pytest.mark.parametrize(
+    "message_type, field", [("task", "task_buffer"), ("result", "data")]
+)
+def test_unpack_lazy_null_payload_with_reference(packer, message_type, field):
+    buf = crudely_pack_data(
+        {
+            "message_type": message_type,
+            "data": {
+                "task_id": str(SOME_ID),
+                field: None,
+                f"{field}_reference": {"storage_id": "s3", "key": "k", "size": 3},
+            },
+        }
+    )
+    lazy = packer.unpack_lazy(buf)
+    assert lazy.is_loaded
+    assert getattr(lazy, field) is None
+    assert getattr(lazy, f"{field}_reference").key == "k"
+    assert lazy.load() == unpack(buf)
+
+
+@pytest.mark.parametrize(
+    "payload, expect_error",
+    [
+        ({"message_type": "foo", "data": {}}, pydantic.ValidationError),
+        ({"message_type": "task"}, pydantic.ValidationError),
+        ({"message_type": "task", "data": None}, pydantic.ValidationError),
+        (
+            {"message_type": "task", "data": {"task_id": "foo", "task_buffer": "x"}},
+            pydantic.ValidationError,
+        ),
+        (
+            {"message_type": "task", "data": {"task_id": str(ID_ZERO)}},
+            pydantic.ValidationError,
+        ),
+    ],
+)
+def test_unpack_lazy_invalid(packer, payload, expect_error):
+    buf = crudely_pack_data(payload)
+    with pytest.raises(expect_error):
+        packer.unpack_lazy(buf)
+
+
+def test_unpack_lazy_invalid_payload(packer):
+    # a payload which is not a string is not deferred, so is rejected at once
+    buf = crudely_pack_data(
+        {"message_type": "task", "data": {"task_id": str(ID_ZERO), "task_buffer": 1}}
+    )
+    with pytest.raises(pydantic.ValidationError):
+        packer.unpack_lazy(buf)
+
+
+def test_unpack_lazy_malformed_payload(packer):
+    buf = b'\x01{"message_type":"task","data":{"task_buffer":"\\x","task_id":"%s"}}' % (
+        str(ID_ZERO).encode()
+    )
+    lazy = packer.unpack_lazy(buf)
+    assert not lazy.is_loaded
+    with pytest.raises(InvalidMessageError):
+        lazy.load()
+
+
+def test_unpack_lazy_warns_on_unknown_fields(packer, caplog):
+    buf = crudely_pack_data(
+        {
+            "message_type": "task",
+            "data": {"task_id": str(ID_ZERO), "task_buffer": "x", "foo_field": 1},
+            "bar_field": 2,
+        }
+    )
+    with caplog.at_level(logging.WARNING, logger="globus_compute_common"):
+        lazy = packer.unpack_lazy(buf)
+    assert "foo_field" in caplog.text
+    assert "bar_field" in caplog.text
+    assert "task_buffer" not in caplog.text
+    assert lazy.task_buffer == "x"
+
+
+@pytest.mark.parametrize(
+    "doc",
+    [
+        {},
+        {"a": 1},
+        {"a": -1.5e10, "b": True, "c": None, "d": False},
+        {"a": "x\\\\", "b": 'q"uote\\"d', "c": "☃"},
+        {"a": [1, [2, {"b": "]}"}]], "c": {"d": {"e": "{"}}},
+        {'a"b\\': 1},
+    ],
+)
+@pytest.mark.parametrize("indent", [None, 2])
+def test_json_scan_iter_object(doc, indent):
+    buf = json.dumps(doc, indent=indent, ensure_ascii=False).encode()
+    members = {
+        json.loads(bytes(key)): json.loads(buf[start:end])
+        for key, start, end in iter_object(buf)
+    }
+    assert members == doc
+
+
+@pytest.mark.parametrize(
+    "buf", [b"", b"[]", b"{", b'{"a"}', b'{"a":}', b'{"a":1 "b":2}', b'{"a":"b}']
+)
+def test_json_scan_malformed(buf):
+    with pytest.raises(JSONScanError):
+        list(iter_object(buf))
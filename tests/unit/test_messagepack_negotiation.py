@@ -0,0 +1,117 @@
+import uuid
+
+import pytest
+
+from globus_compute_common.messagepack import (
+    MessagePacker,
+    ProtocolNegotiator,
+    UnrecognizedProtocolVersion,
+    compression,
+)
+from globus_compute_common.messagepack.message_types import Task
+from globus_compute_common.messagepack.protocol_versions import proto2
+
+try:
+    import msgpack  # noqa: F401
+
+    has_msgpack = True
+except ImportError:
+    has_msgpack = False
+
+requires_msgpack = pytest.mark.skipif(not has_msgpack, reason="msgpack")
+TASK = Task(task_id=uuid.UUID(int=1), task_buffer="foo")
+
+
+@pytest.fixture
+def without_msgpack(monkeypatch):
+    monkeypatch.setattr(proto2, "has_msgpack", False)
+
+
+@requires_msgpack
+def test_only_v1_is_sent_by_default():
+    negotiator = ProtocolNegotiator()
+    assert negotiator.preference == (1,)
+    # every readable version is still advertised
+    assert negotiator.advertise() == "2,1"
+    assert negotiator.select("2,1") == 1
+    assert negotiator.select(None) == 1
+    with pytest.raises(UnrecognizedProtocolVersion):
+        negotiator.select("2")
+
+
+@requires_msgpack
+def test_most_preferred_common_version_is_chosen():
+    negotiator = ProtocolNegotiator(preference=(2, 1))
+    assert negotiator.select("2,1") == 2
+    assert negotiator.select("1") == 1
+    assert negotiator.select([1, 2, 3]) == 2
+    assert negotiator.select(None) == 1
+    assert ProtocolNegotiator(preference=[1, 2]).select("2,1") == 1
+
+
+def test_unavailable_versions_are_neither_advertised_nor_sent(without_msgpack):
+    negotiator = ProtocolNegotiator()
+    assert negotiator.advertise() == "1"
+    assert negotiator.select("2,1") == 1
+    with pytest.raises(ValueError, match="not available"):
+        ProtocolNegotiator(preference=[2, 1])
+
+
+@requires_msgpack
+def test_negotiated_versions_are_remembered_per_peer():
+    negotiator = ProtocolNegotiator(preference=(2, 1))
+    assert negotiator.negotiate("a", "2,1") == 2
+    assert negotiator.negotiate("b", None) == 1
+    assert negotiator.protocol_version("a") == 2
+    assert negotiator.protocol_version("b") == 1
+    assert negotiator.protocol_version("c") == 1
+
+    packer = MessagePacker()
+    assert negotiator.pack("a", TASK) == packer.pack(TASK, protocol_version=2)
+    assert negotiator.pack("b", TASK) == packer.pack(TASK, protocol_version=1)
+
+    negotiator.forget("a")
+    negotiator.forget("a")
+    assert negotiator.protocol_version("a") == 1
+
+
+def test_compression_is_negotiated():
+    packer = MessagePacker(compress_threshold=64)
+    big_task = Task(task_id=uuid.UUID(int=1), task_buffer="x" * 1000)
+    assert compression.is_compressed(packer.pack(big_task))
+
+    negotiator = ProtocolNegotiator(packer)
+    assert negotiator.advertise_codecs() == "1"
+    negotiator.negotiate("a", "1", "1")
+    negotiator.negotiate("b", "1")
+    negotiator.negotiate("c", "1", "")
+    negotiator.negotiate("d", "1", [2])
+
+    assert negotiator.can_compress("a")
+    on_wire = negotiator.pack("a", big_task)
+    assert compression.is_compressed(on_wire)
+    assert packer.unpack(on_wire) == big_task
+
+    # peers which did not advertise a known codec, or did not negotiate at all, are
+    # never sent compressed messages, even above the threshold or when requested
+    for peer in ("b", "c", "d", "e"):
+        assert not negotiator.can_compress(peer)
+        on_wire = negotiator.pack(peer, big_task)
+        assert on_wire == packer.pack(big_task, compress=False)
+        assert on_wire[0] == 1
+        assert negotiator.pack(peer, big_task, compress=True) == on_wire
+
+    negotiator.forget("a")
+    assert not negotiator.can_compress("a")
+    assert not compression.is_compressed(negotiator.pack("a", big_task))
+
+
+def test_negotiation_errors():
+    negotiator = ProtocolNegotiator()
+    with pytest.raises(ValueError, match="malformed"):
+        negotiator.select("2,x")
+    with pytest.raises(ValueError, match="malformed compression codecs"):
+        negotiator.negotiate("a", "1", "zlib")
+    with pytest.raises(UnrecognizedProtocolVersion, match="no protocol version"):
+        negotiator.negotiate("a", "3")
+    assert negotiator.protocol_version("a") == 1
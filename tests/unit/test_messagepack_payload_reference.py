@@ -0,0 +1,183 @@
+import json
+import uuid
+
+import pydantic
+import pytest
+
+from globus_compute_common.messagepack import (
+    MessagePacker,
+    offload_payload,
+    resolve_payload,
+)
+from globus_compute_common.messagepack.message_types import (
+    FrozenTask,
+    PayloadReference,
+    Result,
+    Task,
+    freeze,
+)
+from globus_compute_common.task_storage import (
+    ImplicitRedisStorage,
+    RedisS3Storage,
+    StorageException,
+    TaskStorage,
+)
+
+try:
+    import msgpack  # noqa: F401
+
+    has_msgpack = True
+except ImportError:
+    has_msgpack = False
+
+try:
+    import boto3
+    from moto import mock_aws as moto_mock
+
+    has_boto = True
+except ImportError:
+    has_boto = False
+
+PROTOCOL_VERSIONS = [
+    1,
+    pytest.param(2, marks=pytest.mark.skipif(not has_msgpack, reason="msgpack")),
+]
+ID = uuid.UUID("00000000-0000-0000-0000-000000000001")
+
+
+class InMemoryStorage(TaskStorage):
+    """Keeps payloads and results in dicts, referring to them by task ID."""
+
+    def __init__(self):
+        self.stored = {"payload": {}, "result": {}}
+
+    def _store(self, kind, task, data):
+        self.stored[kind][task.task_id] = data
+        setattr(
+            task, f"{kind}_reference", {"storage_id": "memory", "key": task.task_id}
+        )
+
+    def _get(self, kind, task):
+        reference = getattr(task, f"{kind}_reference")
+        return self.stored[kind].get(reference["key"])
+
+    def store_result(self, task, result):
+        self._store("result", task, result)
+
+    def get_result(self, task):
+        return self._get("result", task)
+
+    def store_payload(self, task, payload):
+        self._store("payload", task, payload)
+
+    def get_payload(self, task):
+        return self._get("payload", task)
+
+
+@pytest.mark.parametrize(
+    "message, field",
+    [
+        (Task(task_id=ID, task_buffer="x" * 1000), "task_buffer"),
+        (Result(task_id=ID, data="y" * 1000), "data"),
+    ],
+)
+@pytest.mark.parametrize("protocol_version", PROTOCOL_VERSIONS)
+def test_offload_and_resolve(message, field, protocol_version):
+    storage = InMemoryStorage()
+    packer = MessagePacker(default_protocol_version=protocol_version)
+
+    offloaded = offload_payload(message, storage)
+    assert getattr(offloaded, field) is None
+    reference = getattr(offloaded, f"{field}_reference")
+    assert reference.storage_id == "memory"
+    assert reference.size == 1000
+
+    on_wire = packer.pack(offloaded)
+    assert len(on_wire) < 1000
+    unpacked = packer.unpack(on_wire)
+    assert unpacked == offloaded
+    assert packer.unpack_frozen(on_wire) == freeze(offloaded)
+    assert packer.pack(freeze(offloaded)) == on_wire
+
+    assert resolve_payload(unpacked, storage) == message
+    assert resolve_payload(message, storage) is message
+
+
+def test_offload_skips_small_and_referenced_payloads():
+    storage = InMemoryStorage()
+    task = Task(task_id=ID, task_buffer="small")
+    assert offload_payload(task, storage, min_size=100) is task
+    assert storage.stored["payload"] == {}
+
+    offloaded = offload_payload(task, storage)
+    assert offload_payload(offloaded, storage) is offloaded
+
+
+def test_offload_keeps_payloads_which_stay_in_the_task_record():
+    task = Task(task_id=ID, task_buffer="foo")
+    assert offload_payload(task, ImplicitRedisStorage()) is task
+
+
+def test_resolve_checks_the_payload():
+    storage = InMemoryStorage()
+    offloaded = offload_payload(Result(task_id=ID, data="foo"), storage)
+
+    storage.stored["result"][str(ID)] = "bar"
+    with pytest.raises(StorageException, match="does not match its reference"):
+        resolve_payload(offloaded, storage)
+    storage.stored["result"][str(ID)] = "foo!"
+    with pytest.raises(StorageException, match="does not match its reference"):
+        resolve_payload(offloaded, storage)
+    del storage.stored["result"][str(ID)]
+    with pytest.raises(StorageException, match="not found"):
+        resolve_payload(offloaded, storage)
+
+
+def test_exactly_one_form_of_payload():
+    reference = PayloadReference(storage_id="s3", s3bucket="b", key="k", size=3)
+    with pytest.raises(pydantic.ValidationError, match="exactly one of"):
+        Task(task_id=ID)
+    with pytest.raises(pydantic.ValidationError, match="exactly one of"):
+        Result(task_id=ID, data="foo", data_reference=reference)
+    with pytest.raises(ValueError, match="exactly one of"):
+        FrozenTask(task_id=ID, task_buffer="foo", task_buffer_reference=reference)
+
+
+def test_inline_messages_are_packed_as_before():
+    task = Task(task_id=ID, task_buffer="foo")
+    packed = json.loads(MessagePacker().pack(task)[1:])
+    assert packed["data"] == {
+        "task_id": str(ID),
+        "container_id": None,
+        "container": None,
+        "task_buffer": "foo",
+    }
+
+
+def test_referenced_messages_leave_out_the_payload_field():
+    reference = PayloadReference(storage_id="s3", s3bucket="b", key="k", size=3)
+    task = Task(task_id=ID, task_buffer_reference=reference)
+    packed = json.loads(MessagePacker().pack(task)[1:])
+    assert "task_buffer" not in packed["data"]
+    assert packed["data"]["task_buffer_reference"] == {
+        "storage_id": "s3",
+        "s3bucket": "b",
+        "key": "k",
+        "size": 3,
+        "sha256": None,
+    }
+
+
+@pytest.mark.skipif(not has_boto, reason="test requires boto3 lib")
+def test_offload_to_s3():
+    with moto_mock():
+        boto3.client("s3").create_bucket(Bucket="compute-test-1")
+        storage = RedisS3Storage(bucket_name="compute-test-1", redis_threshold=10)
+
+        small = Task(task_id=ID, task_buffer="small")
+        assert offload_payload(small, storage) is small
+
+        task = Task(task_id=ID, task_buffer="x" * 100)
+        offloaded = offload_payload(task, storage)
+        assert offloaded.task_buffer_reference.s3bucket == "compute-test-1"
+        assert resolve_payload(offloaded, storage) == task
@@ -0,0 +1,306 @@
+import json
+import logging
+import threading
+import tracemalloc
+import uuid
+
+import pytest
+
+from globus_compute_common.messagepack import (
+    InvalidMessageError,
+    MessageHeader,
+    MessagePacker,
+)
+from globus_compute_common.messagepack.message_types import (
+    ALL_MESSAGE_CLASSES,
+    Container,
+    ContainerImage,
+    EPStatusReport,
+    ManagerStatusReport,
+    Result,
+    ResultErrorDetails,
+    Task,
+    TaskCancel,
+    TaskTransition,
+)
+from globus_compute_common.tasks.constants import ActorName, TaskState
+
+try:
+    import msgpack
+
+    has_msgpack = True
+except ImportError:
+    has_msgpack = False
+
+ID_ZERO = uuid.UUID(int=0)
+SOME_ID = uuid.UUID("058cf505-a09e-4af3-a5f2-eb2e931af141")
+
+TRANSITION = TaskTransition(
+    timestamp=1, state=TaskState.EXEC_END, actor=ActorName.INTERCHANGE
+)
+IMAGE = ContainerImage(
+    image_type="docker",
+    location="python:3.10",
+    created_at=1,
+    modified_at=2,
+    build_status=None,
+    build_stderr="some\nerror output",
+)
+CONTAINER = Container(container_id=SOME_ID, name="Some Container", images=[IMAGE])
+
+SAMPLE_MESSAGES = {
+    Container: CONTAINER,
+    ContainerImage: IMAGE,
+    EPStatusReport: EPStatusReport(
+        endpoint_id=SOME_ID,
+        global_state={"heartbeat_period": 10, "active": True, "ratio": 0.5},
+        task_statuses={str(ID_ZERO): [TRANSITION, TRANSITION]},
+    ),
+    ManagerStatusReport: ManagerStatusReport(task_statuses={"foo": [TRANSITION]}),
+    Task: Task(
+        task_id=SOME_ID,
+        container_id=ID_ZERO,
+        container=CONTAINER,
+        task_buffer='some "quoted"\ndata ☃',
+    ),
+    TaskCancel: TaskCancel(task_id=SOME_ID),
+    Result: Result(
+        task_id=SOME_ID,
+        data="foo-bar-baz",
+        details={"os": "linux", "versions": [1, 2]},
+        error_details=ResultErrorDetails(code="c", user_message="m"),
+        task_statuses=[TRANSITION],
+    ),
+    TaskTransition: TRANSITION,
+}
+
+skip_without_msgpack = pytest.mark.skipif(
+    not has_msgpack, reason="test requires msgpack lib"
+)
+
+
+@pytest.fixture
+def packer():
+    return MessagePacker(default_protocol_version=2)
+
+
+def test_sample_messages_cover_all_message_classes():
+    assert set(SAMPLE_MESSAGES) == ALL_MESSAGE_CLASSES
+
+
+@skip_without_msgpack
+@pytest.mark.parametrize(
+    "message", SAMPLE_MESSAGES.values(), ids=lambda m: type(m).__name__
+)
+def test_pack_and_unpack(packer, message):
+    on_wire = packer.pack(message)
+    assert on_wire[0:1] == b"\x02"
+    assert packer.detect_protocol_version(on_wire) == 2
+
+    message2 = packer.unpack(on_wire)
+    assert type(message2) is type(message)
+    assert message2 == message
+
+
+@skip_without_msgpack
+@pytest.mark.parametrize(
+    "message", SAMPLE_MESSAGES.values(), ids=lambda m: type(m).__name__
+)
+def test_v2_is_more_compact_than_v1(packer, message):
+    assert len(packer.pack(message)) < len(packer.pack(message, protocol_version=1))
+
+
+@skip_without_msgpack
+def test_compact_field_encoding(packer):
+    message = SAMPLE_MESSAGES[Task]
+    on_wire = packer.pack(message)
+
+    # the UUID is stored as raw bytes, not as a string
+    assert SOME_ID.bytes in on_wire
+    assert str(SOME_ID).encode() not in on_wire
+    # the task buffer is stored without JSON escaping
+    assert message.task_buffer.encode() in on_wire
+
+
+@skip_without_msgpack
+def test_enums_encoded_as_codes(packer):
+    on_wire = packer.pack(TRANSITION)
+    assert TaskState.EXEC_END.value.encode() not in on_wire
+    assert ActorName.INTERCHANGE.value.encode() not in on_wire
+
+    unpacked = packer.unpack(on_wire)
+    assert unpacked.state is TaskState.EXEC_END
+    assert unpacked.actor is ActorName.INTERCHANGE
+
+
+@skip_without_msgpack
+def test_arbitrary_values_in_untyped_fields(packer):
+    message = EPStatusReport(
+        endpoint_id=ID_ZERO,
+        global_state={
+            "nested": {"tuple": (1, 2), "state": TaskState.RUNNING},
+            "id": SOME_ID,
+        },
+        task_statuses={},
+    )
+    unpacked = packer.unpack(packer.pack(message))
+    assert unpacked.global_state == {
+        "nested": {"tuple": [1, 2], "state": TaskState.RUNNING},
+        "id": SOME_ID,
+    }
+
+
+@skip_without_msgpack
+def test_packer_reads_both_versions(packer):
+    message = SAMPLE_MESSAGES[Result]
+    v1_packer = MessagePacker(default_protocol_version=1)
+    assert packer.unpack(v1_packer.pack(message)) == message
+    assert v1_packer.unpack(packer.pack(message)) == message
+
+
+@skip_without_msgpack
+@pytest.mark.parametrize(
+    "message", SAMPLE_MESSAGES.values(), ids=lambda m: type(m).__name__
+)
+def test_peek(packer, message):
+    assert packer.peek(packer.pack(message)) == MessageHeader(
+        2, message.message_type, getattr(message, "task_id", None)
+    )
+
+
+@skip_without_msgpack
+@pytest.mark.parametrize(
+    "payload",
+    [
+        ["task", {"task_buffer": "foo"}],
+        ["task_cancel", {"task_id": "foo"}],
+        ["foo", {}],
+    ],
+)
+def test_peek_invalid(packer, payload):
+    with pytest.raises(InvalidMessageError):
+        packer.peek(b"\x02" + msgpack.packb(payload))
+
+
+@skip_without_msgpack
+def test_unknown_data_fields_warn(packer, caplog):
+    buf = b"\x02" + msgpack.packb(
+        ["task_cancel", {"task_id": str(ID_ZERO), "foo_field": "bar"}]
+    )
+    with caplog.at_level(logging.WARNING, logger="globus_compute_common"):
+        msg = packer.unpack(buf)
+        assert isinstance(msg, TaskCancel)
+    assert (
+        "encountered unknown data fields while reading a task_cancel message:"
+    ) in caplog.text
+    assert "foo_field" in caplog.text
+
+
+@skip_without_msgpack
+@pytest.mark.parametrize(
+    "payload",
+    [
+        ["task_cancel"],
+        {"message_type": "task_cancel", "data": {}},
+        ["foo", {}],
+        [["task_cancel"], {}],
+        ["task_cancel", None],
+    ],
+)
+def test_cannot_unpack_malformed_envelope(packer, payload):
+    with pytest.raises(InvalidMessageError):
+        packer.unpack(b"\x02" + msgpack.packb(payload))
+
+
+@skip_without_msgpack
+@pytest.mark.parametrize("ext_type, ext_data", [(99, b""), (2, b"\xff"), (3, b"")])
+def test_cannot_unpack_unknown_ext_values(packer, ext_type, ext_data):
+    payload = ["task_transition", {"state": msgpack.ExtType(ext_type, ext_data)}]
+    with pytest.raises(InvalidMessageError):
+        packer.unpack(b"\x02" + msgpack.packb(payload))
+
+
+@skip_without_msgpack
+def test_cannot_unpack_invalid_msgpack(packer):
+    with pytest.raises(InvalidMessageError):
+        # 0xc1 is never used in msgpack
+        packer.unpack(b"\x02\xc1")
+
+
+@skip_without_msgpack
+def test_invalid_data_rejected(packer):
+    buf = b"\x02" + msgpack.packb(["task_cancel", {"task_id": "foo"}])
+    with pytest.raises(ValueError):
+        packer.unpack(buf)
+
+
+@pytest.mark.skipif(has_msgpack, reason="test only runs without msgpack lib")
+def test_cannot_use_v2_without_msgpack_lib(packer):
+    with pytest.raises(RuntimeError):
+        packer.pack(SAMPLE_MESSAGES[TaskCancel])
+    # v1 is unaffected
+    on_wire = packer.pack(SAMPLE_MESSAGES[TaskCancel], protocol_version=1)
+    assert json.loads(on_wire[1:])["message_type"] == "task_cancel"
+
+
+@skip_without_msgpack
+@pytest.mark.parametrize("buffer_type", [bytes, bytearray, memoryview])
+def test_unpack_accepts_buffer_types(packer, buffer_type):
+    message = SAMPLE_MESSAGES[Task]
+    assert packer.unpack(buffer_type(packer.pack(message))) == message
+
+
+@skip_without_msgpack
+def test_unpack_does_not_copy_body(packer):
+    size = 10_000_000
+    message = Task(task_id=ID_ZERO, task_buffer="x" * size)
+    on_wire = packer.pack(message)
+
+    tracemalloc.start()
+    try:
+        unpacked = packer.unpack(memoryview(on_wire))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert unpacked == message
+    # the only large allocation is the unpacked task buffer itself
+    assert peak < 1.5 * size
+
+
+@skip_without_msgpack
+def test_pack_reuses_its_buffer(packer):
+    message = SAMPLE_MESSAGES[TaskCancel]
+    on_wire = packer.pack(message)
+
+    tracemalloc.start()
+    try:
+        assert packer.pack(message) == on_wire
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < 4096
+
+    # a large message does not change how later messages are packed
+    large = Task(task_id=ID_ZERO, task_buffer="x" * 10_000_000)
+    assert packer.unpack(packer.pack(large)) == large
+    assert packer.pack(message) == on_wire
+
+
+@skip_without_msgpack
+def test_pack_from_many_threads(packer):
+    expected = {cls: packer.pack(message) for cls, message in SAMPLE_MESSAGES.items()}
+    mismatched = []
+
+    def pack_repeatedly():
+        for _ in range(200):
+            for cls, message in SAMPLE_MESSAGES.items():
+                if packer.pack(message) != expected[cls]:
+                    mismatched.append(cls)
+
+    threads = [threading.Thread(target=pack_repeatedly) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert mismatched == []
@@ -0,0 +1,140 @@
+import json
+import logging
+import uuid
+
+import pydantic
+import pytest
+
+from globus_compute_common.messagepack import (
+    InvalidMessageError,
+    MessageHeader,
+    MessagePacker,
+    pack,
+    unpack,
+)
+from globus_compute_common.messagepack.message_types import (
+    ALL_MESSAGE_CLASSES,
+    MESSAGE_TYPES,
+    EPStatusReport,
+    MessageTypeInfo,
+    Task,
+    register_message_type,
+    unregister_message_type,
+)
+from globus_compute_common.messagepack.message_types.base import Message, meta
+
+try:
+    import msgpack  # noqa: F401
+
+    has_msgpack = True
+except ImportError:
+    has_msgpack = False
+
+ID_ZERO = uuid.UUID(int=0)
+
+
+@meta(message_type="heartbeat")
+class Heartbeat(Message):
+    task_id: uuid.UUID
+    sequence: int
+
+
+@pytest.fixture
+def heartbeat():
+    register_message_type(Heartbeat)
+    yield Heartbeat
+    unregister_message_type("heartbeat")
+
+
+def test_builtin_message_classes_are_registered():
+    assert set(MESSAGE_TYPES) == {c.Meta.message_type for c in ALL_MESSAGE_CLASSES}
+    info = MESSAGE_TYPES["task"]
+    assert isinstance(info, MessageTypeInfo)
+    assert info.message_class is Task
+    assert info.message_type == "task"
+    assert info.validator is Task.__pydantic_validator__
+    assert info.serializer is Task.__pydantic_serializer__
+
+
+def test_known_fields_include_aliases():
+    info = MESSAGE_TYPES["ep_status_report"]
+    assert {"global_state", "ep_status_report", "task_statuses"} <= info.known_fields
+    assert info.unknown_fields({"endpoint_id": 1, "foo": 2}) == {"foo"}
+
+
+def test_json_schema_is_generated_once():
+    info = MESSAGE_TYPES["ep_status_report"]
+    assert info.json_schema == EPStatusReport.model_json_schema(
+        by_alias=False, mode="serialization"
+    )
+    assert "global_state" in info.json_schema["properties"]
+    assert info.json_schema is info.json_schema
+
+
+def test_validate():
+    info = MESSAGE_TYPES["task"]
+    task = info.validate({"task_id": str(ID_ZERO), "task_buffer": "foo"})
+    assert task == Task(task_id=ID_ZERO, task_buffer="foo")
+    with pytest.raises(pydantic.ValidationError):
+        info.validate({"task_id": "foo"})
+
+
+def test_registry_is_read_only():
+    with pytest.raises(TypeError):
+        MESSAGE_TYPES["foo"] = MESSAGE_TYPES["task"]
+
+
+@pytest.mark.parametrize(
+    "protocol_version",
+    [1, pytest.param(2, marks=pytest.mark.skipif(not has_msgpack, reason="msgpack"))],
+)
+def test_pack_and_unpack_registered_message_type(heartbeat, protocol_version):
+    packer = MessagePacker(default_protocol_version=protocol_version)
+    message = heartbeat(task_id=ID_ZERO, sequence=3)
+    on_wire = packer.pack(message)
+    assert packer.unpack(on_wire) == message
+    assert packer.peek(on_wire) == MessageHeader(protocol_version, "heartbeat", ID_ZERO)
+
+
+def test_unregistered_message_type_cannot_be_packed_or_unpacked(heartbeat):
+    on_wire = pack(heartbeat(task_id=ID_ZERO, sequence=3))
+    unregister_message_type("heartbeat")
+    try:
+        with pytest.raises(pydantic.ValidationError):
+            unpack(on_wire)
+        with pytest.raises(pydantic.ValidationError):
+            pack(heartbeat(task_id=ID_ZERO, sequence=3))
+        with pytest.raises(InvalidMessageError):
+            MessagePacker().peek(on_wire)
+    finally:
+        register_message_type(heartbeat)
+
+
+def test_registered_message_type_warns_on_unknown_fields(heartbeat, caplog):
+    data = {"task_id": str(ID_ZERO), "sequence": 1, "foo": 1}
+    on_wire = b"\x01" + json.dumps({"message_type": "heartbeat", "data": data}).encode()
+    with caplog.at_level(logging.WARNING, logger="globus_compute_common"):
+        assert unpack(on_wire) == heartbeat(task_id=ID_ZERO, sequence=1)
+    assert "unknown data fields while reading a heartbeat message" in caplog.text
+
+
+def test_register_is_idempotent(heartbeat):
+    info = MESSAGE_TYPES["heartbeat"]
+    assert register_message_type(heartbeat) is heartbeat
+    assert MESSAGE_TYPES["heartbeat"] is info
+
+
+def test_register_rejects_conflicting_message_type():
+    @meta(message_type="task")
+    class MyTask(Message):
+        pass
+
+    with pytest.raises(ValueError, match="already registered to Task"):
+        register_message_type(MyTask)
+    assert MESSAGE_TYPES["task"].message_class is Task
+
+
+@pytest.mark.parametrize("cls", [int, Message, pydantic.BaseModel])
+def test_register_rejects_non_message_classes(cls):
+    with pytest.raises(TypeError):
+        register_message_type(cls)
@@ -0,0 +1,225 @@
+import json
+import uuid
+
+import pydantic
+import pytest
+
+from globus_compute_common.messagepack import MessagePacker, pack, unpack
+from globus_compute_common.messagepack._enum_codes import (
+    ACTOR_NAME_CODES,
+    TASK_STATE_CODES,
+)
+from globus_compute_common.messagepack.message_types import (
+    ColumnarTaskStatuses,
+    EPStatusReport,
+    ManagerStatusReport,
+    TaskStatusColumns,
+    TaskTransition,
+)
+from globus_compute_common.tasks.constants import ActorName, TaskState
+
+try:
+    import msgpack  # noqa: F401
+
+    has_msgpack = True
+except ImportError:
+    has_msgpack = False
+
+ID_ZERO = uuid.UUID(int=0)
+TASK_A = str(uuid.UUID(int=1))
+TASK_B = str(uuid.UUID(int=2))
+TASK_C = str(uuid.UUID(int=3))
+
+TASK_STATUSES = {
+    TASK_A: [
+        TaskTransition(timestamp=1, state=TaskState.RUNNING, actor=ActorName.WORKER),
+        TaskTransition(timestamp=3, state=TaskState.SUCCESS, actor=ActorName.MANAGER),
+    ],
+    TASK_B: [
+        TaskTransition(
+            timestamp=2, state=TaskState.FAILED, actor=ActorName.ACTION_PROVIDER
+        ),
+    ],
+    TASK_C: [],
+}
+
+
+def test_round_trip_dict_form():
+    columns = TaskStatusColumns.from_dict(TASK_STATUSES)
+    assert len(columns) == 3
+    assert columns.transition_count == 3
+    assert list(columns) == [TASK_A, TASK_B, TASK_C]
+    assert columns[TASK_A] == TASK_STATUSES[TASK_A]
+    assert columns[TASK_C] == []
+    assert TASK_B in columns
+    assert "foo" not in columns
+    with pytest.raises(KeyError):
+        columns["foo"]
+
+    as_dict = columns.to_dict()
+    assert as_dict == TASK_STATUSES
+    assert list(as_dict) == list(TASK_STATUSES)
+    assert columns == TASK_STATUSES
+    assert TASK_STATUSES == columns
+
+
+def test_columns_layout():
+    columns = TaskStatusColumns.from_dict(TASK_STATUSES)
+    assert columns.to_columns() == {
+        "task_ids": [TASK_A, TASK_B, TASK_C],
+        "task_index": [0, 0, 1],
+        "timestamps": [1, 3, 2],
+        "states": [
+            TASK_STATE_CODES.index(TaskState.RUNNING),
+            TASK_STATE_CODES.index(TaskState.SUCCESS),
+            TASK_STATE_CODES.index(TaskState.FAILED),
+        ],
+        "actors": [
+            ACTOR_NAME_CODES.index(ActorName.WORKER),
+            ACTOR_NAME_CODES.index(ActorName.MANAGER),
+            ACTOR_NAME_CODES.index(ActorName.ACTION_PROVIDER),
+        ],
+    }
+    assert TaskStatusColumns.from_columns(**columns.to_columns()) == columns
+
+
+def test_append_interleaved_transitions():
+    columns = TaskStatusColumns()
+    columns.append(TASK_A, 1, TaskState.RUNNING, ActorName.WORKER)
+    columns.append(TASK_B, 2, TaskState.FAILED, ActorName.ACTION_PROVIDER)
+    assert columns[TASK_A] == TASK_STATUSES[TASK_A][:1]
+    # the values of the enums are accepted too
+    columns.append(TASK_A, 3, "success", "manager")
+    columns.add_task(TASK_C)
+    assert columns.to_dict() == TASK_STATUSES
+
+
+def test_append_rejects_unknown_enum_values():
+    columns = TaskStatusColumns()
+    with pytest.raises(ValueError, match="no columnar encoding"):
+        columns.append(TASK_A, 1, "foo", ActorName.WORKER)
+    with pytest.raises(TypeError):
+        columns.append(1, 1, TaskState.RUNNING, ActorName.WORKER)
+    assert columns.transition_count == 0
+
+
+def test_all_enum_members_have_codes():
+    # every member must be encodable in the columnar form
+    assert set(TASK_STATE_CODES) == set(TaskState)
+    assert set(ACTOR_NAME_CODES) == set(ActorName)
+
+
+@pytest.mark.parametrize(
+    "change, match",
+    [
+        ({"task_ids": [TASK_A, TASK_A]}, "duplicate task ID"),
+        ({"task_index": [0]}, "same length"),
+        ({"task_index": [0, 0, 5]}, "unknown task"),
+        ({"task_index": [0, 0, -1]}, "out of range"),
+        ({"states": [0, 0, 200]}, "unrecognized TaskState code"),
+        ({"actors": [0, 0, 200]}, "unrecognized ActorName code"),
+    ],
+)
+def test_from_columns_rejects_inconsistent_columns(change, match):
+    wire = {**TaskStatusColumns.from_dict(TASK_STATUSES).to_columns(), **change}
+    with pytest.raises(ValueError, match=match):
+        TaskStatusColumns.from_columns(**wire)
+
+
+@pytest.mark.parametrize("report_class", [EPStatusReport, ManagerStatusReport])
+@pytest.mark.parametrize(
+    "protocol_version",
+    [1, pytest.param(2, marks=pytest.mark.skipif(not has_msgpack, reason="msgpack"))],
+)
+def test_pack_and_unpack_columnar_report(report_class, protocol_version):
+    packer = MessagePacker(default_protocol_version=protocol_version)
+    extra = {}
+    if report_class is EPStatusReport:
+        extra = {"endpoint_id": ID_ZERO, "global_state": {"foo": "bar"}}
+    columnar = report_class(
+        task_statuses=TaskStatusColumns.from_dict(TASK_STATUSES), **extra
+    )
+    plain = report_class(task_statuses=TASK_STATUSES, **extra)
+
+    assert isinstance(columnar.task_statuses, ColumnarTaskStatuses)
+    assert columnar.task_statuses == TASK_STATUSES
+
+    on_wire = packer.pack(columnar)
+    assert len(on_wire) < len(packer.pack(plain))
+    unpacked = packer.unpack(on_wire)
+    assert isinstance(unpacked.task_statuses, ColumnarTaskStatuses)
+    assert unpacked == columnar
+    assert unpacked == plain
+
+    # the dict-of-lists form is unchanged
+    unpacked = packer.unpack(packer.pack(plain))
+    assert type(unpacked.task_statuses) is dict
+    assert unpacked == plain
+
+
+def test_columnar_wire_format():
+    columns = TaskStatusColumns.from_dict(TASK_STATUSES)
+    on_wire = pack(ManagerStatusReport(task_statuses=columns))
+    data = json.loads(on_wire[1:])["data"]
+    assert data["task_statuses"] == list(columns.to_columns().values())
+
+
+def test_columnar_report_is_a_dict():
+    report = ManagerStatusReport(task_statuses=ColumnarTaskStatuses(TASK_STATUSES))
+    assert report == ManagerStatusReport(
+        task_statuses=TaskStatusColumns.from_dict(TASK_STATUSES)
+    )
+    assert isinstance(report.task_statuses, dict)
+
+    # changes to the dict are packed, in the columnar form
+    transition = TaskTransition(
+        timestamp=4, state=TaskState.RUNNING, actor=ActorName.WORKER
+    )
+    report.task_statuses[TASK_C].append(transition)
+    report.task_statuses["foo"] = []
+    unpacked = unpack(pack(report))
+    assert isinstance(unpacked.task_statuses, ColumnarTaskStatuses)
+    assert unpacked.task_statuses[TASK_C] == [transition]
+    assert list(unpacked.task_statuses) == [TASK_A, TASK_B, TASK_C, "foo"]
+
+    # the form is kept when the report is validated again
+    validated = ManagerStatusReport.model_validate(report.__dict__)
+    assert isinstance(validated.task_statuses, ColumnarTaskStatuses)
+
+
+@pytest.mark.parametrize(
+    "task_ids", [["task_index"], list(TaskStatusColumns().to_columns())]
+)
+def test_dict_form_with_column_names_is_not_columnar(task_ids):
+    statuses = {task_id: [] for task_id in task_ids}
+    message = ManagerStatusReport(task_statuses=statuses)
+    assert type(message.task_statuses) is dict
+    assert unpack(pack(message)) == message
+
+
+def test_invalid_columnar_report():
+    wire = list(TaskStatusColumns.from_dict(TASK_STATUSES).to_columns().values())
+    with pytest.raises(pydantic.ValidationError):
+        ManagerStatusReport(task_statuses=[*wire[:3], ["running"] * 3, wire[4]])
+    with pytest.raises(pydantic.ValidationError):
+        ManagerStatusReport(task_statuses=[*wire, []])
+    with pytest.raises(pydantic.ValidationError):
+        ManagerStatusReport(task_statuses=[wire[0], [9, 9, 9], *wire[2:]])
+    # columns given under their names are not a valid dict-of-lists either
+    with pytest.raises(pydantic.ValidationError):
+        ManagerStatusReport(
+            task_statuses=TaskStatusColumns.from_dict(TASK_STATUSES).to_columns()
+        )
+
+
+def test_large_report_round_trip():
+    columns = TaskStatusColumns()
+    for i in range(10_000):
+        task_id = str(uuid.UUID(int=i))
+        columns.append(task_id, i, TaskState.RUNNING, ActorName.WORKER)
+        columns.append(task_id, i + 1, TaskState.SUCCESS, ActorName.MANAGER)
+    report = EPStatusReport(endpoint_id=ID_ZERO, global_state={}, task_statuses=columns)
+    unpacked = unpack(pack(report))
+    unpacked_columns = TaskStatusColumns.from_dict(unpacked.task_statuses)
+    assert unpacked_columns.transition_count == 20_000
+    assert unpacked_columns.to_columns() == columns.to_columns()
@@ -0,0 +1,126 @@
+import json
+import logging
+import threading
+import uuid
+
+import pytest
+
+from globus_compute_common.messagepack import (
+    DEFAULT_UNKNOWN_FIELD_REPORTER,
+    UnknownFieldReporter,
+    UnknownFields,
+    unpack,
+)
+
+ID_ZERO = uuid.UUID(int=0)
+KEY = UnknownFields("data", "task", frozenset({"foo"}))
+
+
+def _task_with_fields(**extra):
+    data = {"task_id": str(ID_ZERO), "task_buffer": "foo", **extra}
+    return b"\x01" + json.dumps({"message_type": "task", "data": data}).encode()
+
+
+@pytest.fixture
+def reporter():
+    # never summarize unless flushed
+    return UnknownFieldReporter(interval=float("inf"))
+
+
+def test_first_occurrence_is_logged_then_counted(reporter, caplog):
+    with caplog.at_level(logging.WARNING, logger="globus_compute_common"):
+        for _ in range(5):
+            reporter.report("data", "task", {"foo"})
+    assert len(caplog.records) == 1
+    assert "unknown data fields while reading a task message" in caplog.text
+    assert reporter.counts() == {KEY: 5}
+
+
+def test_flush_logs_summary(reporter, caplog):
+    for _ in range(3):
+        reporter.report("data", "task", {"foo"})
+    reporter.report("envelope", "result", {"bar", "baz"})
+
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger="globus_compute_common"):
+        reporter.flush()
+    assert len(caplog.records) == 1
+    assert "unknown data fields in 2 more task messages" in caplog.text
+
+    # counted occurrences are only summarized once, but the counts are kept
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger="globus_compute_common"):
+        reporter.flush()
+    assert not caplog.records
+    assert reporter.counts() == {
+        KEY: 3,
+        UnknownFields("envelope", "result", frozenset({"bar", "baz"})): 1,
+    }
+
+
+def test_summary_is_logged_after_interval(caplog):
+    reporter = UnknownFieldReporter(interval=0)
+    with caplog.at_level(logging.WARNING, logger="globus_compute_common"):
+        reporter.report("data", "task", {"foo"})
+        reporter.report("data", "task", {"foo"})
+    assert [r.getMessage().split(":")[0] for r in caplog.records] == [
+        "encountered unknown data fields while reading a task message",
+        "encountered unknown data fields in 1 more task messages in the last 0s",
+    ]
+
+
+def test_empty_fields_are_not_reported(reporter):
+    reporter.report("data", "task", set())
+    assert reporter.counts() == {}
+
+
+def test_field_sets_are_counted_separately(reporter):
+    reporter.report("data", "task", {"foo"})
+    reporter.report("data", "task", {"foo", "bar"})
+    reporter.report("data", "result", {"foo"})
+    assert len(reporter.counts()) == 3
+
+
+def test_max_keys(reporter, caplog):
+    reporter.max_keys = 2
+    with caplog.at_level(logging.WARNING, logger="globus_compute_common"):
+        for i in range(5):
+            reporter.report("data", "task", {f"field{i}"})
+        reporter.flush()
+    assert len(reporter.counts()) == 2
+    assert reporter.overflow_count == 3
+    assert "in 3 more messages" in caplog.records[-1].getMessage()
+
+
+def test_reset(reporter, caplog):
+    reporter.report("data", "task", {"foo"})
+    reporter.reset()
+    assert reporter.counts() == {}
+    with caplog.at_level(logging.WARNING, logger="globus_compute_common"):
+        reporter.report("data", "task", {"foo"})
+    assert "unknown data fields" in caplog.text
+
+
+def test_concurrent_reports(reporter):
+    def report():
+        for _ in range(1000):
+            reporter.report("data", "task", {"foo"})
+
+    threads = [threading.Thread(target=report) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert reporter.counts() == {KEY: 4000}
+
+
+def test_unpack_reports_to_default_reporter(caplog):
+    with caplog.at_level(logging.WARNING, logger="globus_compute_common"):
+        for _ in range(100):
+            unpack(_task_with_fields(foo=1))
+        unpack(_task_with_fields(foo=1, bar=2))
+    assert len(caplog.records) == 2
+    assert DEFAULT_UNKNOWN_FIELD_REPORTER.counts() == {
+        KEY: 100,
+        UnknownFields("data", "task", frozenset({"foo", "bar"})): 1,
+    }
@@ -0,0 +1,197 @@
+import json
+import logging
+import uuid
+
+import pydantic
+import pytest
+
+from globus_compute_common.messagepack import (
+    DEFAULT_UNKNOWN_FIELD_REPORTER,
+    InvalidMessageError,
+    MessagePacker,
+    UnpackMode,
+)
+from globus_compute_common.messagepack.message_types import (
+    ColumnarTaskStatuses,
+    Container,
+    ContainerImage,
+    EPStatusReport,
+    ManagerStatusReport,
+    Result,
+    ResultErrorDetails,
+    Task,
+    TaskCancel,
+    TaskStatusColumns,
+    TaskTransition,
+    register_message_type,
+    unregister_message_type,
+)
+from globus_compute_common.messagepack.message_types.base import Message, meta
+from globus_compute_common.tasks.constants import ActorName, TaskState
+
+try:
+    import msgpack
+
+    has_msgpack = True
+except ImportError:
+    has_msgpack = False
+
+ID_ZERO = uuid.UUID(int=0)
+SOME_ID = uuid.UUID("058cf505-a09e-4af3-a5f2-eb2e931af141")
+
+TRANSITION = TaskTransition(
+    timestamp=1, state=TaskState.RUNNING, actor=ActorName.WORKER
+)
+IMAGE = ContainerImage(
+    image_type="docker",
+    location="python:3.10",
+    created_at=1,
+    modified_at=2,
+    build_status=None,
+    build_stderr="some\nerror output",
+)
+CONTAINER = Container(container_id=SOME_ID, name="Some Container", images=[IMAGE])
+
+MESSAGES = [
+    CONTAINER,
+    IMAGE,
+    EPStatusReport(
+        endpoint_id=SOME_ID,
+        global_state={"active": True, "ratio": 0.5},
+        task_statuses={str(ID_ZERO): [TRANSITION, TRANSITION]},
+    ),
+    ManagerStatusReport(
+        task_statuses=TaskStatusColumns.from_dict({str(ID_ZERO): [TRANSITION]})
+    ),
+    Task(task_id=SOME_ID, container=CONTAINER, task_buffer='some "quoted"\ndata ☃'),
+    TaskCancel(task_id=SOME_ID),
+    Result(
+        task_id=SOME_ID,
+        data="foo",
+        details={"os": "linux"},
+        error_details=ResultErrorDetails(code="c", user_message="m"),
+        task_statuses=[TRANSITION],
+    ),
+    TRANSITION,
+]
+
+PROTOCOL_VERSIONS = [
+    1,
+    pytest.param(2, marks=pytest.mark.skipif(not has_msgpack, reason="msgpack")),
+]
+
+
+def _packed_task(envelope_extra=None, **data_extra):
+    data = {"task_id": str(SOME_ID), "task_buffer": "foo", **data_extra}
+    envelope = {"message_type": "task", "data": data, **(envelope_extra or {})}
+    return b"\x01" + json.dumps(envelope).encode()
+
+
+def test_unpack_mode_from_string():
+    assert MessagePacker(unpack_mode="strict")._unpack_mode is UnpackMode.STRICT
+    with pytest.raises(ValueError):
+        MessagePacker(unpack_mode="foo")
+
+
+@pytest.mark.parametrize("protocol_version", PROTOCOL_VERSIONS)
+@pytest.mark.parametrize("message", MESSAGES, ids=lambda m: type(m).__name__)
+def test_modes_agree_on_valid_messages(protocol_version, message):
+    on_wire = MessagePacker().pack(message, protocol_version=protocol_version)
+    unpacked = {
+        mode: MessagePacker(unpack_mode=mode).unpack(on_wire) for mode in UnpackMode
+    }
+    for mode, result in unpacked.items():
+        assert type(result) is type(message), mode
+        assert result == message, mode
+        assert result.model_dump() == message.model_dump(), mode
+        if isinstance(message, ManagerStatusReport):
+            assert type(result.task_statuses) is ColumnarTaskStatuses
+
+        lazy = MessagePacker(unpack_mode=mode).unpack_lazy(on_wire)
+        assert lazy.load() == message, mode
+
+
+@pytest.mark.parametrize(
+    "buf, match",
+    [
+        (_packed_task(foo=1), "unknown data fields in a task message: \\['foo'\\]"),
+        (_packed_task({"foo": 1}), "unknown envelope fields in a task message"),
+    ],
+)
+def test_strict_mode_rejects_unknown_fields(buf, match):
+    packer = MessagePacker(unpack_mode="strict")
+    with pytest.raises(InvalidMessageError, match=match):
+        packer.unpack(buf)
+    with pytest.raises(InvalidMessageError, match=match):
+        packer.unpack_lazy(buf)
+    _, errors = packer.unpack_batch([buf])
+    assert isinstance(errors[0], InvalidMessageError)
+
+
+@pytest.mark.skipif(not has_msgpack, reason="msgpack")
+def test_strict_mode_rejects_unknown_fields_v2():
+    buf = b"\x02" + msgpack.packb(["task_cancel", {"task_id": str(ID_ZERO), "foo": 1}])
+    with pytest.raises(InvalidMessageError, match="unknown data fields"):
+        MessagePacker(unpack_mode="strict").unpack(buf)
+    assert MessagePacker().unpack(buf) == TaskCancel(task_id=ID_ZERO)
+
+
+@pytest.mark.parametrize("mode", ["default", "trusted"])
+def test_lenient_modes_ignore_unknown_fields(mode):
+    buf = _packed_task({"bar": 2}, foo=1)
+    assert MessagePacker(unpack_mode=mode).unpack(buf) == Task(
+        task_id=SOME_ID, task_buffer="foo"
+    )
+
+
+def test_only_default_mode_reports_unknown_fields(caplog):
+    buf = _packed_task(foo=1)
+    with caplog.at_level(logging.WARNING, logger="globus_compute_common"):
+        MessagePacker(unpack_mode="trusted").unpack(buf)
+        assert DEFAULT_UNKNOWN_FIELD_REPORTER.counts() == {}
+        MessagePacker().unpack(buf)
+        assert len(DEFAULT_UNKNOWN_FIELD_REPORTER.counts()) == 1
+    assert len(caplog.records) == 1
+
+
+@pytest.mark.parametrize(
+    "buf",
+    [
+        _packed_task(task_id="not a uuid"),
+        b'\x01{"message_type":"foo","data":{}}',
+        b'\x01{"message_type":"task"}',
+        b"\x01not json",
+    ],
+)
+def test_trusted_mode_raises_the_same_errors(buf):
+    with pytest.raises(ValueError) as default_error:
+        MessagePacker().unpack(buf)
+    with pytest.raises(ValueError) as trusted_error:
+        MessagePacker(unpack_mode="trusted").unpack(buf)
+    assert type(trusted_error.value) is type(default_error.value)
+    assert str(trusted_error.value) == str(default_error.value)
+
+
+def test_trusted_mode_with_lone_surrogates():
+    buf = b'\x01{"message_type":"task","data":{"task_id":"%s","task_buffer":"\\ud800"}}'
+    buf %= str(SOME_ID).encode()
+    message = MessagePacker(unpack_mode="trusted").unpack(buf)
+    assert message == MessagePacker().unpack(buf)
+
+
+def test_trusted_mode_follows_registry():
+    @meta(message_type="trusted_heartbeat")
+    class Heartbeat(Message):
+        sequence: int
+
+    packer = MessagePacker(unpack_mode="trusted")
+    packer.unpack(MessagePacker().pack(TaskCancel(task_id=ID_ZERO)))
+
+    register_message_type(Heartbeat)
+    try:
+        on_wire = packer.pack(Heartbeat(sequence=1))
+        assert packer.unpack(on_wire) == Heartbeat(sequence=1)
+    finally:
+        unregister_message_type("trusted_heartbeat")
+    with pytest.raises(pydantic.ValidationError):
+        packer.unpack(on_wire)
@@ -0,0 +1,364 @@
+import pytest
+
+from globus_compute_common.redis import (
+    INT_SERDE,
+    JSON_SERDE,
+    HasRedisFields,
+    RedisField,
+    invalidate_cache,
+    missing_fields,
+    refresh_fields,
+)
+from globus_compute_common.redis_task import RedisTask
+from globus_compute_common.tasks import TaskState
+
+
+class CountingRedis:
+    """Holds hashes in memory, counting the round trips made to it."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.ttls = {}
+        self.commands = 0
+
+    def hget(self, name, key):
+        self.commands += 1
+        return self.hashes.get(name, {}).get(key)
+
+    def hmget(self, name, keys):
+        self.commands += 1
+        return [self.hashes.get(name, {}).get(key) for key in keys]
+
+    def hset(self, name, key=None, value=None, mapping=None):
+        self.commands += 1
+        fields = self.hashes.setdefault(name, {})
+        if key is not None:
+            fields[key] = value
+        fields.update(mapping or {})
+
+    def exists(self, name):
+        self.commands += 1
+        return int(name in self.hashes)
+
+    def ttl(self, name):
+        self.commands += 1
+        if name not in self.hashes:
+            return -2
+        return self.ttls.get(name, -1)
+
+    def expire(self, name, time):
+        self.commands += 1
+        self.ttls[name] = time
+
+    def pipeline(self, transaction=True):
+        return CountingPipeline(self, transaction)
+
+
+class CountingPipeline:
+    """Queues commands, and sends them to a CountingRedis in one round trip."""
+
+    def __init__(self, client, transaction):
+        self.client = client
+        self.transaction = transaction
+        self.queued = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.queued = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.queued.append((name, args, kwargs))
+
+    def execute(self):
+        results = [
+            getattr(self.client, name)(*args, **kwargs)
+            for name, args, kwargs in self.queued
+        ]
+        self.client.commands -= len(self.queued) - 1
+        self.queued = []
+        return results
+
+
+class Uncached(HasRedisFields):
+    count = RedisField(serde=INT_SERDE)
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self.hname = "thing"
+
+
+class Cached(Uncached):
+    count = RedisField(serde=INT_SERDE, cache_ttl=60)
+    details = RedisField(serde=JSON_SERDE, cache_ttl=60)
+
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    return now
+
+
+def test_fields_are_read_on_every_access_by_default():
+    client = CountingRedis()
+    thing = Uncached(client)
+    thing.count = 1
+    assert thing.count == 1
+    assert thing.count == 1
+    assert client.commands == 3
+
+
+def test_cached_fields_are_read_once(fake_time):
+    client = CountingRedis()
+    client.hashes["thing"] = {"count": "1"}
+    thing = Cached(client)
+    assert thing.count == 1
+    client.hashes["thing"]["count"] = "2"
+    assert thing.count == 1
+    assert client.commands == 1
+
+    # missing fields are cached too
+    assert thing.details is None
+    assert thing.details is None
+    assert client.commands == 2
+
+    fake_time[0] = 61
+    assert thing.count == 2
+    assert client.commands == 3
+
+
+def test_cached_fields_are_written_through(fake_time):
+    client = CountingRedis()
+    thing = Cached(client)
+    thing.details = {"a": 1}
+    assert client.hashes["thing"]["details"] == '{"a": 1}'
+
+    # each read deserializes a new copy
+    details = thing.details
+    details["b"] = 2
+    assert thing.details == {"a": 1}
+    assert client.commands == 1
+
+
+def test_invalidate_cache(fake_time):
+    client = CountingRedis()
+    thing = Cached(client)
+    invalidate_cache(thing)
+    thing.count = 1
+    thing.details = {}
+    client.hashes["thing"] = {"count": "2", "details": '{"a": 1}'}
+
+    invalidate_cache(thing, "count")
+    assert thing.count == 2
+    assert thing.details == {}
+    invalidate_cache(thing)
+    assert thing.details == {"a": 1}
+    assert client.commands == 4
+
+
+def test_cache_ttl_set_on_the_instance(fake_time):
+    client = CountingRedis()
+    client.hashes["thing"] = {"count": "1"}
+    thing = Uncached(client)
+    thing.redis_field_cache_ttl = 5
+    assert thing.count == 1
+    assert thing.count == 1
+    assert client.commands == 1
+
+
+class Subclassed(Cached):
+    name = RedisField()
+
+
+def test_refresh_reads_every_field_at_once(fake_time):
+    client = CountingRedis()
+    client.hashes["thing"] = {"count": "1", "details": '{"a": 1}', "name": "foo"}
+    thing = Subclassed(client)
+    assert thing.refresh() == {"count": 1, "details": {"a": 1}, "name": "foo"}
+    assert client.commands == 1
+
+    # fields with a cache_ttl are cached until they expire
+    client.hashes["thing"] = {"count": "2", "details": "{}", "name": "bar"}
+    assert (thing.count, thing.details) == (1, {"a": 1})
+    assert client.commands == 1
+    fake_time[0] = 61
+    assert (thing.count, thing.details) == (2, {})
+    assert client.commands == 3
+
+    # fields without one are not cached, and are read from redis on every access
+    assert thing.name == "bar"
+    assert thing.name == "bar"
+    assert client.commands == 5
+    thing.name = "baz"
+    assert thing.name == "baz"
+    assert client.commands == 7
+
+
+def test_refresh_caches_fields_with_the_instance_cache_ttl(fake_time):
+    client = CountingRedis()
+    client.hashes["thing"] = {"count": "1"}
+    thing = Uncached(client)
+    thing.redis_field_cache_ttl = 5
+    assert thing.refresh() == {"count": 1}
+    client.hashes["thing"]["count"] = "2"
+    assert thing.count == 1
+    fake_time[0] = 6
+    assert thing.count == 2
+    assert client.commands == 2
+
+
+def test_refresh_without_fields():
+    class NoFields(HasRedisFields):
+        pass
+
+    assert refresh_fields(NoFields()) == {}
+
+
+def test_invalid_fields():
+    assert isinstance(Cached.count, RedisField)
+    with pytest.raises(ValueError):
+        RedisField(cache_ttl=-1)
+
+    class NoMeta:
+        field = RedisField()
+
+    with pytest.raises(TypeError):
+        NoMeta().field
+
+
+def test_buffered_writes_are_saved_together(fake_time):
+    client = CountingRedis()
+    thing = Subclassed(client)
+    thing.count = 1
+    with thing.buffer_writes(expire=10):
+        thing.count = 2
+        thing.name = "foo"
+        assert (thing.count, thing.name) == (2, "foo")
+        assert client.hashes["thing"] == {"count": "1"}
+    assert client.hashes["thing"] == {"count": "2", "name": "foo"}
+    assert client.ttls["thing"] == 10
+    # one write before the block, and one transaction at its end
+    assert client.commands == 2
+    assert thing.count == 2
+    assert client.commands == 2
+
+    with thing.buffer_writes():
+        thing.name = "bar"
+        thing.save()
+        assert client.hashes["thing"]["name"] == "bar"
+        with pytest.raises(RuntimeError, match="already buffered"):
+            with thing.buffer_writes():
+                pass
+    assert client.commands == 3
+
+
+def test_buffered_writes_are_discarded_on_error():
+    client = CountingRedis()
+    thing = Subclassed(client)
+    with pytest.raises(ZeroDivisionError):
+        with thing.buffer_writes():
+            thing.name = "foo"
+            1 / 0
+    assert client.commands == 0
+    assert thing.name is None
+
+
+def test_redis_task_creation_takes_two_round_trips():
+    client = CountingRedis()
+    task = RedisTask(client, "foo", user_id=10, payload="bar", endpoint_id="baz")
+    assert client.commands == 2
+    assert client.hashes[task.hname] == {
+        "status": "waiting-for-ep",
+        "internal_status": "incomplete",
+        "user_id": "10",
+        "payload": '"bar"',
+        "endpoint_id": "baz",
+    }
+    assert client.ttls[task.hname] == RedisTask.DEFAULT_TTL
+
+    # loading a task neither overwrites its state nor extends its expiry
+    client.hashes[task.hname]["status"] = "success"
+    client.ttls[task.hname] = 10
+    task = RedisTask.load(client, "foo")
+    assert task.status == TaskState.SUCCESS
+    assert client.ttls[task.hname] == 10
+
+
+def test_fields_are_registered_on_the_class():
+    assert list(Uncached.__redis_fields__) == ["count"]
+    assert list(Subclassed.__redis_fields__) == ["count", "details", "name"]
+    # a redefined field replaces the one which it overrides
+    assert Subclassed.__redis_fields__["count"] is Cached.count
+    assert Cached.count is not Uncached.count
+
+    class Hidden(Subclassed):
+        details = None
+        extra = RedisField(serde=INT_SERDE)
+
+    assert list(Hidden.__redis_fields__) == ["count", "name", "extra"]
+    with pytest.raises(TypeError):
+        Hidden.__redis_fields__["foo"] = RedisField()
+
+
+class WithRequiredFields(HasRedisFields):
+    name = RedisField(required=True)
+    size = RedisField(serde=INT_SERDE, required=True, default=0)
+    tags = RedisField(serde=JSON_SERDE, default=())
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self.hname = "thing"
+
+
+def test_required_fields_and_defaults():
+    client = CountingRedis()
+    thing = WithRequiredFields(client)
+    assert thing.__redis_fields__["size"].required
+    assert (thing.name, thing.size, thing.tags) == (None, 0, ())
+    assert thing.missing_fields() == ["name", "size"]
+    assert thing.refresh() == {"name": None, "size": 0, "tags": ()}
+
+    thing.size = 3
+    assert missing_fields(thing) == ["name"]
+    assert thing.size == 3
+    assert missing_fields(Uncached(client)) == []
+
+
+def test_missing_fields_reads_field_keys():
+    # a field object assigned to two names has a single key, which is read for both
+    shared = RedisField(required=True)
+
+    class Aliased(HasRedisFields):
+        first = shared
+        second = shared
+
+        def __init__(self, redis_client):
+            self.redis_client = redis_client
+            self.hname = "thing"
+
+    client = CountingRedis()
+    thing = Aliased(client)
+    assert shared.key == "second"
+    assert thing.missing_fields() == ["first", "second"]
+    thing.second = "x"
+    assert thing.missing_fields() == []
+    assert thing.first == "x"
+
+
+@pytest.mark.parametrize("default", [[], {}, set(), bytearray()])
+def test_mutable_defaults_are_rejected(default):
+    with pytest.raises(ValueError, match="mutable default"):
+        RedisField(default=default)
+
+
+def test_redis_task_required_fields():
+    client = CountingRedis()
+    task = RedisTask(client, "foo", user_id=10, function_id="bar")
+    assert task.missing_fields() == [
+        "owner_id",
+        "container",
+        "task_group_id",
+        "queue_name",
+    ]
@@ -3,14 +3,33 @@ import uuid
 import pytest
 
 from globus_compute_common.redis import (
+    BINARY_UUID_SERDE,
     DEFAULT_SERDE,
+    FLOAT_SERDE,
     INT_SERDE,
     JSON_SERDE,
+    MSGPACK_SERDE,
     UUID_SERDE,
     ComputeRedisEnumSerde,
+    default_redis_connection_factory,
 )
+from globus_compute_common.redis import serde as serde_module
 from globus_compute_common.tasks import TaskState
 
+try:
+    import msgpack  # noqa: F401
+
+    has_msgpack = True
+except ImportError:
+    has_msgpack = False
+
+try:
+    import redis  # noqa: F401
+
+    has_redis = True
+except ImportError:
+    has_redis = False
+
 
 def test_basic_serde():
     assert DEFAULT_SERDE.serialize("foo") == "foo"
@@ -53,3 +72,63 @@ def test_uuid_serde():
     with pytest.raises(ValueError) as exc_info:
         UUID_SERDE.deserialize("not-a-uuid")
     assert "Invalid UUID" in str(exc_info.value)
+
+
+def test_text_serdes_read_bytes():
+    # as returned by a connection which does not decode responses
+    assert DEFAULT_SERDE.deserialize(b"foo") == "foo"
+    assert INT_SERDE.deserialize(b"1") == 1
+    assert FLOAT_SERDE.deserialize(b"1.5") == 1.5
+    assert JSON_SERDE.deserialize(b'{"a": 1}') == {"a": 1}
+    assert ComputeRedisEnumSerde(TaskState).deserialize(b"running") is TaskState.RUNNING
+    uuid_obj = uuid.uuid4()
+    assert UUID_SERDE.deserialize(str(uuid_obj).encode()) == uuid_obj
+    with pytest.raises(ValueError, match="Invalid int value"):
+        INT_SERDE.deserialize(b"1.0")
+
+
+def test_binary_uuid_serde():
+    uuid_obj = uuid.uuid4()
+    assert BINARY_UUID_SERDE.serialize(uuid_obj) == uuid_obj.bytes
+    assert BINARY_UUID_SERDE.serialize(str(uuid_obj)) == uuid_obj.bytes
+    assert BINARY_UUID_SERDE.deserialize(uuid_obj.bytes) == uuid_obj
+
+    # values stored as text are still read
+    assert BINARY_UUID_SERDE.deserialize(str(uuid_obj)) == uuid_obj
+    assert BINARY_UUID_SERDE.deserialize(str(uuid_obj).encode()) == uuid_obj
+    with pytest.raises(ValueError, match="Invalid UUID"):
+        BINARY_UUID_SERDE.deserialize(b"not-a-uuid")
+
+
+@pytest.mark.skipif(not has_msgpack, reason="test requires msgpack lib")
+def test_msgpack_serde():
+    value = {"storage_id": "s3", "s3bucket": "foo", "key": "bar", "size": [1, 2.5]}
+    packed = MSGPACK_SERDE.serialize(value)
+    assert isinstance(packed, bytes)
+    assert len(packed) < len(JSON_SERDE.serialize(value))
+    assert MSGPACK_SERDE.deserialize(packed) == value
+    assert MSGPACK_SERDE.deserialize(MSGPACK_SERDE.serialize(None)) is None
+
+    # values stored as JSON are still read
+    assert MSGPACK_SERDE.deserialize(JSON_SERDE.serialize(value)) == value
+    assert MSGPACK_SERDE.deserialize(JSON_SERDE.serialize(value).encode()) == value
+    assert MSGPACK_SERDE.deserialize(b"123") == 123
+
+
+def test_msgpack_serde_without_msgpack_lib(monkeypatch):
+    monkeypatch.setattr(serde_module, "has_msgpack", False)
+    with pytest.raises(RuntimeError, match="msgpack"):
+        MSGPACK_SERDE.serialize({})
+    with pytest.raises(RuntimeError, match="msgpack"):
+        MSGPACK_SERDE.deserialize(b"\xc1\x80")
+    assert MSGPACK_SERDE.deserialize("{}") == {}
+
+
+@pytest.mark.skipif(not has_redis, reason="test requires redis lib")
+@pytest.mark.parametrize("decode_responses", [True, False])
+def test_connection_factory_decode_responses(decode_responses):
+    client = default_redis_connection_factory(
+        "redis://localhost:6379", decode_responses=decode_responses
+    )
+    kwargs = client.connection_pool.connection_kwargs
+    assert kwargs["decode_responses"] is decode_responses
@@ -1,4 +1,5 @@
 import random
+import time
 import uuid
 
 import pytest
@@ -14,10 +15,111 @@ try:
 except ImportError:
     has_redis = False
 
-if not has_redis or not LOCAL_REDIS_REACHABLE:
-    pytest.skip(
-        "these tests only run with access to local redis", allow_module_level=True
-    )
+
+class MemoryRedis:
+    """
+    An in-memory stand-in for a `redis.Redis(decode_responses=True)` client, with
+    only the commands which RedisTask uses, so that its tests run without a redis
+    server.
+
+    The commands run by each transaction are recorded in `transactions`.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.deadlines = {}
+        self.transactions = []
+
+    def _get(self, name):
+        deadline = self.deadlines.get(name)
+        if deadline is not None and deadline <= time.monotonic():
+            self.delete(name)
+        return self.data.get(name)
+
+    @staticmethod
+    def _encode(value):
+        # as redis-py does, store numbers as their string representations
+        if isinstance(value, bytes):
+            return value.decode()
+        if isinstance(value, (str, int, float)):
+            return str(value)
+        raise TypeError(f"invalid input of type {type(value).__name__}")
+
+    def hget(self, name, key):
+        return (self._get(name) or {}).get(key)
+
+    def hmget(self, name, keys):
+        values = self._get(name) or {}
+        return [values.get(key) for key in keys]
+
+    def hset(self, name, key=None, value=None, mapping=None):
+        items = dict(mapping or {})
+        if key is not None:
+            items[key] = value
+        values = self.data[name] = self._get(name) or {}
+        values.update((k, self._encode(v)) for k, v in items.items())
+        return len(items)
+
+    def rpush(self, name, *values):
+        items = self.data[name] = self._get(name) or []
+        items.extend(self._encode(value) for value in values)
+        return len(items)
+
+    def lrange(self, name, start, end):
+        return (self._get(name) or [])[start : None if end == -1 else end + 1]
+
+    def exists(self, name):
+        return int(self._get(name) is not None)
+
+    def delete(self, *names):
+        for name in names:
+            self.deadlines.pop(name, None)
+        return sum(self.data.pop(name, None) is not None for name in names)
+
+    def ttl(self, name):
+        if self._get(name) is None:
+            return -2
+        deadline = self.deadlines.get(name)
+        if deadline is None:
+            return -1
+        return round(deadline - time.monotonic())
+
+    def expire(self, name, seconds):
+        if self._get(name) is None:
+            return False
+        self.deadlines[name] = time.monotonic() + seconds
+        return True
+
+    def pipeline(self, transaction=True):
+        return MemoryPipeline(self, transaction)
+
+
+class MemoryPipeline:
+    def __init__(self, client, transaction):
+        self.client = client
+        self.transaction = transaction
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+
+        return queue
+
+    def execute(self):
+        commands, self.commands = self.commands, []
+        if self.transaction:
+            self.client.transactions.append([name for name, _, _ in commands])
+        return [
+            getattr(self.client, name)(*args, **kwargs)
+            for name, args, kwargs in commands
+        ]
 
 
 @pytest.fixture(autouse=True)
@@ -25,8 +127,21 @@ def lower_ttl_for_test():
     RedisTask.DEFAULT_TTL = 10  # Play nice with local infrastructure
 
 
-@pytest.fixture
-def redis_client():
+@pytest.fixture(
+    params=[
+        "memory",
+        pytest.param(
+            "local",
+            marks=pytest.mark.skipif(
+                not has_redis or not LOCAL_REDIS_REACHABLE,
+                reason="these tests only run with access to local redis",
+            ),
+        ),
+    ]
+)
+def redis_client(request):
+    if request.param == "memory":
+        return MemoryRedis()
     return redis.Redis("localhost", port=6379, decode_responses=True)
 
 
@@ -90,6 +205,45 @@ def test_redis_task_create(redis_client, add_kwargs):
         assert task.details is None
 
 
+def test_redis_task_create_writes_in_one_transaction():
+    redis_client = MemoryRedis()
+    task_id = str(uuid.uuid1())
+
+    RedisTask(redis_client, task_id, user_id=10)
+    assert redis_client.transactions == [["hset", "expire"]]
+
+    # an existing task which needs neither defaults nor a new TTL is not written
+    RedisTask(redis_client, task_id)
+    assert redis_client.transactions == [["hset", "expire"]]
+
+
+@pytest.mark.parametrize("existing_ttl, expect_ttl", [(None, 10), (1000, 10), (5, 5)])
+def test_redis_task_init_existing_task(redis_client, existing_ttl, expect_ttl):
+    task_id = str(uuid.uuid1())
+    hname = f"task_{task_id}"
+    redis_client.hset(
+        hname,
+        mapping={
+            "status": TaskState.SUCCESS.value,
+            "internal_status": InternalTaskState.COMPLETE.value,
+            "user_id": 3,
+        },
+    )
+    if existing_ttl is not None:
+        redis_client.expire(hname, existing_ttl)
+
+    task = RedisTask(redis_client, task_id, endpoint_id="foo")
+
+    # the existing state is not reset to its defaults, and new fields are written
+    assert task.status == TaskState.SUCCESS
+    assert task.internal_status == InternalTaskState.COMPLETE
+    assert task.user_id == 3
+    assert task.endpoint_id == "foo"
+
+    # a missing or longer TTL is lowered to the default, and a shorter one is kept
+    assert abs(task.ttl - expect_ttl) <= 1
+
+
 def test_redis_task_cannot_increase_ttl(redis_client):
     task_id = str(uuid.uuid1())
     task = RedisTask(redis_client, task_id)
@@ -133,3 +287,42 @@ def test_redis_state_log(redis_client):
 
     assert to_store == rt.status_log
     assert 0 < redis_client.ttl(rt.state_log_name) <= rt.DEFAULT_TTL
+
+
+def test_redis_task_field_cache(redis_client):
+    task_id = str(uuid.uuid4())
+    task = RedisTask(redis_client, task_id, endpoint_id="foo")
+    task.redis_field_cache_ttl = 60
+
+    assert task.endpoint_id == "foo"
+    redis_client.hset(task.hname, "endpoint_id", "bar")
+    assert task.endpoint_id == "foo"  # cached
+
+    task.status = TaskState.SUCCESS  # written through
+    assert RedisTask.load(redis_client, task_id).status == TaskState.SUCCESS
+    assert task.status == TaskState.SUCCESS
+
+    task.delete()
+    assert task.endpoint_id is None
+
+
+def test_redis_task_refresh(redis_client):
+    task_id = str(uuid.uuid4())
+    RedisTask(redis_client, task_id, user_id=10, details={"a": 1})
+
+    task = RedisTask.load(redis_client, task_id)
+    fields = task.refresh()
+    assert fields["status"] == TaskState.WAITING_FOR_EP
+    assert fields["user_id"] == 10
+    assert fields["details"] == {"a": 1}
+    assert fields["result"] is None
+
+    # fields are not cached, unless a cache_ttl is set
+    redis_client.hset(task.hname, "user_id", "11")
+    assert task.user_id == 11
+    task.redis_field_cache_ttl = 60
+    task.refresh()
+    redis_client.hset(task.hname, "user_id", "12")
+    assert task.user_id == 11
+    task.invalidate_cache()
+    assert task.user_id == 12